@@ -0,0 +1,213 @@
+"""
+Backup em streaming (Parquet ou CSV.gz) com manifesto de checksum e
+restauração em blocos pelo caminho rápido de inserção.
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from lazy_imports import lazy_import
+from datetime import datetime
+from config import BACKUP_CONFIG
+pd = lazy_import('pandas')
+
+# Esquema fixo das colunas do dashboard no backup
+BACKUP_SCHEMA = {
+    'Nome': 'string',
+    'CPF/CNPJ': 'string',
+    'Total': 'float64',
+    'Taxa': 'float64',
+    'Situação': 'string',
+    'Paga com': 'string',
+    'Data de criação': 'datetime64[ns]',
+    'Data do pagamento': 'datetime64[ns]'
+}
+
+FORMATOS = {
+    'parquet': '.parquet',
+    'csv.gz': '.csv.gz'
+}
+
+class _HashingWriter:
+    """Arquivo que calcula o SHA-256 do que é escrito."""
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.sha256 = hashlib.sha256()
+        self.bytes_escritos = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.bytes_escritos += len(data)
+        return self.arquivo.write(data)
+
+    def flush(self):
+        self.arquivo.flush()
+
+    def tell(self):
+        return self.bytes_escritos
+
+    @property
+    def closed(self):
+        return self.arquivo.closed
+
+    def writable(self):
+        return True
+
+def normalizar_chunk(df):
+    """Converte um bloco para o esquema do backup."""
+    chunk = df.reindex(columns=list(BACKUP_SCHEMA))
+    for col, dtype in BACKUP_SCHEMA.items():
+        if dtype.startswith('datetime'):
+            chunk[col] = pd.to_datetime(chunk[col], errors='coerce', format='mixed', utc=True).dt.tz_localize(None)
+        elif dtype == 'float64':
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+        else:
+            chunk[col] = chunk[col].astype('string')
+    return chunk
+
+def _caminho_manifesto(caminho):
+    return caminho + '.manifest.json'
+
+_diretorio = None
+_diretorio_lock = threading.Lock()
+
+def diretorio_temporario():
+    """Diretório dos backups gerados por este processo (removido ao encerrar)."""
+    global _diretorio
+    with _diretorio_lock:
+        if _diretorio is None or not os.path.isdir(_diretorio):
+            _diretorio = tempfile.mkdtemp(prefix='backups_faturamento_')
+            atexit.register(shutil.rmtree, _diretorio, ignore_errors=True)
+        return _diretorio
+
+def remove_backup(caminho):
+    """Apaga o arquivo de backup e o manifesto ao lado dele (os que existirem)."""
+    for arquivo in (caminho, _caminho_manifesto(caminho)):
+        try:
+            os.remove(arquivo)
+        except FileNotFoundError:
+            pass
+
+def write_backup(chunks, caminho, formato=None):
+    """Escreve os blocos em disco um a um e grava o manifesto ao lado do arquivo."""
+    formato = formato or BACKUP_CONFIG['formato_padrao']
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de backup não suportado: {formato}")
+
+    linhas = 0
+    blocos = 0
+    with open(caminho, 'wb') as arquivo:
+        destino = _HashingWriter(arquivo)
+        if formato == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            writer = None
+            try:
+                for chunk in chunks:
+                    tabela = pa.Table.from_pandas(normalizar_chunk(chunk), preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(destino, tabela.schema, compression=BACKUP_CONFIG['compressao_parquet'])
+                    writer.write_table(tabela.cast(writer.schema))
+                    linhas += len(chunk)
+                    blocos += 1
+                if writer is None:
+                    # Backup vazio: arquivo válido só com o esquema
+                    vazio = pa.Table.from_pandas(normalizar_chunk(pd.DataFrame()), preserve_index=False)
+                    writer = pq.ParquetWriter(destino, vazio.schema)
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            with gzip.GzipFile(fileobj=destino, mode='wb') as gz:
+                for chunk in chunks:
+                    texto = normalizar_chunk(chunk).to_csv(index=False, header=(blocos == 0))
+                    gz.write(texto.encode('utf-8'))
+                    linhas += len(chunk)
+                    blocos += 1
+                if blocos == 0:
+                    gz.write(normalizar_chunk(pd.DataFrame()).to_csv(index=False).encode('utf-8'))
+
+    manifesto = {
+        'arquivo': os.path.basename(caminho),
+        'formato': formato,
+        'linhas': linhas,
+        'blocos': blocos,
+        'colunas': list(BACKUP_SCHEMA),
+        'bytes': destino.bytes_escritos,
+        'sha256': destino.sha256.hexdigest(),
+        'criado_em': datetime.now().isoformat()
+    }
+    with open(_caminho_manifesto(caminho), 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+    return manifesto
+
+def checksum(caminho):
+    """SHA-256 do arquivo, lido em blocos."""
+    sha256 = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+def load_manifest(caminho):
+    """Lê o manifesto gravado ao lado do backup, se existir."""
+    caminho_manifesto = _caminho_manifesto(caminho)
+    if not os.path.exists(caminho_manifesto):
+        return None
+    with open(caminho_manifesto, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+def detect_format(caminho):
+    for formato, extensao in FORMATOS.items():
+        if caminho.endswith(extensao):
+            return formato
+    raise ValueError(f"Extensão de backup desconhecida: {caminho}")
+
+def read_backup(caminho, formato=None, linhas_por_bloco=None):
+    """Lê o backup em blocos de DataFrame."""
+    formato = formato or detect_format(caminho)
+    linhas_por_bloco = linhas_por_bloco or BACKUP_CONFIG['linhas_por_bloco']
+
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+
+        arquivo = pq.ParquetFile(caminho)
+        for batch in arquivo.iter_batches(batch_size=linhas_por_bloco):
+            yield batch.to_pandas()
+    else:
+        leitor = pd.read_csv(
+            caminho,
+            compression='gzip',
+            chunksize=linhas_por_bloco,
+            dtype={'Nome': 'string', 'CPF/CNPJ': 'string', 'Situação': 'string', 'Paga com': 'string'},
+            parse_dates=['Data de criação', 'Data do pagamento']
+        )
+        for chunk in leitor:
+            yield chunk
+
+def verify_backup(caminho, manifesto=None):
+    """Confere o checksum do arquivo com o manifesto."""
+    manifesto = manifesto or load_manifest(caminho)
+    if manifesto is None:
+        raise ValueError("Manifesto do backup não encontrado")
+    if checksum(caminho) != manifesto['sha256']:
+        raise ValueError("Checksum do backup não confere com o manifesto")
+    return manifesto
+
+def restore_backup(db, caminho, manifesto=None, verificar=True):
+    """Substitui os dados pelo backup, lido bloco a bloco; retorna o total de linhas carregadas.
+
+    A carga passa pela substituição atômica: uma falha no meio mantém os dados atuais.
+    """
+    if verificar:
+        manifesto = verify_backup(caminho, manifesto)
+    formato = manifesto['formato'] if manifesto else None
+    total = db.replace_faturamento_blocos(read_backup(caminho, formato))
+    if total is False:
+        raise RuntimeError("Falha ao carregar o backup; os dados atuais foram mantidos")
+    return total
@@ -0,0 +1,117 @@
+"""
+Abertura simultânea do dashboard: várias sessões pedem os dados (com
+colunas de seções diferentes) enquanto o pré-cálculo da mesma versão ainda
+está carregando, contra o LocalSupabaseClient com latência injetada. Com e
+sem o agrupamento de cargas: requisições ao backend, tempo até todas as
+sessões terem os dados e pico de memória com todos os resultados em uso.
+Cada caso roda em um processo separado.
+
+Uso: python -m benchmarks.bench_abertura [sessoes] [linhas] [latencia_ms]
+"""
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Colunas pedidas pelas sessões (como as seções do main.py), em rodízio
+COLUNAS_SESSOES = [
+    ['CPF/CNPJ', 'Total', 'Situação', 'Data de criação'],
+    ['Nome', 'CPF/CNPJ', 'Total', 'Taxa', 'Situação', 'Paga com', 'Data de criação', 'Data do pagamento'],
+    ['Situação', 'Paga com'],
+    ['Data de criação', 'Total', 'Situação']
+]
+
+_EXECUTAR = """
+import sys
+sys.path.insert(0, {raiz!r})
+from benchmarks.bench_abertura import executar
+executar({agrupar!r}, {sessoes!r}, {linhas!r}, {latencia_ms!r})
+"""
+
+def executar(agrupar, sessoes, linhas, latencia_ms):
+    """Roda um caso neste processo e imprime o resultado em JSON."""
+    import threading
+    import time
+    from config import LEITURA_CONFIG
+    from database import DatabaseManager
+    from local_backend import LocalSupabaseClient
+    from benchmarks.bench_sessoes import _PicoMemoria, _rss_mb
+    from benchmarks.dados_sinteticos import gerar_faturamento
+
+    client = LocalSupabaseClient()
+    registros = DatabaseManager(mode="memory")._to_records(gerar_faturamento(linhas, seed=4, dias=365))
+    for inicio in range(0, len(registros), 50000):
+        client.table('faturamento').insert(registros[inicio:inicio + 50000]).execute()
+    del registros
+    LEITURA_CONFIG['agrupar_cargas'] = agrupar
+    rss_base = _rss_mb()
+
+    # Processo recém-iniciado: o pré-cálculo começa a carregar e as sessões chegam em seguida
+    client.latencia = latencia_ms / 1000
+    pico = _PicoMemoria(intervalo=0.01)
+    pico.start()
+    inicio = time.perf_counter()
+    db = DatabaseManager(client=client)
+    resultados = [None] * sessoes
+    todas = threading.Barrier(sessoes)
+
+    def sessao(i):
+        df = db.get_all_faturamento(COLUNAS_SESSOES[i % len(COLUNAS_SESSOES)])
+        # Coluna derivada na sessão (como o DataProcessor): não pode aparecer nas outras
+        df['Sessao'] = i
+        resultados[i] = df
+        todas.wait()  # todos os resultados em uso ao mesmo tempo
+
+    threads = [threading.Thread(target=sessao, args=(i,)) for i in range(sessoes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    rss_pico = pico.parar()
+    requisicoes = client.requisicoes
+    db.precompute.wait()
+
+    erros = []
+    for i, df in enumerate(resultados):
+        esperadas = COLUNAS_SESSOES[i % len(COLUNAS_SESSOES)] + ['Sessao']
+        if len(df) != linhas or sorted(df.columns) != sorted(esperadas) or (df['Sessao'] != i).any():
+            erros.append(f"sessão {i}: {len(df)} linhas, colunas {list(df.columns)}")
+    artefatos = db.get_precomputed()
+    if artefatos is None or artefatos.linhas != linhas or 'Sessao' in artefatos.colunas:
+        erros.append("pré-cálculo sem a versão carregada ou com coluna de uma sessão")
+    print(json.dumps({
+        'duracao_s': duracao,
+        'requisicoes': requisicoes,
+        'buscas': db.cargas.execucoes if agrupar else None,
+        'agrupadas': db.cargas.agrupadas,
+        'memoria_mb': rss_pico - rss_base,
+        'erros': erros
+    }))
+
+def main(sessoes=10, linhas=100000, latencia_ms=20):
+    print(f"{sessoes} sessões e o pré-cálculo ao mesmo tempo, {linhas} linhas, latência de {latencia_ms} ms")
+    falhas = []
+    for agrupar in [False, True]:
+        codigo = _EXECUTAR.format(raiz=RAIZ, agrupar=agrupar, sessoes=sessoes, linhas=linhas, latencia_ms=latencia_ms)
+        saida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True)
+        if saida.returncode != 0:
+            falhas.append(saida.stderr.strip().splitlines()[-1])
+            continue
+        r = json.loads(saida.stdout.strip().splitlines()[-1])
+        nome = 'cargas agrupadas' if agrupar else 'uma busca por chamada'
+        buscas = f"buscas: {r['buscas'] if agrupar else sessoes + 1}, chamadas agrupadas: {r['agrupadas']}"
+        print(f"  {nome:<22} {r['duracao_s']:6.2f}s  {r['requisicoes']:5d} requisições  "
+              f"memória {r['memoria_mb']:7.1f} MB  ({buscas})")
+        falhas.extend(r['erros'])
+
+    if falhas:
+        print("\nFalhas:")
+        for falha in falhas:
+            print(f"  - {falha}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:4]))
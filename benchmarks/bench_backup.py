@@ -0,0 +1,38 @@
+"""
+Benchmark de backup em streaming e restauração em blocos (modo memória).
+
+Uso: python -m benchmarks.bench_backup [linhas]
+"""
+import os
+import sys
+import tempfile
+import time
+from database import DatabaseManager
+from benchmarks.dados_sinteticos import gerar_faturamento
+
+def _tempo(func):
+    inicio = time.perf_counter()
+    resultado = func()
+    return resultado, time.perf_counter() - inicio
+
+def main(linhas=500000):
+    origem = DatabaseManager(mode="memory")
+    df = gerar_faturamento(linhas)
+    for inicio in range(0, linhas, 50000):
+        origem.insert_faturamento(df.iloc[inicio:inicio + 50000])
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        # Referência: CSV inteiro em memória (comportamento anterior)
+        csv, t_csv = _tempo(lambda: origem.get_all_faturamento().to_csv(index=False))
+        print(f"csv em memória     {t_csv:7.2f}s  {len(csv.encode('utf-8')) / 1e6:8.1f} MB")
+
+        for formato in ['parquet', 'csv.gz']:
+            (caminho, manifesto), t_backup = _tempo(lambda: origem.backup_data(formato, diretorio))
+            destino = DatabaseManager(mode="memory")
+            restaurados, t_restore = _tempo(lambda: destino.restore_data(caminho, manifesto))
+            assert restaurados == manifesto['linhas'] == linhas
+            tamanho = os.path.getsize(caminho) / 1e6
+            print(f"backup {formato:<11} {t_backup:7.2f}s  {tamanho:8.1f} MB   restore {t_restore:7.2f}s")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
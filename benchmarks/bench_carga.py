@@ -0,0 +1,59 @@
+"""
+Carga da tabela do Supabase com latência injetada (LocalSupabaseClient):
+cursor único paginado contra partições mensais buscadas em paralelo, para
+vários níveis de paralelismo. Verifica que cada carga traz todas as linhas,
+sem repetições, inclusive as sem data de criação.
+
+Uso: python -m benchmarks.bench_carga [linhas] [latencia_ms]
+"""
+import sys
+import time
+import pandas as pd
+from config import LEITURA_CONFIG
+from database import DatabaseManager, DB_COLUMNS
+from local_backend import LocalSupabaseClient
+from benchmarks.dados_sinteticos import gerar_faturamento
+
+PARALELISMO = [1, 2, 4, 8, 16]
+
+def _popular(client, linhas):
+    """Dois anos de transações e algumas linhas sem data de criação, inseridas direto no banco."""
+    df = gerar_faturamento(linhas, seed=3, dias=730)
+    registros = DatabaseManager(mode="memory")._to_records(df)
+    for registro in registros[::500]:
+        registro['data_criacao'] = None
+    for inicio in range(0, len(registros), 50000):
+        client.table('faturamento').insert(registros[inicio:inicio + 50000]).execute()
+    return {linha[0] for linha in client._conn.execute("select id from faturamento")}
+
+def _conferir(df, ids, contexto):
+    obtidos = df.index if df.index.name == 'id' else df['id']
+    assert len(obtidos) == len(ids), f"{contexto}: {len(obtidos)} linhas, esperado {len(ids)}"
+    assert set(obtidos) == ids, f"{contexto}: linhas diferentes"
+
+def main(linhas=100000, latencia_ms=50):
+    client = LocalSupabaseClient()
+    ids = _popular(client, linhas)
+    db = DatabaseManager(client=client)
+    db.precompute.wait()
+    client.latencia = latencia_ms / 1000
+    print(f"{linhas} linhas, latência de {latencia_ms} ms por requisição")
+
+    # Referência: um cursor sequencial, página a página (como o backup percorre a tabela)
+    antes, inicio = client.requisicoes, time.perf_counter()
+    df = pd.concat(list(db.iter_faturamento()), ignore_index=True)
+    t_cursor = time.perf_counter() - inicio
+    _conferir(df, ids, "cursor único")
+    print(f"  cursor único            {t_cursor:7.2f}s  {client.requisicoes - antes:4d} requisições")
+
+    for paralelas in PARALELISMO:
+        LEITURA_CONFIG['requisicoes_paralelas'] = paralelas
+        antes, inicio = client.requisicoes, time.perf_counter()
+        df = db._fetch_supabase(list(DB_COLUMNS))
+        duracao = time.perf_counter() - inicio
+        _conferir(df, ids, f"{paralelas} em paralelo")
+        print(f"  partições, {paralelas:2d} paralelas {duracao:7.2f}s  {client.requisicoes - antes:4d} requisições  "
+              f"({t_cursor / duracao:4.1f}x)")
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
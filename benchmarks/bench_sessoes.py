@@ -0,0 +1,247 @@
+"""
+Teste de carga com várias sessões simuladas do main.py (AppTest): carga
+inicial, troca de seção, granularidade e filtros, reexecuções e uploads,
+contra o modo memória e o banco local (SQLite). Reporta latência p50/p95
+das reexecuções, memória por sessão e vazão.
+
+O AppTest troca estado global do Streamlit a cada execução (Runtime, st.secrets),
+então as execuções das sessões são serializadas: cada sessão é uma thread que
+espera a vez, e a latência inclui essa espera, como num servidor saturado.
+O cache compartilhado (st.cache_resource) e o pré-cálculo em segundo plano
+são os mesmos de um servidor real.
+
+Uso: python -m benchmarks.bench_sessoes [sessoes] [rodadas] [linhas]
+"""
+import ctypes
+import gc
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BACKENDS = ['memória', 'local']
+
+# Chaves das seções do main.py (valores do seletor de seção)
+SECOES = ['visao_geral', 'faixa', 'ranking', 'status', 'visuais', 'prazos', 'detalhes']
+
+# Fração das sessões que faz upload no meio do roteiro (invalida o pré-cálculo)
+FRACAO_UPLOAD = 0.25
+LINHAS_UPLOAD = 500
+
+_EXECUTAR = """
+import sys
+sys.path.insert(0, {raiz!r})
+from benchmarks.bench_sessoes import executar
+executar({backend!r}, {sessoes!r}, {rodadas!r}, {linhas!r})
+"""
+
+def _liberar_memoria():
+    """Devolve ao sistema a memória já liberada (os alocadores a retêm por um tempo)."""
+    gc.collect()
+    if 'pyarrow' in sys.modules:
+        sys.modules['pyarrow'].default_memory_pool().release_unused()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+def _rss_mb(liberar=True):
+    """Memória residente atual do processo (pico, se /proc não existir)."""
+    if liberar:
+        _liberar_memoria()
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+class _PicoMemoria(threading.Thread):
+    """Amostra a memória residente enquanto as sessões rodam e guarda o pico."""
+
+    def __init__(self, intervalo=0.05):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico = 0.0
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.is_set():
+            self.pico = max(self.pico, _rss_mb(liberar=False))
+            self._parar.wait(self.intervalo)
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+        return self.pico
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+def _banco():
+    """DatabaseManager do cache do main.py (o mesmo para todas as sessões)."""
+    from database import DatabaseManager
+    return next(obj for obj in gc.get_objects() if isinstance(obj, DatabaseManager))
+
+class Sessao:
+    """Uma sessão do dashboard; cada execução espera a vez no `lock` compartilhado."""
+
+    def __init__(self, indice, segredos, lock, csv_upload=None):
+        from streamlit.testing.v1 import AppTest
+        self.indice = indice
+        self.app = AppTest.from_file(os.path.join(RAIZ, 'main.py'), default_timeout=300)
+        self.app.secrets.update(segredos)
+        self.lock = lock
+        self.csv_upload = csv_upload
+        self.latencias = []  # (ação, segundos de espera + execução)
+        self.erros = []
+
+    def _executar(self, acao, preparar=None):
+        inicio = time.perf_counter()
+        with self.lock:
+            if preparar is not None:
+                preparar()
+            self.app.run()
+        self.latencias.append((acao, time.perf_counter() - inicio))
+        self.erros.extend(f"sessão {self.indice}, {acao}: {e.value}" for e in self.app.exception)
+
+    def _radio_secao(self):
+        return next(r for r in self.app.radio if r.label.startswith('📑'))
+
+    def trocar_secao(self, secao):
+        self._executar('seção', lambda: self._radio_secao().set_value(secao))
+
+    def trocar_granularidade(self):
+        radios = [r for r in self.app.radio if not r.label.startswith('📑')]
+        if radios:
+            radio = radios[0]
+            outras = [opcao for opcao in radio.options if opcao != radio.value]
+            self._executar('granularidade', lambda: radio.set_value(random.choice(outras)))
+
+    def trocar_filtro(self):
+        filtros = [s for s in self.app.selectbox if s.label.startswith('🔍')]
+        if filtros:
+            filtro = random.choice(filtros)
+            self._executar('filtro', lambda: filtro.set_value(random.choice(filtro.options)))
+
+    def upload(self, conteudo, nome='faturamento.csv'):
+        """Arquivo no uploader, depois o botão de salvar (duas execuções, como no navegador)."""
+        self._executar('upload', lambda: self.app.sidebar.file_uploader[0].set_value((nome, conteudo, 'text/csv')))
+        salvar = next(b for b in self.app.button if 'Salvar' in b.label)
+        self._executar('upload', salvar.click)
+
+    def roteiro(self, rodadas, secoes):
+        for rodada in range(rodadas):
+            if self.csv_upload is not None and rodada == rodadas // 2:
+                self.upload(self.csv_upload)
+            self.trocar_secao(random.choice(secoes))
+            self.trocar_granularidade()
+            self.trocar_secao('detalhes')
+            self.trocar_filtro()
+            self._executar('reexecução')
+
+def executar(backend, sessoes, rodadas, linhas):
+    """Roda o teste de um backend neste processo e imprime o resultado em JSON."""
+    from benchmarks.dados_sinteticos import gerar_faturamento
+
+    random.seed(0)
+    segredos = {}
+    if backend == 'local':
+        segredos['LOCAL_DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'faturamento.db')
+    lock = threading.Lock()
+
+    # Carga da base por uma sessão, fora da medição
+    inicio = time.perf_counter()
+    carga = Sessao(-1, segredos, lock)
+    carga._executar('inicial')
+    carga.upload(gerar_faturamento(linhas, seed=1).to_csv(index=False).encode())
+    db = _banco()
+    db.precompute.wait()
+    t_carga = time.perf_counter() - inicio
+    # Aquecimento: módulos e artefatos de todas as seções carregados antes da medição de memória
+    for secao in SECOES:
+        carga.trocar_secao(secao)
+    erros = list(carga.erros)
+    del carga
+    rss_base = _rss_mb()
+
+    csv_upload = gerar_faturamento(LINHAS_UPLOAD, seed=2).to_csv(index=False).encode()
+    simuladas = [
+        Sessao(i, segredos, lock, csv_upload if i < max(1, int(sessoes * FRACAO_UPLOAD)) else None)
+        for i in range(sessoes)
+    ]
+    for sessao in simuladas:
+        sessao._executar('inicial')
+
+    # Memória por sessão ativa: pico durante o roteiro concorrente acima da base sem sessões
+    pico = _PicoMemoria()
+    pico.start()
+    threads = [threading.Thread(target=s.roteiro, args=(rodadas, SECOES)) for s in simuladas]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    db.precompute.wait()
+    rss_pico = pico.parar()
+
+    latencias = [latencia for s in simuladas for latencia in s.latencias]
+    por_acao = {}
+    for acao, segundos in latencias:
+        por_acao.setdefault(acao, []).append(segundos)
+    print(json.dumps({
+        'backend': backend,
+        'sessoes': sessoes,
+        'linhas': linhas,
+        'carga_s': t_carga,
+        'execucoes': len(latencias) - sessoes,
+        'duracao_s': duracao,
+        'p50_ms': _percentil([s for _, s in latencias], 50) * 1000,
+        'p95_ms': _percentil([s for _, s in latencias], 95) * 1000,
+        'por_acao': {acao: (_percentil(v, 50) * 1000, _percentil(v, 95) * 1000, len(v)) for acao, v in por_acao.items()},
+        'rss_base_mb': rss_base,
+        'rss_pico_mb': rss_pico,
+        'rss_por_sessao_mb': (rss_pico - rss_base) / sessoes,
+        'rss_final_mb': _rss_mb(),
+        'erros': erros + [erro for s in simuladas for erro in s.erros]
+    }))
+
+def main(sessoes=8, rodadas=4, linhas=50000):
+    falhas = []
+    for backend in BACKENDS:
+        codigo = _EXECUTAR.format(raiz=RAIZ, backend=backend, sessoes=sessoes, rodadas=rodadas, linhas=linhas)
+        # Um processo por backend (o cache do Streamlit é global); diretório sem secrets.toml
+        with tempfile.TemporaryDirectory() as diretorio:
+            saida = subprocess.run([sys.executable, '-c', codigo], cwd=diretorio, capture_output=True, text=True)
+        if saida.returncode != 0:
+            falhas.append(f"{backend}: {saida.stderr.strip().splitlines()[-1]}")
+            continue
+        r = json.loads(saida.stdout.strip().splitlines()[-1])
+        print(f"{backend:<8} {r['sessoes']} sessões, {r['linhas']} linhas (carga {r['carga_s']:.1f}s)")
+        print(f"  reexecuções  p50 {r['p50_ms']:8.1f} ms   p95 {r['p95_ms']:8.1f} ms   "
+              f"vazão {r['execucoes'] / r['duracao_s']:6.1f} execuções/s")
+        for acao, (p50, p95, n) in sorted(r['por_acao'].items()):
+            print(f"    {acao:<13} p50 {p50:8.1f} ms   p95 {p95:8.1f} ms   ({n})")
+        print(f"  memória      base {r['rss_base_mb']:7.1f} MB   pico {r['rss_pico_mb']:7.1f} MB   "
+              f"por sessão ativa {r['rss_por_sessao_mb']:6.1f} MB   final {r['rss_final_mb']:7.1f} MB")
+        falhas.extend(f"{backend}: {erro}" for erro in r['erros'])
+
+    if falhas:
+        print("\nFalhas:")
+        for falha in falhas:
+            print(f"  - {falha}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    argumentos = [int(valor) for valor in sys.argv[1:4]]
+    main(*argumentos)
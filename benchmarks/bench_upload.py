@@ -0,0 +1,80 @@
+"""
+Leitura do arquivo de upload: pd.read_csv (inferência de tipos, uma
+thread) contra o leitor colunar do upload_reader (pyarrow, várias threads,
+esquema declarado), em CSV, CSV no formato brasileiro e Parquet. Mede
+tempo e pico de memória de leitura e de leitura + validação, cada caso em
+um processo separado.
+
+Uso: python -m benchmarks.bench_upload [linhas]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from benchmarks.dados_sinteticos import gerar_faturamento
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LEITURA = """
+import io, re, sys, time
+sys.path.insert(0, {raiz!r})
+from upload_reader import ler_upload
+from validation import validar_faturamento
+import pandas as pd
+
+class Arquivo(io.BytesIO):
+    name = {caminho!r}
+
+def pico():
+    # VmHWM: pico do processo atual (ru_maxrss herda o pico do processo pai através do exec)
+    return int(re.search(r'VmHWM:\\s+(\\d+)', open('/proc/self/status').read()).group(1))
+
+with open({caminho!r}, 'rb') as origem:
+    dados = origem.read()
+import pyarrow, pyarrow.csv, pyarrow.parquet
+base = pico()
+inicio = time.perf_counter()
+if {leitor!r} == 'pandas':
+    df = pd.read_csv(io.BytesIO(dados))
+else:
+    df = ler_upload(Arquivo(dados))
+leitura = time.perf_counter() - inicio
+pico_leitura = pico()
+validar_faturamento(df)
+total = time.perf_counter() - inicio
+print(leitura, total, pico_leitura - base, pico() - base)
+"""
+
+def medir(caminho, leitor):
+    codigo = _LEITURA.format(raiz=RAIZ, caminho=caminho, leitor=leitor)
+    saida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True)
+    leitura, total, pico_leitura, pico_total = saida.stdout.split()
+    return float(leitura), float(total), int(pico_leitura) / 1024, int(pico_total) / 1024
+
+def main(linhas=1_000_000):
+    df = gerar_faturamento(linhas, seed=5)
+    diretorio = tempfile.mkdtemp()
+    caminho_csv = os.path.join(diretorio, 'faturamento.csv')
+    caminho_parquet = os.path.join(diretorio, 'faturamento.parquet')
+    df.to_csv(caminho_csv, index=False)
+    df.to_parquet(caminho_parquet, index=False)
+    # Exportação brasileira: valores com vírgula decimal e datas dd/mm/aaaa (caminho de conversão por coluna)
+    caminho_br = os.path.join(diretorio, 'faturamento_br.csv')
+    df['Total'] = df['Total'].map(lambda v: f"{v:.2f}".replace('.', ','))
+    for col in ['Data de criação', 'Data do pagamento']:
+        df[col] = df[col].dt.strftime('%d/%m/%Y %H:%M:%S')
+    df.to_csv(caminho_br, index=False)
+    del df
+    print(f"{linhas} linhas: CSV {os.path.getsize(caminho_csv) / 2 ** 20:.0f} MB, "
+          f"Parquet {os.path.getsize(caminho_parquet) / 2 ** 20:.0f} MB")
+    print(f"  {'':<22}{'leitura':>9}{'+ validação':>13}{'pico leitura':>14}{'pico total':>12}")
+    for nome, caminho, leitor in [('CSV, pd.read_csv', caminho_csv, 'pandas'),
+                                  ('CSV, pyarrow', caminho_csv, 'upload'),
+                                  ('Parquet, pyarrow', caminho_parquet, 'upload'),
+                                  ('CSV BR, pd.read_csv', caminho_br, 'pandas'),
+                                  ('CSV BR, pyarrow', caminho_br, 'upload')]:
+        leitura, total, pico_leitura, pico_total = medir(caminho, leitor)
+        print(f"  {nome:<22}{leitura:8.2f}s{total:12.2f}s{pico_leitura:11.0f} MB{pico_total:9.0f} MB")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,118 @@
+"""
+Verifica a análise de concentração: Gini e HHI exatos contra as definições
+diretas (diferença média absoluta, soma dos quadrados das participações),
+participação do maior cliente e dos maiores contra a ordenação completa,
+grupos calculados de uma vez iguais ao cálculo grupo a grupo, o nível de
+risco em bases típicas e o erro da aproximação por histograma. Mede o custo
+exato e aproximado em escala.
+
+Uso: python -m benchmarks.check_concentracao [clientes]
+"""
+import sys
+import time
+import numpy as np
+from concentration import Concentracao
+
+def gini_referencia(valores):
+    """Gini pela diferença média absoluta entre todos os pares (O(n²))."""
+    valores = np.asarray(valores, dtype=float)
+    return np.abs(valores[:, None] - valores[None, :]).sum() / (2 * len(valores) ** 2 * valores.mean())
+
+def hhi_referencia(valores):
+    participacoes = np.asarray(valores, dtype=float) / np.sum(valores)
+    return (participacoes ** 2).sum() * 10000
+
+def _valores(rng, n):
+    """Valores de cauda pesada, com empates, zeros e ausentes (ignorados)."""
+    valores = np.round(rng.pareto(rng.uniform(0.8, 3.0), n) * 100 + 1, 2)
+    valores[rng.random(n) < 0.05] = 0
+    valores[rng.random(n) < 0.05] = np.nan
+    return valores
+
+def participacoes_referencia(valores, n=10):
+    ordenados = np.sort(np.asarray(valores, dtype=float))[::-1]
+    return ordenados[0] / ordenados.sum() * 100, ordenados[:n].sum() / ordenados.sum() * 100
+
+def exatidao(casos=30):
+    exato = Concentracao()
+    for seed in range(casos):
+        rng = np.random.default_rng(seed)
+        valores = _valores(rng, int(rng.integers(1, 1500)))
+        grupos = rng.integers(0, int(rng.integers(1, 12)), len(valores))
+        validos = valores[np.isfinite(valores) & (valores > 0)]
+        if len(validos) == 0:
+            assert exato.indicadores(valores).empty
+            continue
+
+        geral = exato.indicadores(valores).iloc[0]
+        assert np.isclose(geral['Gini'], gini_referencia(validos)), f"semente {seed}: Gini"
+        assert np.isclose(geral['HHI'], hhi_referencia(validos)), f"semente {seed}: HHI"
+        assert geral['Clientes'] == len(validos)
+        assert np.allclose([geral['Pct_Maior_Cliente'], geral['Pct_Top_Clientes']], participacoes_referencia(validos)), \
+            f"semente {seed}: maiores clientes"
+
+        por_grupo = exato.indicadores(valores, grupos)
+        for grupo, linha in por_grupo.iterrows():
+            dados = valores[(grupos == grupo) & np.isfinite(valores) & (valores > 0)]
+            assert linha['Clientes'] == len(dados)
+            assert np.isclose(linha['Gini'], gini_referencia(dados)), f"semente {seed}, grupo {grupo}: Gini"
+            assert np.isclose(linha['HHI'], hhi_referencia(dados)), f"semente {seed}, grupo {grupo}: HHI"
+            assert np.allclose([linha['Pct_Maior_Cliente'], linha['Pct_Top_Clientes']], participacoes_referencia(dados)), \
+                f"semente {seed}, grupo {grupo}: maiores clientes"
+
+        # Curva: começa em (0, 0), termina em (100, 100), crescente e abaixo da diagonal
+        curva = exato.curva_lorenz(valores)
+        assert curva.iloc[0].tolist() == [0.0, 0.0] and np.allclose(curva.iloc[-1], [100, 100])
+        assert (np.diff(curva['Pct_Faturamento']) >= -1e-9).all()
+        assert (curva['Pct_Faturamento'] <= curva['Pct_Clientes'] + 1e-9).all()
+    print(f"exatidão: {casos} amostras contra as definições diretas ok")
+
+def risco():
+    """Bases típicas de clientes: o HHI fica baixo, mas a dependência dos maiores aparece no risco."""
+    casos = [
+        # Um cliente com 35% do faturamento e 999 iguais: HHI ~1229
+        (np.concatenate([[35 / 65 * 999], np.ones(999)]), 'alto'),
+        # Top 10 com 60% de 500 clientes: HHI ~363
+        (np.concatenate([np.full(10, 6.0), np.full(490, 40 / 490)]), 'alto'),
+        # Top 10 com ~35%, maior cliente com 5%
+        (np.concatenate([[5.0], np.full(9, 30 / 9), np.full(990, 65 / 990)]), 'moderado'),
+        (np.ones(1000), 'baixo')
+    ]
+    concentracao = Concentracao()
+    for valores, esperado in casos:
+        geral = concentracao.indicadores(valores).iloc[0]
+        assert geral['Risco'] == esperado, (geral['HHI'], geral['Pct_Maior_Cliente'], geral['Pct_Top_Clientes'], geral['Risco'])
+    print("risco pelos maiores clientes ok")
+
+def aproximacao(clientes):
+    """Histograma contra o cálculo exato em escala, com o tempo de cada um."""
+    rng = np.random.default_rng(7)
+    valores = rng.pareto(1.2, clientes) * 100 + 1
+    grupos = rng.integers(0, 24, clientes)
+    exato = Concentracao(dict(Concentracao().config, limite_exato=float('inf')))
+    aproximado = Concentracao(dict(Concentracao().config, limite_exato=0))
+
+    for nome, args in [('geral', (valores,)), ('24 grupos', (valores, grupos))]:
+        inicio = time.perf_counter()
+        referencia = exato.indicadores(*args)
+        t_exato = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        obtido = aproximado.indicadores(*args)
+        t_aproximado = time.perf_counter() - inicio
+        erro = (obtido['Gini'] - referencia['Gini']).abs().max()
+        assert erro < 1e-3, f"{nome}: erro do Gini aproximado {erro}"
+        assert np.allclose(obtido['HHI'], referencia['HHI'])
+        assert np.allclose(obtido[['Pct_Maior_Cliente', 'Pct_Top_Clientes']], referencia[['Pct_Maior_Cliente', 'Pct_Top_Clientes']])
+        print(f"{clientes:>9} clientes, {nome:<9}: exato {t_exato * 1000:7.1f} ms  "
+              f"histograma {t_aproximado * 1000:7.1f} ms  erro máximo do Gini {erro:.2e}")
+
+    erro_curva = (aproximado.curva_lorenz(valores) - exato.curva_lorenz(valores)).abs().to_numpy().max()
+    assert erro_curva < 0.1, f"curva de Lorenz aproximada: erro {erro_curva}"
+
+def main(clientes=2_000_000):
+    exatidao()
+    risco()
+    aproximacao(clientes)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
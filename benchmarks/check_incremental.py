@@ -0,0 +1,152 @@
+"""
+Verifica as métricas incrementais: para lotes aleatórios, o estado montado
+delta a delta coincide com o cálculo completo do MetricsCalculator; após
+substituição ou remoção o estado é reconstruído. Mede também o custo de um
+delta pequeno sobre um estado grande contra o recálculo completo.
+
+Uso: python -m benchmarks.check_incremental [linhas_estado_grande]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from database import DatabaseManager
+from data_processor import DataProcessor
+from metrics_calculator import MetricsCalculator
+from metrics_state import MetricsState
+from local_backend import LocalSupabaseClient
+from benchmarks.dados_sinteticos import gerar_faturamento
+
+def _gerar(linhas, seed, nomes_por_cliente=False):
+    """Faturamento com clientes repetidos, nomes ausentes e grafias variadas da situação."""
+    rng = np.random.default_rng(seed)
+    inicio = (pd.Timestamp.now() - pd.Timedelta(days=200)).normalize()
+    df = gerar_faturamento(linhas, clientes=int(rng.integers(1, max(2, linhas // 3))), seed=seed,
+                           inicio=str(inicio.date()), dias=200)
+    if nomes_por_cliente:
+        # Nome ausente para o cliente inteiro: 'first' não depende da ordem de leitura
+        # (o Supabase devolve as linhas das mais novas para as mais antigas)
+        df.loc[df['CPF/CNPJ'].str[-1].isin(['0', '5']), 'Nome'] = None
+    else:
+        df.loc[rng.random(linhas) < 0.1, 'Nome'] = None
+        # CSV lido sem dtype: parte dos documentos chega como inteiro
+        df['CPF/CNPJ'] = df['CPF/CNPJ'].astype(object)
+        inteiros = rng.random(linhas) < 0.2
+        df.loc[inteiros, 'CPF/CNPJ'] = df.loc[inteiros, 'CPF/CNPJ'].astype('int64')
+    df['Situação'] = np.where(rng.random(linhas) < 0.2, df['Situação'].str.upper(), df['Situação'])
+    return df
+
+def _lotes(df, rng):
+    cortes = np.sort(rng.choice(np.arange(1, len(df)), size=min(len(df) - 1, int(rng.integers(1, 8))), replace=False))
+    limites = [0, *cortes, len(df)]
+    return [df.iloc[a:b] for a, b in zip(limites, limites[1:])]
+
+def _proximos(obtido, esperado, contexto):
+    for chave, valor in esperado.items():
+        assert np.isclose(float(obtido[chave]), float(valor)), f"{contexto}: {chave} {obtido[chave]} != {valor}"
+
+def _comparar_clientes(obtido, esperado, valor, contexto):
+    obtido = obtido.set_index('CPF/CNPJ')
+    esperado = esperado.set_index('CPF/CNPJ')
+    assert set(obtido.index) == set(esperado.index), f"{contexto}: clientes diferentes"
+    obtido = obtido.reindex(esperado.index)
+    assert np.allclose(obtido[valor], esperado[valor]), f"{contexto}: {valor}"
+    assert (obtido['Num_Transacoes'].to_numpy() == esperado['Num_Transacoes'].to_numpy()).all(), f"{contexto}: transações"
+    assert (obtido['Nome'].fillna('').astype(str) == esperado['Nome'].fillna('').astype(str)).all(), f"{contexto}: nomes"
+    datas_obtidas = obtido['Ultima_Compra'].astype('datetime64[ns]')
+    datas_esperadas = esperado['Ultima_Compra'].astype('datetime64[ns]')
+    assert datas_obtidas.equals(datas_esperadas), f"{contexto}: última compra"
+    faixa = 'Faixa' if 'Faixa' in esperado.columns else 'Faixa_Cliente'
+    assert (obtido[faixa].astype(str) == esperado[faixa].astype(str)).all(), f"{contexto}: faixas"
+
+def comparar(resultados, df, contexto):
+    """Resultados incrementais contra o cálculo completo sobre `df`."""
+    processor = DataProcessor(df.copy())
+    calculator = MetricsCalculator(processor.df)
+    kpis, valores, avancadas = resultados['visao_geral']
+    _proximos(kpis, calculator.calculate_basic_kpis(), contexto)
+    _proximos(valores, calculator.calculate_valores_por_situacao(), contexto)
+    _proximos(avancadas, calculator.calculate_advanced_metrics(), contexto)
+    _comparar_clientes(resultados['ranking'], calculator.calculate_ranking_clientes(), 'Valor_Total', contexto)
+    _comparar_clientes(resultados['ltv'], processor.get_ltv_por_cliente(), 'LTV_Total', contexto)
+    # O LTV segue a ordem do groupby (por CPF/CNPJ), usada no merge das faixas
+    assert list(resultados['ltv']['CPF/CNPJ']) == list(processor.get_ltv_por_cliente()['CPF/CNPJ'])
+
+def propriedades(casos=40):
+    """Estado aplicado em lotes aleatórios == cálculo completo, para várias sementes."""
+    for seed in range(casos):
+        rng = np.random.default_rng(1000 + seed)
+        df = _gerar(int(rng.integers(2, 3000)), seed)
+        estado = MetricsState()
+        estado.rebuild(df.iloc[0:0], 0)
+        acumulado = []
+        for versao, lote in enumerate(_lotes(df, rng), start=1):
+            assert estado.apply(lote, versao - 1, versao)
+            acumulado.append(lote)
+            comparar(estado.resultados(versao), pd.concat(acumulado), f"semente {seed}, lote {versao}")
+        # Versão anterior diferente: o estado é descartado em vez de receber o delta
+        assert not estado.apply(df.iloc[:1], 'outra', 'nova') and estado.resultados('nova') is None
+    print(f"propriedades: {casos} sequências de lotes aleatórios ok")
+
+def integracao():
+    """Inserções aplicam delta; substituição e remoção forçam reconstrução."""
+    for nome, db in [('memória', DatabaseManager(mode="memory")),
+                     ('local', DatabaseManager(client=LocalSupabaseClient()))]:
+        db.insert_faturamento(_gerar(3000, 1, nomes_por_cliente=True))
+        db.precompute.wait()
+        for seed in range(2, 5):
+            db.insert_faturamento(_gerar(500, seed, nomes_por_cliente=True))
+            # Delta aplicado: o estado já está na versão nova, sem esperar o pré-cálculo
+            assert db.metrics.versao == db._current_version(), f"{nome}: delta não aplicado"
+            db.precompute.wait()
+            artefatos = db.get_precomputed()
+            comparar({'visao_geral': artefatos.visao_geral(), 'ranking': artefatos.ranking(),
+                      'ltv': artefatos.ltv_por_cliente()}, db.get_all_faturamento(), f"{nome}, inserção {seed}")
+
+        db.replace_faturamento(_gerar(800, 9, nomes_por_cliente=True))
+        assert db.metrics.versao is None
+        db.precompute.wait()
+        assert db.metrics.versao == db._current_version()
+        comparar(db.metrics.resultados(db.metrics.versao), db.get_all_faturamento(), f"{nome}, substituição")
+
+        db.delete_all_data()
+        assert db.metrics.versao is None
+        db.precompute.wait()
+        assert db.get_precomputed() is None
+        print(f"integração {nome:<8} ok")
+
+def custo(linhas):
+    """Delta de 1000 linhas sobre um estado grande contra o recálculo completo."""
+    df = gerar_faturamento(linhas, seed=3)
+    lote = gerar_faturamento(1000, seed=4)
+    estado = MetricsState()
+    estado.rebuild(df, 0)
+
+    inicio = time.perf_counter()
+    estado.apply(lote, 0, 1)
+    t_delta = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    estado.resultados(1)
+    t_leitura = time.perf_counter() - inicio
+
+    completo = DataProcessor(pd.concat([df, lote], ignore_index=True))
+    inicio = time.perf_counter()
+    calculator = MetricsCalculator(completo.df)
+    calculator.calculate_basic_kpis()
+    calculator.calculate_valores_por_situacao()
+    calculator.calculate_advanced_metrics()
+    calculator.calculate_ranking_clientes()
+    completo.get_ltv_por_cliente()
+    t_completo = time.perf_counter() - inicio
+
+    print(f"{linhas:>9} linhas: delta {t_delta * 1000:7.1f} ms  leitura {t_leitura * 1000:7.1f} ms  "
+          f"recálculo completo {t_completo * 1000:8.1f} ms")
+
+def main(linhas=2_000_000):
+    propriedades()
+    integracao()
+    custo(linhas)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
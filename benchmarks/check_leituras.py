@@ -0,0 +1,120 @@
+"""
+Verifica as leituras com backend lento ou fora do ar, usando o
+LocalSupabaseClient com latência e indisponibilidade injetadas: cada
+execução do script responde em milissegundos com o último snapshot bom e
+o selo de desatualizado; o disjuntor limita as requisições ao backend com
+falha; ao voltar, a recarga em segundo plano publica a versão nova. Na
+partida com o backend fora do ar, a espera é limitada pelo timeout e o
+erro não é confundido com "sem dados".
+
+Uso: python -m benchmarks.check_leituras
+"""
+import time
+from config import LEITURA_CONFIG, METADATA_CONFIG
+from database import DatabaseManager
+from local_backend import LocalSupabaseClient
+from benchmarks.dados_sinteticos import gerar_faturamento
+
+# Tempos curtos para o teste (em produção: config.LEITURA_CONFIG)
+LEITURA_CONFIG.update({
+    'timeout_segundos': 0.3,
+    'timeout_dados_segundos': 1.0,
+    'falhas_para_abrir': 3,
+    'espera_disjuntor_segundos': 1.0,
+    'intervalo_revalidacao_segundos': 0
+})
+METADATA_CONFIG['ttl_segundos'] = 0.2
+
+def execucao(db):
+    """O que uma execução do script lê do banco; retorna (segundos, artefatos, frescor)."""
+    inicio = time.perf_counter()
+    db.test_connection()
+    db.get_stats()
+    db.revalidate()
+    artefatos = db.get_precomputed()
+    frescor = db.get_freshness(artefatos) if artefatos is not None else None
+    return time.perf_counter() - inicio, artefatos, frescor
+
+def executar_por(db, segundos, intervalo=0.02):
+    """Execuções seguidas durante `segundos`; retorna a mais lenta e a última."""
+    pior, fim = 0.0, time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        duracao, artefatos, frescor = execucao(db)
+        pior = max(pior, duracao)
+        time.sleep(intervalo)
+    return pior, artefatos, frescor
+
+def _inserir_externo(client, df):
+    """Escrita de outra instância: só chega a este processo pelos metadados."""
+    registros = DatabaseManager(client=client)._to_records(df)
+    client.table('faturamento').insert(registros).execute()
+
+def lento_e_fora_do_ar():
+    client = LocalSupabaseClient()
+    db = DatabaseManager(client=client)
+    db.insert_faturamento(gerar_faturamento(5000, seed=1))
+    db.precompute.wait()
+    bom = db.get_precomputed()
+    assert bom is not None and bom.linhas == 5000
+    assert not execucao(db)[2]['desatualizado']
+    _inserir_externo(client, gerar_faturamento(1000, seed=2))
+
+    # Lento: toda requisição demora mais que o timeout
+    client.latencia = 2.0
+    pior, artefatos, frescor = executar_por(db, 2.0)
+    assert artefatos is bom and frescor['desatualizado'], frescor
+    # Nenhuma execução espera o backend (nem mesmo um timeout)
+    assert pior < LEITURA_CONFIG['timeout_segundos'], f"execução bloqueada por {pior:.2f}s com backend lento"
+    assert db.disjuntor.estado != 'fechado'
+    print(f"lento     : pior execução {pior * 1000:6.1f} ms, snapshot de {bom.linhas} linhas, "
+          f"selo: {frescor['motivo']}")
+
+    # Fora do ar: falhas imediatas; o disjuntor limita as tentativas
+    client.latencia = 0.0
+    client.fora_do_ar = True
+    time.sleep(LEITURA_CONFIG['espera_disjuntor_segundos'])
+    antes = client.requisicoes
+    duracao = 3.0
+    pior, artefatos, frescor = executar_por(db, duracao)
+    requisicoes = client.requisicoes - antes
+    execucoes = int(duracao / 0.02)
+    # Uma tentativa (meio-aberto) por espera do disjuntor, mais a recarga de metadados que a acompanha
+    limite = 2 * (int(duracao / LEITURA_CONFIG['espera_disjuntor_segundos']) + 1)
+    assert artefatos is bom and frescor['desatualizado']
+    assert requisicoes <= limite, f"{requisicoes} requisições ao backend fora do ar (limite {limite})"
+    assert pior < LEITURA_CONFIG['timeout_segundos'], f"execução bloqueada por {pior:.2f}s com backend fora do ar"
+    print(f"fora do ar: pior execução {pior * 1000:6.1f} ms, {requisicoes} requisições ao backend "
+          f"em ~{execucoes} execuções ({duracao:.0f}s)")
+
+    # Volta: a próxima tentativa fecha o disjuntor e a recarga publica a versão com a escrita externa
+    client.fora_do_ar = False
+    inicio = time.perf_counter()
+    while True:
+        _, artefatos, frescor = execucao(db)
+        if artefatos.linhas == 6000 and not frescor['desatualizado']:
+            break
+        assert time.perf_counter() - inicio < 10, "versão nova não publicada após a volta do backend"
+        time.sleep(0.02)
+    print(f"volta     : versão com {artefatos.linhas} linhas publicada em "
+          f"{time.perf_counter() - inicio:.2f}s, disjuntor {db.disjuntor.estado}")
+
+def partida_fora_do_ar():
+    client = LocalSupabaseClient()
+    client.fora_do_ar = True
+    inicio = time.perf_counter()
+    db = DatabaseManager(client=client)
+    conectado = db.test_connection()
+    db.precompute.wait(5)
+    duracao = time.perf_counter() - inicio
+    assert not conectado and db.get_precomputed() is None
+    # O script exibe o erro do backend, não "Nenhum dado encontrado"
+    assert db.precompute.erro is not None
+    assert duracao < LEITURA_CONFIG['timeout_segundos'] * 3, f"partida levou {duracao:.2f}s"
+    print(f"partida   : backend fora do ar detectado em {duracao:.2f}s ({db.precompute.erro})")
+
+def main():
+    lento_e_fora_do_ar()
+    partida_fora_do_ar()
+
+if __name__ == '__main__':
+    main()
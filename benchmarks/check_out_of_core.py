@@ -0,0 +1,151 @@
+"""
+Verifica o modo fora da memória: os artefatos calculados em lotes sobre o
+dataset em disco coincidem com o cálculo em memória, inserções aplicam o
+delta e substituição/remoção trocam a geração. Mede também o pico de
+memória (RSS) do cálculo em lotes contra o cálculo em memória.
+
+Uso: python -m benchmarks.check_out_of_core [linhas]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+from database import DatabaseManager
+from disk_dataset import DiskDataset
+from precompute import _artefatos_em_memoria
+from streaming_metrics import artefatos_fora_da_memoria
+from time_buckets import GRANULARIDADES
+from benchmarks.check_incremental import _gerar, comparar
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PICO_MEMORIA = """
+import re, sys, tempfile
+sys.path.insert(0, {raiz!r})
+from disk_dataset import DiskDataset
+from precompute import _artefatos_em_memoria
+from streaming_metrics import artefatos_fora_da_memoria
+from benchmarks.dados_sinteticos import gerar_faturamento
+dataset = DiskDataset(tempfile.mkdtemp(), linhas_por_lote=50000)
+for seed in range(0, {linhas}, 250000):
+    dataset.append(gerar_faturamento(min(250000, {linhas} - seed), seed=seed))
+del seed
+import gc; gc.collect()
+
+def pico():
+    # VmHWM: pico do processo atual (ru_maxrss herda o pico do processo pai através do exec)
+    return int(re.search(r'VmHWM:\\s+(\\d+)', open('/proc/self/status').read()).group(1))
+
+base = pico()
+snapshot = dataset.current()
+if {modo!r} == 'lotes':
+    artefatos_fora_da_memoria(snapshot.versao, snapshot)
+else:
+    _artefatos_em_memoria(snapshot.versao, snapshot.to_frame())
+print(base, pico())
+"""
+
+def _ordenado(df):
+    df = df.reset_index(drop=True)
+    return df.sort_values(list(df.columns)[:2]).reset_index(drop=True)
+
+def comparar_artefatos(obtido, esperado, contexto):
+    """Todos os artefatos do modo em lotes contra os do modo em memória."""
+    comparar({'visao_geral': obtido.visao_geral(), 'ranking': obtido.ranking(),
+              'ltv': obtido.ltv_por_cliente()}, esperado.df, contexto)
+    assert obtido.linhas == esperado.linhas, f"{contexto}: linhas"
+    assert set(obtido.colunas) == set(esperado.colunas), f"{contexto}: colunas"
+    faixas_obtidas, faixas_esperadas = obtido.faixa_stats(), esperado.faixa_stats()
+    assert np.allclose(faixas_obtidas.select_dtypes('number'), faixas_esperadas.select_dtypes('number')), f"{contexto}: faixas"
+    for granularidade in GRANULARIDADES:
+        for serie in ['evolucao_status', 'evolucao_faixa']:
+            a = _ordenado(getattr(obtido, serie)(granularidade))
+            b = _ordenado(getattr(esperado, serie)(granularidade))
+            assert list(a.columns) == list(b.columns), f"{contexto}: {serie} {granularidade} colunas"
+            assert (a.iloc[:, :2].astype(str) == b.iloc[:, :2].astype(str)).all().all(), f"{contexto}: {serie} {granularidade}"
+            assert np.allclose(a['Total'], b['Total']), f"{contexto}: {serie} {granularidade} totais"
+    for coluna in ['Situação', 'Paga com']:
+        a, b = obtido.contagens(coluna), esperado.contagens(coluna)
+        assert a.sort_index().to_dict() == b.sort_index().to_dict(), f"{contexto}: contagens {coluna}"
+    a, b = obtido.concentracao(), esperado.concentracao()
+    for chave in ['por_faixa', 'por_mes']:
+        assert list(a[chave].index) == list(b[chave].index), f"{contexto}: concentração {chave}"
+        colunas = ['Clientes', 'Faturamento', 'Gini', 'HHI']
+        assert np.allclose(a[chave][colunas].astype(float), b[chave][colunas].astype(float)), f"{contexto}: concentração {chave}"
+    assert np.isclose(a['geral']['Gini'], b['geral']['Gini']) and np.allclose(a['lorenz'], b['lorenz']), f"{contexto}: Lorenz"
+    a, b = obtido.prazos(), esperado.prazos()
+    for dimensao in [None, 'metodo', 'mes', 'faixa']:
+        assert a.histograma(dimensao).equals(b.histograma(dimensao)), f"{contexto}: histograma de prazos {dimensao}"
+        assert np.allclose(a.resumo(dimensao).to_numpy(float), b.resumo(dimensao).to_numpy(float)), f"{contexto}: prazos {dimensao}"
+    aging_a, aging_b = a.aging(), b.aging()
+    assert aging_a.drop(columns='Valor').equals(aging_b.drop(columns='Valor')), f"{contexto}: aging"
+    assert np.allclose(aging_a['Valor'], aging_b['Valor']), f"{contexto}: aging (valores)"
+    for situacao, metodo in [('Todas', 'Todos'), ('Paga', 'Todos'), ('Todas', 'Pix'), ('Expirado', 'Boleto')]:
+        exibidas, total = obtido.filtrar(situacao, metodo)
+        referencia, total_referencia = esperado.filtrar(situacao, metodo)
+        assert total == total_referencia and len(exibidas) == len(referencia), f"{contexto}: filtro {situacao}/{metodo}"
+
+def equivalencia():
+    """Mesmos dados gravados em disco (lotes pequenos) e carregados em memória."""
+    for seed in range(6):
+        rng = np.random.default_rng(seed)
+        dataset = DiskDataset(tempfile.mkdtemp(), linhas_por_lote=int(rng.integers(50, 2000)))
+        for parte in range(int(rng.integers(1, 5))):
+            dataset.append(_gerar(int(rng.integers(2, 4000)), 100 * seed + parte, nomes_por_cliente=True))
+        snapshot = dataset.current()
+        obtido = artefatos_fora_da_memoria(snapshot.versao, snapshot)
+        esperado = _artefatos_em_memoria(snapshot.versao, snapshot.to_frame())
+        comparar_artefatos(obtido, esperado, f"semente {seed}")
+    print("equivalência lotes x memória ok")
+
+def integracao():
+    """Modo disco no DatabaseManager: delta nas inserções, nova geração na substituição e remoção."""
+    caminho = tempfile.mkdtemp()
+    db = DatabaseManager(mode="disco", dataset_path=caminho)
+    db.insert_faturamento(_gerar(3000, 1, nomes_por_cliente=True))
+    db.precompute.wait()
+    for seed in range(2, 5):
+        db.insert_faturamento(_gerar(500, seed, nomes_por_cliente=True))
+        assert db.metrics.versao == db._current_version(), "delta não aplicado"
+        db.precompute.wait()
+        artefatos = db.get_precomputed()
+        esperado = _artefatos_em_memoria(artefatos.versao, db.get_all_faturamento())
+        comparar_artefatos(artefatos, esperado, f"inserção {seed}")
+
+    anterior = db.dataset.current()
+    linhas_anteriores = len(anterior)
+    db.replace_faturamento(_gerar(800, 9, nomes_por_cliente=True))
+    assert db.metrics.versao is None
+    # O snapshot anterior continua legível até ser descartado
+    assert len(anterior.to_frame()) == linhas_anteriores
+    db.precompute.wait()
+    linhas = db.get_stats()['total_records']
+    assert db.get_precomputed().linhas == linhas == len(db.get_all_faturamento())
+
+    # Reabertura: o dataset persiste entre processos
+    assert len(DiskDataset(caminho).current()) == linhas
+
+    db.delete_all_data()
+    db.precompute.wait()
+    assert db.get_precomputed() is None and db.get_all_faturamento().empty
+    del anterior
+    geracoes = [nome for nome in os.listdir(caminho) if nome.startswith('geracao-')]
+    assert len(geracoes) == 1, f"gerações antigas não removidas: {geracoes}"
+    print("integração disco ok")
+
+def pico_memoria(linhas):
+    """Acréscimo de RSS do cálculo completo, em lotes e em memória, em processos separados."""
+    for modo in ['lotes', 'memória']:
+        codigo = _PICO_MEMORIA.format(raiz=RAIZ, linhas=linhas, modo=modo)
+        saida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True)
+        base, pico = map(int, saida.stdout.split())
+        print(f"{linhas:>9} linhas, {modo:<8}: +{(pico - base) / 1024:7.1f} MB de pico")
+
+def main(linhas=1_000_000):
+    equivalencia()
+    integracao()
+    pico_memoria(linhas)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
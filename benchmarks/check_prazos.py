@@ -0,0 +1,117 @@
+"""
+Verifica os prazos de pagamento: médias e contagens iguais ao cálculo direto
+sobre as transações, percentis do histograma dentro do bin correto,
+histogramas de meses separados somados iguais ao do período inteiro e aging
+igual à idade calculada linha a linha. Mede o custo de montar os
+histogramas e de cada leitura feita na renderização.
+
+Uso: python -m benchmarks.check_prazos [linhas]
+"""
+import sys
+import time
+import numpy as np
+import pandas as pd
+from config import PRAZOS_CONFIG
+from data_processor import DataProcessor
+from payment_timing import PrazosPagamento, rotulos_bins
+from time_buckets import GRANULARIDADES
+from benchmarks.dados_sinteticos import gerar_faturamento
+
+HOJE = pd.Timestamp('2025-06-30')
+
+def _dados(linhas, seed=0):
+    df = DataProcessor(gerar_faturamento(linhas, seed=seed)).df
+    ltv = DataProcessor(df).get_ltv_por_cliente()
+    return df, ltv.set_index('CPF/CNPJ')['Faixa_Cliente']
+
+def _prazos_diretos(df):
+    pagos = df[(df['Situação'].str.lower() == 'paga') & df['Data do pagamento'].notna()]
+    dias = ((pagos['Data do pagamento'] - pagos['Data de criação']).dt.total_seconds() / 86400).clip(lower=0)
+    return pagos, dias
+
+def exatidao(linhas=50000):
+    df, faixas = _dados(linhas)
+    # Parte das pagas sem data do pagamento: ficam fora dos prazos (não contam como prazo zero)
+    pagas = df.index[df['Situação'].str.lower() == 'paga']
+    df.loc[pagas[::10], 'Data do pagamento'] = pd.NaT
+    prazos = PrazosPagamento.de_dataframe(df, faixas)
+    pagos, dias = _prazos_diretos(df)
+    bordas = PRAZOS_CONFIG['bordas_prazo_dias']
+
+    for dimensao, coluna in [('metodo', 'Paga com'), ('mes', GRANULARIDADES['mes']['coluna'])]:
+        resumo = prazos.resumo(dimensao)
+        direto = dias.groupby(pagos[coluna].to_numpy()).agg(['size', 'mean', 'median', lambda d: d.quantile(0.9)])
+        assert resumo['Qtd'].sum() == len(pagos) and sorted(resumo['Qtd']) == sorted(direto['size'])
+        assert np.allclose(sorted(resumo['Media_Dias']), sorted(direto['mean'])), f"{dimensao}: média"
+        # Percentil do histograma cai no mesmo bin do percentil exato
+        for estimado, exato in [('Mediana_Dias', 'median'), ('P90_Dias', '<lambda_0>')]:
+            bins_estimados = np.searchsorted(bordas, sorted(resumo[estimado]), side='right')
+            bins_exatos = np.searchsorted(bordas, sorted(direto[exato]), side='right')
+            assert (np.abs(bins_estimados - bins_exatos) <= 1).all(), f"{dimensao}: {estimado}"
+
+    histograma = prazos.histograma()
+    contagens = np.bincount(np.clip(np.searchsorted(bordas, dias, side='right') - 1, 0, len(bordas) - 1), minlength=len(bordas))
+    assert histograma.columns.tolist() == rotulos_bins(bordas)
+    assert (histograma.iloc[0].to_numpy() == contagens).all(), "histograma geral"
+
+    # Mês a mês, somados: mesmo resultado do período inteiro
+    coluna_mes = GRANULARIDADES['mes']['coluna']
+    combinado = PrazosPagamento()
+    for _, mes in df.groupby(coluna_mes):
+        combinado = combinado.combinar(PrazosPagamento.de_dataframe(mes, faixas))
+    for dimensao in [None, 'metodo', 'mes', 'faixa']:
+        assert combinado.histograma(dimensao).equals(prazos.histograma(dimensao)), f"combinação {dimensao}"
+        assert np.allclose(combinado.resumo(dimensao).to_numpy(float), prazos.resumo(dimensao).to_numpy(float))
+
+    # Aging: idade de cada transação em aberto, em dias inteiros desde o dia de criação
+    abertos = df[df['Situação'].str.lower().isin(PRAZOS_CONFIG['situacoes_aging'])]
+    idade = (HOJE - abertos['Data de criação'].dt.normalize()).dt.days
+    bordas_aging = PRAZOS_CONFIG['bordas_aging_dias']
+    faixa = pd.Categorical.from_codes(
+        np.clip(np.searchsorted(bordas_aging, idade, side='right') - 1, 0, len(bordas_aging) - 1),
+        categories=rotulos_bins(bordas_aging), ordered=True
+    )
+    direto = abertos.groupby([faixa, abertos['Situação'].str.lower().to_numpy()], observed=True)['Total'].agg(['size', 'sum'])
+    aging = prazos.aging(HOJE).set_index(['Faixa_Idade', 'Situação'])
+    assert (aging['Qtd'].to_numpy() == direto['size'].to_numpy()).all(), "aging: quantidades"
+    assert np.allclose(aging['Valor'], direto['sum']), "aging: valores"
+    print("prazos: médias, percentis, combinação entre meses e aging ok")
+
+def sem_data_pagamento():
+    """Pagas sem data do pagamento não entram no histograma nem no resumo."""
+    df = DataProcessor(pd.DataFrame({
+        'CPF/CNPJ': ['1', '2', '3'],
+        'Total': [100.0, 50.0, 70.0],
+        'Situação': ['Paga', 'Paga', 'Paga'],
+        'Paga com': ['Pix', 'Pix', 'Boleto'],
+        'Data de criação': pd.to_datetime(['2025-01-01', '2025-01-02', '2025-01-03']),
+        'Data do pagamento': pd.to_datetime(['2025-01-11', None, None])
+    })).df
+    prazos = PrazosPagamento.de_dataframe(df)
+    histograma = prazos.histograma().iloc[0]
+    assert histograma.sum() == 1 and histograma['10-15d'] == 1, histograma[histograma > 0].to_dict()
+    resumo = prazos.resumo().iloc[0]
+    assert resumo['Qtd'] == 1 and np.isclose(resumo['Media_Dias'], 10.0), resumo.to_dict()
+    print("prazos: pagas sem data do pagamento ficam fora ok")
+
+def custo(linhas):
+    df, faixas = _dados(linhas, seed=1)
+    inicio = time.perf_counter()
+    prazos = PrazosPagamento.de_dataframe(df, faixas)
+    t_montagem = time.perf_counter() - inicio
+    print(f"{linhas:>9} linhas: histogramas montados em {t_montagem * 1000:7.1f} ms "
+          f"({len(prazos.cubo)} células, {len(prazos.aging_base)} dias em aberto)")
+    for dimensao in [None, 'metodo', 'mes', 'faixa']:
+        inicio = time.perf_counter()
+        prazos.histograma(dimensao)
+        prazos.resumo(dimensao)
+        prazos.aging()
+        print(f"    leitura {str(dimensao):<7} {(time.perf_counter() - inicio) * 1000:6.1f} ms")
+
+def main(linhas=1_000_000):
+    exatidao()
+    sem_data_pagamento()
+    custo(linhas)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,56 @@
+"""
+Verifica o pré-cálculo em segundo plano: a versão anterior continua
+publicada enquanto a nova é calculada, a troca acontece de uma vez e os
+artefatos coincidem com o cálculo direto.
+
+Uso: python -m benchmarks.check_precompute
+"""
+import time
+import numpy as np
+import pandas as pd
+from database import DatabaseManager
+from data_processor import DataProcessor
+from metrics_calculator import MetricsCalculator
+from local_backend import LocalSupabaseClient
+from benchmarks.dados_sinteticos import gerar_faturamento
+
+def _verificar(db, artefatos):
+    esperado = MetricsCalculator(DataProcessor(db.get_all_faturamento()).df)
+    # Somas incrementais podem diferir do cálculo direto apenas no arredondamento
+    kpis, referencia = artefatos.visao_geral()[0], esperado.calculate_basic_kpis()
+    assert kpis.keys() == referencia.keys()
+    assert all(np.isclose(kpis[chave], referencia[chave]) for chave in referencia)
+    ranking = artefatos.ranking().set_index('CPF/CNPJ')['Valor_Total'].sort_index()
+    referencia = esperado.calculate_ranking_clientes().set_index('CPF/CNPJ')['Valor_Total'].sort_index()
+    pd.testing.assert_series_equal(ranking, referencia)
+
+def main():
+    for nome, db in [('memória', DatabaseManager(mode="memory")),
+                     ('local', DatabaseManager(client=LocalSupabaseClient()))]:
+        db.insert_faturamento(gerar_faturamento(5000, seed=1))
+        db.precompute.wait()
+        anterior = db.get_precomputed()
+        assert anterior is not None and anterior.linhas == 5000
+
+        inicio = time.perf_counter()
+        db.insert_faturamento(gerar_faturamento(200000, seed=2))
+        t_insert = time.perf_counter() - inicio
+
+        # Enquanto calcula, leitores continuam vendo a versão anterior completa
+        vistos = set()
+        while db.precompute.pending():
+            vistos.add(db.get_precomputed().linhas)
+        t_total = time.perf_counter() - inicio
+        assert vistos <= {5000, 205000}, f"Versão parcial publicada: {sorted(vistos)}"
+
+        atual = db.get_precomputed()
+        assert atual is not anterior and atual.linhas == 205000
+        _verificar(db, atual)
+
+        db.delete_all_data()
+        db.precompute.wait()
+        assert db.get_precomputed() is None
+        print(f"{nome:<8} insert {t_insert:6.2f}s  nova versão publicada em {t_total:6.2f}s  ok")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Verifica o fluxo "Substituir Dados" contra o banco local: leitores veem
+apenas a versão antiga ou a nova, e uma falha no meio da carga preserva
+os dados atuais. A restauração de backup passa pelo mesmo caminho (nos
+modos supabase, memória e disco): substitui os dados em vez de duplicá-los.
+
+Uso: python -m benchmarks.check_replace
+"""
+import os
+import tempfile
+import threading
+from database import DatabaseManager
+from local_backend import LocalSupabaseClient
+from benchmarks.dados_sinteticos import gerar_faturamento
+
+def _contar(client):
+    return client.table('faturamento').select("count").execute().data[0]['count']
+
+def main():
+    client = LocalSupabaseClient(latencia=0.005)
+    db = DatabaseManager(client=client)
+
+    antigos = gerar_faturamento(3000, seed=1)
+    novos = gerar_faturamento(7000, seed=2)
+    assert db.insert_faturamento(antigos) == 3000
+
+    # Leitor concorrente durante a substituição
+    observados = set()
+    parar = threading.Event()
+
+    def leitor():
+        while not parar.is_set():
+            observados.add(_contar(client))
+
+    thread = threading.Thread(target=leitor)
+    thread.start()
+    assert db.replace_faturamento(novos) == 7000
+    parar.set()
+    thread.join()
+
+    assert observados <= {3000, 7000}, f"Leitor viu estado parcial: {sorted(observados)}"
+    assert _contar(client) == 7000
+    assert db.get_stats()['total_records'] == 7000
+    print(f"substituição atômica ok (contagens observadas: {sorted(observados)})")
+
+    # Falha no terceiro lote da staging: nada muda
+    client.falhar('insert', 'faturamento_staging', apos=2)
+    assert db.replace_faturamento(antigos) is False
+    assert _contar(client) == 7000
+    print("falha na carga preserva os dados atuais ok")
+
+    # Restauração sobre dados existentes: substitui, sem duplicar; falha no meio não muda nada
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho, manifesto = db.backup_data('parquet', diretorio)
+        assert db.insert_faturamento(antigos) == 3000
+        assert db.restore_data(caminho, manifesto) == manifesto['linhas'] == 7000
+        assert _contar(client) == 7000
+        client.falhar('insert', 'faturamento_staging', apos=2)
+        assert db.restore_data(caminho, manifesto) is False
+        assert _contar(client) == 7000
+    print("restauração substitui os dados e falha no meio os preserva ok")
+
+    for modo in ['memory', 'disco']:
+        with tempfile.TemporaryDirectory() as diretorio:
+            outro = DatabaseManager(mode=modo, dataset_path=os.path.join(diretorio, 'dataset'))
+            assert outro.insert_faturamento(antigos) == 3000
+            caminho, manifesto = outro.backup_data('parquet', diretorio)
+            assert outro.restore_data(caminho, manifesto) == 3000
+            assert outro.get_stats()['total_records'] == len(outro.get_all_faturamento()) == 3000
+
+            def blocos_com_falha():
+                yield novos.iloc[:1000]
+                raise OSError("disco cheio")
+            geracoes = set(os.listdir(outro.dataset.caminho)) if modo == 'disco' else None
+            assert outro.replace_faturamento_blocos(blocos_com_falha()) is False
+            assert len(outro.get_all_faturamento()) == 3000
+            if modo == 'disco':
+                # A geração incompleta não fica no diretório
+                assert set(os.listdir(outro.dataset.caminho)) <= geracoes
+        print(f"restauração e falha no meio ({modo}) ok")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Verifica o orçamento de inicialização a frio: tempo de importação de cada
+módulo do dashboard (com o Streamlit já importado), módulos pesados que não
+podem ser carregados na importação e tempo da primeira execução da página
+vazia. Sai com status 1 quando algum limite é ultrapassado.
+
+Uso: python -m benchmarks.check_startup [fator_tolerancia]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tempo máximo de importação (ms) de cada módulo, sem contar o próprio Streamlit
+ORCAMENTO_IMPORTACAO_MS = {
+    'config': 10,
+    'lazy_imports': 10,
+    'projection': 10,
+    'metadata_service': 10,
+    'circuit_breaker': 10,
+    'partitioned_fetch': 10,
+    'single_flight': 10,
+    'local_backend': 20,
+    'chunked_table': 10,
+    'dataset_store': 15,
+    'time_buckets': 10,
+    'segmentation': 10,
+    'utils': 15,
+    'data_processor': 20,
+    'metrics_calculator': 20,
+    'metrics_state': 20,
+    'concentration': 10,
+    'payment_timing': 10,
+    'precompute': 30,
+    'disk_dataset': 15,
+    'streaming_metrics': 30,
+    'backup': 20,
+    'upload_reader': 10,
+    'visualizations': 20,
+    'ui_components': 20,
+    'database': 40
+}
+
+# Tempo máximo (ms) da primeira execução da página sem dados
+ORCAMENTO_PAGINA_VAZIA_MS = 800
+
+# Carregados apenas no primeiro uso
+MODULOS_PESADOS = ['pandas', 'numpy', 'plotly.express', 'pyarrow', 'supabase']
+
+_PAGINA_VAZIA = """
+import sys, time
+sys.path.insert(0, {raiz!r})
+from streamlit.testing.v1 import AppTest
+inicio = time.perf_counter()
+at = AppTest.from_file({main!r}, default_timeout=60)
+at.run()
+decorrido = (time.perf_counter() - inicio) * 1000
+assert not at.exception, [e.value for e in at.exception]
+carregados = [m for m in {pesados!r} if m in sys.modules]
+print(f"{{decorrido:.1f}}|{{','.join(carregados)}}")
+"""
+
+def tempo_importacao(modulo):
+    """Tempo cumulativo (ms) de `import modulo` em um processo novo, medido por -X importtime."""
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import streamlit; import {modulo}"],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    for linha in resultado.stderr.splitlines():
+        partes = [p.strip() for p in linha.split('|')]
+        if len(partes) == 3 and partes[2] == modulo:
+            return int(partes[1]) / 1000
+    raise RuntimeError(f"Módulo não encontrado na saída de importtime: {modulo}")
+
+def modulos_pesados_na_importacao():
+    """Módulos pesados carregados ao importar todos os módulos do dashboard."""
+    codigo = (
+        "import sys; "
+        + "; ".join(f"import {m}" for m in ORCAMENTO_IMPORTACAO_MS)
+        + f"; print(','.join(m for m in {MODULOS_PESADOS!r} if m in sys.modules))"
+    )
+    resultado = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    return [m for m in resultado.stdout.strip().split(',') if m]
+
+def pagina_vazia():
+    """(ms, módulos pesados carregados) da primeira execução da página sem dados."""
+    codigo = _PAGINA_VAZIA.format(raiz=RAIZ, main=os.path.join(RAIZ, 'main.py'), pesados=MODULOS_PESADOS)
+    # Diretório sem .streamlit/secrets.toml: modo memória, banco vazio
+    with tempfile.TemporaryDirectory() as diretorio:
+        resultado = subprocess.run([sys.executable, '-c', codigo], cwd=diretorio, capture_output=True, text=True, check=True)
+    tempo, carregados = resultado.stdout.strip().splitlines()[-1].split('|')
+    return float(tempo), [m for m in carregados.split(',') if m]
+
+def main(tolerancia=1.0):
+    falhas = []
+
+    for modulo, orcamento in ORCAMENTO_IMPORTACAO_MS.items():
+        tempo = tempo_importacao(modulo)
+        limite = orcamento * tolerancia
+        status = 'ok' if tempo <= limite else 'ESTOURO'
+        print(f"import {modulo:<20} {tempo:7.1f} ms  (limite {limite:6.1f})  {status}")
+        if tempo > limite:
+            falhas.append(f"import {modulo}: {tempo:.1f} ms > {limite:.1f} ms")
+
+    carregados = modulos_pesados_na_importacao()
+    print(f"módulos pesados na importação: {carregados or 'nenhum'}")
+    if carregados:
+        falhas.append(f"módulos pesados carregados na importação: {carregados}")
+
+    tempo, carregados = pagina_vazia()
+    limite = ORCAMENTO_PAGINA_VAZIA_MS * tolerancia
+    print(f"página vazia {tempo:7.1f} ms  (limite {limite:6.1f})  pesados: {carregados or 'nenhum'}")
+    if tempo > limite:
+        falhas.append(f"página vazia: {tempo:.1f} ms > {limite:.1f} ms")
+    if carregados:
+        falhas.append(f"módulos pesados carregados na página vazia: {carregados}")
+
+    if falhas:
+        print("\nRegressões na inicialização:")
+        for falha in falhas:
+            print(f"  - {falha}")
+        sys.exit(1)
+    print("\norçamento de inicialização ok")
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
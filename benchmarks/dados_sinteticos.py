@@ -0,0 +1,38 @@
+"""
+Gerador de faturamento sintético para os benchmarks.
+"""
+import numpy as np
+import pandas as pd
+
+SITUACOES = ['Paga', 'Pendente', 'Expirado']
+METODOS = ['Pix', 'Cartão de Crédito', 'Boleto', None]
+
+def gerar_cpfs(ids):
+    """CPFs válidos (com dígitos verificadores) a partir de inteiros de até 9 dígitos."""
+    base = (np.asarray(ids)[:, None] // 10 ** np.arange(8, -1, -1)) % 10
+    for pesos in [np.arange(10, 1, -1), np.arange(11, 1, -1)]:
+        resto = (base @ pesos) % 11
+        base = np.column_stack([base, np.where(resto < 2, 0, 11 - resto)])
+    return [''.join(map(str, digitos)) for digitos in base]
+
+def gerar_faturamento(linhas, clientes=None, seed=0, inicio='2023-01-01', dias=730):
+    """Gera um DataFrame no formato do CSV de upload."""
+    rng = np.random.default_rng(seed)
+    clientes = clientes or max(1, linhas // 8)
+    ids = rng.integers(0, clientes, linhas)
+    # Deslocamento evita sequências repetidas (000.000.000-00), que não são CPFs válidos
+    cpfs = np.array(gerar_cpfs(np.arange(clientes) + 1000), dtype=object)
+    criacao = pd.Timestamp(inicio) + pd.to_timedelta(rng.integers(0, dias * 24 * 3600, linhas), unit='s')
+    situacao = rng.choice(SITUACOES, linhas, p=[0.7, 0.2, 0.1])
+    pagamento = criacao + pd.to_timedelta(rng.integers(0, 15 * 24 * 3600, linhas), unit='s')
+
+    return pd.DataFrame({
+        'Nome': [f"Cliente {i}" for i in ids],
+        'CPF/CNPJ': cpfs[ids],
+        'Total': rng.gamma(2.0, 250.0, linhas).round(2),
+        'Taxa': rng.gamma(1.5, 3.0, linhas).round(2),
+        'Situação': situacao,
+        'Paga com': rng.choice(np.array(METODOS, dtype=object), linhas),
+        'Data de criação': criacao,
+        'Data do pagamento': pd.Series(pagamento).where(situacao == 'Paga')
+    })
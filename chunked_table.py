@@ -0,0 +1,108 @@
+"""
+Tabela lógica formada por chunks imutáveis de colunas: inserções criam um
+novo chunk (custo proporcional ao lote) e a compactação junta chunks pequenos.
+"""
+from lazy_imports import lazy_import
+pd = lazy_import('pandas')
+
+class ChunkedTable:
+    def __init__(self, chunks=(), chunk_nbytes=None):
+        self.chunks = tuple(chunk for chunk in chunks if not chunk.empty)
+        # Tamanho de cada chunk, calculado uma única vez
+        if chunk_nbytes is None:
+            chunk_nbytes = [int(chunk.memory_usage(deep=True).sum()) for chunk in self.chunks]
+        self.chunk_nbytes = tuple(chunk_nbytes)
+        self._num_linhas = sum(len(chunk) for chunk in self.chunks)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Cria uma tabela com um único chunk."""
+        return cls().append(df)
+
+    def __len__(self):
+        return self._num_linhas
+
+    @property
+    def empty(self):
+        return self._num_linhas == 0
+
+    @property
+    def columns(self):
+        """União das colunas dos chunks, na ordem em que aparecem."""
+        colunas = []
+        for chunk in self.chunks:
+            colunas.extend(col for col in chunk.columns if col not in colunas)
+        return colunas
+
+    def append(self, df):
+        """Retorna uma nova tabela com o lote adicionado, sem copiar os chunks existentes."""
+        if df.empty:
+            return self
+        chunk = df.copy(deep=False)
+        # Índice global estável: chave da linha usada nas projeções
+        chunk.index = pd.RangeIndex(self._num_linhas, self._num_linhas + len(chunk))
+        nbytes = int(chunk.memory_usage(deep=True).sum())
+        return ChunkedTable(self.chunks + (chunk,), self.chunk_nbytes + (nbytes,))
+
+    def iter_chunks(self, columns=None):
+        """Percorre os chunks (opcionalmente projetados) sem concatenar."""
+        for chunk in self.chunks:
+            if columns is None:
+                yield chunk
+            elif all(col in chunk.columns for col in columns):
+                yield chunk[list(columns)]
+            else:
+                yield chunk.reindex(columns=list(columns))
+
+    def select(self, columns):
+        """Materializa apenas as colunas pedidas."""
+        columns = [col for col in columns if col in self.columns]
+        partes = list(self.iter_chunks(columns))
+        if not partes:
+            return pd.DataFrame(columns=columns)
+        if len(partes) == 1:
+            return partes[0]
+        return pd.concat(partes)
+
+    def to_frame(self):
+        """Materializa a tabela completa; a cópia não fica guardada junto dos chunks."""
+        return self.select(self.columns)
+
+    def memory_usage(self):
+        return sum(self.chunk_nbytes)
+
+    def starts_with(self, other):
+        """Indica se os chunks de `other` são um prefixo (mesmos objetos) desta tabela."""
+        if len(other.chunks) > len(self.chunks):
+            return False
+        return all(a is b for a, b in zip(self.chunks, other.chunks))
+
+    def small_chunks(self, linhas_min):
+        return sum(1 for chunk in self.chunks if len(chunk) < linhas_min)
+
+    def compacted(self, linhas_min):
+        """Retorna uma tabela equivalente com chunks pequenos consecutivos combinados."""
+        if self.small_chunks(linhas_min) <= 1:
+            return self
+        novos = []
+        pendentes = []
+        linhas_pendentes = 0
+        for chunk in self.chunks:
+            if len(chunk) >= linhas_min:
+                # Chunks grandes não são recopiados
+                if pendentes:
+                    novos.append(_merge(pendentes))
+                    pendentes, linhas_pendentes = [], 0
+                novos.append(chunk)
+                continue
+            pendentes.append(chunk)
+            linhas_pendentes += len(chunk)
+            if linhas_pendentes >= linhas_min:
+                novos.append(_merge(pendentes))
+                pendentes, linhas_pendentes = [], 0
+        if pendentes:
+            novos.append(_merge(pendentes))
+        return ChunkedTable(novos)
+
+def _merge(chunks):
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks)
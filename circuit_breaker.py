@@ -0,0 +1,91 @@
+"""
+Chamadas ao backend com timeout e disjuntor (circuit breaker): após falhas
+seguidas o disjuntor abre e as chamadas são recusadas na hora, sem ir ao
+backend, até o fim da espera; então uma única tentativa decide se ele fecha.
+"""
+import threading
+import time
+from config import LEITURA_CONFIG
+
+class BackendIndisponivel(RuntimeError):
+    """Chamada recusada pelo disjuntor aberto ou sem resposta dentro do timeout."""
+
+class Disjuntor:
+    """Fechado: chamadas passam. Aberto: recusadas até o fim da espera. Meio-aberto: uma tentativa em curso."""
+
+    def __init__(self, falhas_para_abrir=None, espera=None, relogio=time.monotonic):
+        self.falhas_para_abrir = falhas_para_abrir or LEITURA_CONFIG['falhas_para_abrir']
+        self.espera = LEITURA_CONFIG['espera_disjuntor_segundos'] if espera is None else espera
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self.estado = 'fechado'
+        self.falhas = 0
+        self.ultimo_erro = None
+        self._aberto_em = 0.0
+
+    def nova_tentativa_em(self):
+        """Segundos até o disjuntor aberto deixar passar uma tentativa (0 se já deixa)."""
+        if self.estado != 'aberto':
+            return 0.0
+        return max(0.0, self.espera - (self._relogio() - self._aberto_em))
+
+    def disponivel(self):
+        """Se uma chamada agora seria tentada (sem consumir a tentativa do meio-aberto)."""
+        return self.estado == 'fechado' or (self.estado == 'aberto' and self.nova_tentativa_em() == 0)
+
+    def permitir(self):
+        """Reserva a chamada: fechado sempre; aberto só após a espera, passando a meio-aberto."""
+        with self._lock:
+            if self.estado == 'fechado':
+                return True
+            if self.estado == 'aberto' and self.nova_tentativa_em() == 0:
+                self.estado = 'meio_aberto'
+                return True
+            return False
+
+    def sucesso(self):
+        with self._lock:
+            self.estado = 'fechado'
+            self.falhas = 0
+            self.ultimo_erro = None
+
+    def falha(self, erro):
+        with self._lock:
+            self.falhas += 1
+            self.ultimo_erro = erro
+            if self.estado == 'meio_aberto' or self.falhas >= self.falhas_para_abrir:
+                self.estado = 'aberto'
+                self._aberto_em = self._relogio()
+
+def chamar(funcao, timeout=None, disjuntor=None):
+    """Executa funcao() esperando no máximo `timeout` segundos; falhas e timeouts contam no disjuntor."""
+    if disjuntor is not None and not disjuntor.permitir():
+        raise BackendIndisponivel(
+            f"backend indisponível ({disjuntor.ultimo_erro}); "
+            f"nova tentativa em {disjuntor.nova_tentativa_em():.0f}s"
+        )
+    resultado = {}
+
+    def executar():
+        try:
+            resultado['valor'] = funcao()
+        except Exception as e:
+            resultado['erro'] = e
+
+    if timeout is None:
+        executar()
+    else:
+        # A chamada sem resposta continua na thread (daemon), mas quem chamou não espera por ela
+        thread = threading.Thread(target=executar, name='chamada-backend', daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            resultado['erro'] = BackendIndisponivel(f"sem resposta em {timeout:g}s")
+
+    if 'erro' in resultado:
+        if disjuntor is not None:
+            disjuntor.falha(resultado['erro'])
+        raise resultado['erro']
+    if disjuntor is not None:
+        disjuntor.sucesso()
+    return resultado['valor']
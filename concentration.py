@@ -0,0 +1,141 @@
+"""
+Concentração do faturamento entre clientes: curva de Lorenz, índice de Gini
+e HHI sobre todos os clientes, no total e por grupo (mês, faixa). Somas
+acumuladas vetorizadas; acima de um limite de clientes a curva é aproximada
+por um histograma em escala logarítmica, com custo linear. O risco vem da
+participação do maior cliente e dos maiores clientes; o HHI é informativo.
+"""
+from lazy_imports import lazy_import
+from config import CONCENTRACAO_CONFIG
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+class Concentracao:
+    def __init__(self, config=None):
+        self.config = config or CONCENTRACAO_CONFIG
+
+    def aproximado(self, clientes):
+        """Se a curva é aproximada por histograma para essa quantidade de clientes."""
+        return clientes > self.config['limite_exato']
+
+    @staticmethod
+    def _preparar(valores, grupos):
+        """Valores positivos e códigos de grupo (0..G-1), com os rótulos dos grupos."""
+        valores = pd.Series(valores, dtype=float).to_numpy()
+        if grupos is None:
+            codigos, rotulos = np.zeros(len(valores), dtype='int64'), pd.Index(['Total'])
+        else:
+            codigos, rotulos = pd.factorize(pd.Series(grupos).reset_index(drop=True), sort=True)
+        validos = np.isfinite(valores) & (valores > 0) & (codigos >= 0)
+        return valores[validos], codigos[validos].astype('int64'), pd.Index(rotulos)
+
+    def _bins(self, valores):
+        """Índice do bin logarítmico de cada valor (custo linear, sem ordenação)."""
+        quantidade = self.config['bins_histograma']
+        logs = np.log(valores)
+        minimo, maximo = logs.min(), logs.max()
+        if maximo <= minimo:
+            return np.zeros(len(valores), dtype='int64'), quantidade
+        indices = ((logs - minimo) / (maximo - minimo) * quantidade).astype('int64')
+        return np.minimum(indices, quantidade - 1), quantidade
+
+    def _soma_acumulada_exata(self, valores, codigos, grupos, total):
+        """Soma, por grupo, do valor acumulado de cada cliente em ordem crescente."""
+        ordem = np.lexsort((valores, codigos))
+        valores, codigos = valores[ordem], codigos[ordem]
+        # Soma acumulada global menos o total dos grupos anteriores = acumulado dentro do grupo
+        anteriores = np.concatenate([[0.0], np.cumsum(total)[:-1]])
+        acumulado = np.cumsum(valores) - anteriores[codigos]
+        return np.bincount(codigos, weights=acumulado, minlength=grupos)
+
+    def _soma_acumulada_histograma(self, valores, codigos, grupos):
+        """Mesma soma com os clientes de cada bin tratados como de valor igual."""
+        bins, quantidade = self._bins(valores)
+        indice = codigos * quantidade + bins
+        contagens = np.bincount(indice, minlength=grupos * quantidade).reshape(grupos, quantidade)
+        somas = np.bincount(indice, weights=valores, minlength=grupos * quantidade).reshape(grupos, quantidade)
+        antes = np.cumsum(somas, axis=1) - somas
+        # Cliente i (1..m) de um bin com m clientes e soma s: acumulado = antes + i * s / m
+        return (contagens * antes + somas * (contagens + 1) / 2).sum(axis=1)
+
+    def _maiores(self, valores, codigos, grupos):
+        """Maior valor e soma dos N maiores de cada grupo, ordenando só os candidatos."""
+        n = self.config['top_clientes']
+        bins, quantidade = self._bins(valores)
+        contagens = np.bincount(codigos * quantidade + bins, minlength=grupos * quantidade).reshape(grupos, quantidade)
+        # Bins crescentes com o valor: os N maiores estão no bin mais alto que, somado aos de cima, já reúne N
+        desde_o_topo = np.cumsum(contagens[:, ::-1], axis=1)[:, ::-1]
+        corte = np.where(desde_o_topo >= n, np.arange(quantidade), 0).max(axis=1)
+        candidatos = bins >= corte[codigos]
+        valores, codigos = valores[candidatos], codigos[candidatos]
+        ordem = np.lexsort((-valores, codigos))
+        valores, codigos = valores[ordem], codigos[ordem]
+        posicao = np.arange(len(codigos)) - np.searchsorted(codigos, np.arange(grupos))[codigos]
+        maior = np.bincount(codigos[posicao == 0], weights=valores[posicao == 0], minlength=grupos)
+        topo = np.bincount(codigos[posicao < n], weights=valores[posicao < n], minlength=grupos)
+        return maior, topo
+
+    def indicadores(self, valores, grupos=None):
+        """Clientes, faturamento, Gini, HHI (0-10.000), participação dos maiores clientes e risco, por grupo (ou 'Total')."""
+        valores, codigos, rotulos = self._preparar(valores, grupos)
+        colunas = ['Clientes', 'Faturamento', 'Gini', 'HHI', 'Clientes_Equivalentes',
+                   'Pct_Maior_Cliente', 'Pct_Top_Clientes', 'Risco']
+        if len(valores) == 0:
+            return pd.DataFrame(columns=colunas)
+        quantidade = len(rotulos)
+        clientes = np.bincount(codigos, minlength=quantidade)
+        total = np.bincount(codigos, weights=valores, minlength=quantidade)
+        if self.aproximado(len(valores)):
+            soma_acumulada = self._soma_acumulada_histograma(valores, codigos, quantidade)
+        else:
+            soma_acumulada = self._soma_acumulada_exata(valores, codigos, quantidade, total)
+        maior, topo = self._maiores(valores, codigos, quantidade)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Gini pela área sob a curva de Lorenz (regra do trapézio sobre os clientes)
+            gini = 1 + 1 / clientes - 2 * soma_acumulada / (clientes * total)
+            hhi = np.bincount(codigos, weights=valores ** 2, minlength=quantidade) / total ** 2
+            resultado = pd.DataFrame({
+                'Clientes': clientes,
+                'Faturamento': total,
+                'Gini': np.clip(gini, 0, 1),
+                'HHI': hhi * 10000,
+                'Clientes_Equivalentes': 1 / hhi,
+                'Pct_Maior_Cliente': maior / total * 100,
+                'Pct_Top_Clientes': topo / total * 100
+            }, index=rotulos)
+        resultado = resultado[resultado['Clientes'] > 0]
+        resultado['Risco'] = [self.risco(m, t) for m, t in zip(resultado['Pct_Maior_Cliente'], resultado['Pct_Top_Clientes'])]
+        return resultado
+
+    def risco(self, pct_maior, pct_top):
+        """Nível de risco pela participação (%) do maior cliente e dos N maiores: 'alto', 'moderado' ou 'baixo'."""
+        limites = self.config['risco']
+        if pct_maior >= limites['maior_alto'] or pct_top >= limites['top_alto']:
+            return 'alto'
+        if pct_maior >= limites['maior_moderado'] or pct_top >= limites['top_moderado']:
+            return 'moderado'
+        return 'baixo'
+
+    def curva_lorenz(self, valores):
+        """Pontos da curva de Lorenz (% acumulado de clientes x % do faturamento), reduzidos para o gráfico."""
+        valores, _, _ = self._preparar(valores, None)
+        if len(valores) == 0:
+            return pd.DataFrame(columns=['Pct_Clientes', 'Pct_Faturamento'])
+        if self.aproximado(len(valores)):
+            # Vértices nas bordas dos bins; entre eles a curva é linear (valores iguais no bin)
+            bins, quantidade = self._bins(valores)
+            clientes = np.cumsum(np.bincount(bins, minlength=quantidade))
+            acumulado = np.cumsum(np.bincount(bins, weights=valores, minlength=quantidade))
+        else:
+            clientes = np.arange(1, len(valores) + 1)
+            acumulado = np.cumsum(np.sort(valores))
+        x = np.concatenate([[0.0], clientes / clientes[-1]])
+        y = np.concatenate([[0.0], acumulado / acumulado[-1]])
+        # Grade uniforme mais pontos perto de 100%, onde fica a concentração
+        pontos = self.config['pontos_curva']
+        grade = np.unique(np.concatenate([np.linspace(0, 1, pontos), 1 - np.geomspace(1e-4, 0.05, pontos // 4)]))
+        return pd.DataFrame({
+            'Pct_Clientes': grade * 100,
+            'Pct_Faturamento': np.interp(grade, x, y) * 100
+        })
@@ -4,11 +4,6 @@ Arquivo de configurações centralizadas do projeto
 
 # Configurações de cores
 COLORS = {
-    'faixas': {
-        'Grupo A (R$ 1.500+)': '#FFD700',  # Ouro
-        'Grupo B (R$ 500-1.499)': '#C0C0C0',  # Prata
-        'Grupo C (R$ 0-499)': '#CD7F32'  # Bronze
-    },
     'situacoes': {
         'paga': '#2E8B57',
         'pendente': '#FF8C00',
@@ -16,19 +11,115 @@ COLORS = {
     }
 }
 
-# Configurações de valores
-VALORES_FAIXA = {
-    'grupo_c_max': 500,
-    'grupo_b_max': 1500
+# Segmentação de clientes: rótulos, ordem e cores derivam das faixas abaixo
+SEGMENTACAO_CONFIG = {
+    'modo': 'faixas',  # faixas (valor fixo), quantis ou rfm
+    'faixas': [  # da mais valiosa para a menos valiosa
+        {'nome': 'Grupo A', 'descricao': 'Premium', 'icone': '🥇', 'cor': '#FFD700',  # Ouro
+         'minimo': 1500, 'quantil_minimo': 0.8, 'rfm_minimo': 12},
+        {'nome': 'Grupo B', 'descricao': 'Médio', 'icone': '🥈', 'cor': '#C0C0C0',  # Prata
+         'minimo': 500, 'quantil_minimo': 0.5, 'rfm_minimo': 8},
+        {'nome': 'Grupo C', 'descricao': 'Básico', 'icone': '🥉', 'cor': '#CD7F32',  # Bronze
+         'minimo': 0, 'quantil_minimo': 0.0, 'rfm_minimo': 0}
+    ],
+    'rfm': {
+        'quantis': 5  # pontuação de 1 a 5 em recência, frequência e valor
+    }
 }
 
 # Configurações de análise
 ANALISE_CONFIG = {
     'dias_churn': 60,
     'top_clientes_display': 20,
-    'top_clientes_pareto': 30,
-    'percentual_concentracao_alto': 50,
-    'percentual_concentracao_moderado': 30
+    'top_clientes_pareto': 30
+}
+
+# Configurações do serviço de metadados
+METADATA_CONFIG = {
+    'ttl_segundos': 60,
+    'colunas_dicionario': ['Situação', 'Paga com']
+}
+
+# Configurações do armazenamento em memória (chunks)
+ARMAZENAMENTO_CONFIG = {
+    'linhas_min_chunk': 50000,
+    'max_chunks_pequenos': 8,
+    'linhas_por_lote': 131072  # lotes do pré-cálculo, fatiados dos chunks sem cópia
+}
+
+# Validação do faturamento na ingestão (linhas reprovadas vão para a quarentena)
+VALIDACAO_CONFIG = {
+    'colunas_obrigatorias': ['CPF/CNPJ', 'Total', 'Situação', 'Data de criação'],
+    'situacoes_permitidas': ['Paga', 'Pendente', 'Expirado'],
+    'validar_digitos_documento': True,
+    'data_minima': '2000-01-01',
+    'tolerancia_futuro_dias': 1
+}
+
+# Configurações de backup
+BACKUP_CONFIG = {
+    'formato_padrao': 'parquet',  # parquet ou csv.gz
+    'compressao_parquet': 'zstd',
+    'linhas_por_bloco': 50000,
+    'linhas_por_pagina_supabase': 1000
+}
+
+# Pré-cálculo em segundo plano dos artefatos derivados
+PRECOMPUTACAO_CONFIG = {
+    'espera_inicial_segundos': 30,  # espera pela primeira versão antes de calcular na sessão
+    'intervalo_verificacao_segundos': 2
+}
+
+# Inicialização: módulos pesados carregados no primeiro uso
+INICIALIZACAO_CONFIG = {
+    'importacao_sob_demanda': True
+}
+
+# Modo fora da memória: dataset Parquet em disco, particionado por mês e lido em lotes
+FORA_DA_MEMORIA_CONFIG = {
+    'diretorio': 'dados/faturamento',
+    'linhas_por_lote': 131072,  # memória de trabalho limitada a um lote por vez
+    'compressao': 'zstd'
+}
+
+# Configurações da análise de concentração (curva de Lorenz, Gini e HHI)
+CONCENTRACAO_CONFIG = {
+    # Risco pela dependência de clientes (% do faturamento): do maior cliente ou dos N maiores.
+    # Os limiares de HHI de mercado (1500/2500) quase nunca disparam para uma base de clientes.
+    'top_clientes': 10,
+    'risco': {
+        'maior_alto': 20,
+        'maior_moderado': 10,
+        'top_alto': 50,
+        'top_moderado': 30
+    },
+    # Acima desta quantidade de clientes, a curva é aproximada por histograma
+    'limite_exato': 200000,
+    'bins_histograma': 4096,
+    'pontos_curva': 200
+}
+
+# Prazo de pagamento e aging: bordas fixas (em dias) para somar histogramas de meses e lotes
+PRAZOS_CONFIG = {
+    'bordas_prazo_dias': [0, 1, 2, 3, 5, 7, 10, 15, 20, 30, 45, 60, 90],
+    'bordas_aging_dias': [0, 7, 15, 30, 60, 90, 180, 365],
+    'situacoes_aging': ['pendente', 'expirado']
+}
+
+# Leituras do Supabase: timeouts, disjuntor e revalidação em segundo plano
+LEITURA_CONFIG = {
+    'timeout_segundos': 5,  # consultas pequenas e espera do script pela primeira leitura
+    'timeout_dados_segundos': 120,  # carga da tabela (no pré-cálculo, fora do script)
+    'falhas_para_abrir': 3,  # falhas seguidas que abrem o disjuntor
+    'espera_disjuntor_segundos': 30,  # disjuntor aberto: chamadas recusadas sem ir ao backend
+    'intervalo_revalidacao_segundos': 10,  # mínimo entre recargas disparadas pelas sessões
+    'requisicoes_paralelas': 8,  # partições mensais buscadas ao mesmo tempo na carga da tabela
+    'agrupar_cargas': True  # cargas simultâneas da mesma versão compartilham uma única busca
+}
+
+# Leitura dos arquivos de upload
+UPLOAD_CONFIG = {
+    'threads_a_partir_de_mb': 16  # arquivos menores são lidos em uma thread (sem o custo fixo do pool)
 }
 
 # Configurações de formatação
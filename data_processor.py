@@ -1,6 +1,9 @@
-import pandas as pd
+from lazy_imports import lazy_import
 from datetime import datetime, timedelta
-from utils import classificar_cliente_faixa
+from segmentation import Segmentacao
+from projection import requires
+from time_buckets import period_keys
+pd = lazy_import('pandas')
 
 class DataProcessor:
     def __init__(self, df):
@@ -18,21 +21,30 @@ class DataProcessor:
     def _add_derived_columns(self):
         """Adiciona colunas derivadas."""
         if 'Data de criação' in self.df.columns:
-            self.df['Mes_Ano'] = self.df['Data de criação'].dt.to_period('M')
+            # Chaves inteiras de dia, semana ISO, mês e trimestre
+            for coluna, chaves in period_keys(self.df['Data de criação']).items():
+                self.df[coluna] = chaves
         
         # Preencher valores nulos em 'Paga com'
         if 'Paga com' in self.df.columns:
             self.df['Paga com'] = self.df['Paga com'].fillna('Não Informado')
     
+    @requires('CPF/CNPJ', 'Total', 'Situação')
     def get_ltv_por_cliente(self):
         """Calcula LTV por cliente."""
         if all(col in self.df.columns for col in ['CPF/CNPJ', 'Total', 'Situação']):
-            ltv_por_cliente = self.df[self.df['Situação'].str.lower() == 'paga'].groupby('CPF/CNPJ').agg({
-                'Total': 'sum',
-                'Nome': 'first'
-            }).reset_index()
-            ltv_por_cliente.columns = ['CPF/CNPJ', 'LTV_Total', 'Nome']
-            ltv_por_cliente['Faixa_Cliente'] = ltv_por_cliente['LTV_Total'].apply(classificar_cliente_faixa)
+            agregacoes = {'Total': 'sum', 'Situação': 'count'}
+            if 'Nome' in self.df.columns:
+                agregacoes['Nome'] = 'first'
+            if 'Data de criação' in self.df.columns:
+                agregacoes['Data de criação'] = 'max'
+            ltv_por_cliente = self.df[self.df['Situação'].str.lower() == 'paga'].groupby('CPF/CNPJ').agg(agregacoes).reset_index()
+            ltv_por_cliente = ltv_por_cliente.rename(columns={
+                'Total': 'LTV_Total',
+                'Situação': 'Num_Transacoes',
+                'Data de criação': 'Ultima_Compra'
+            })
+            ltv_por_cliente['Faixa_Cliente'] = Segmentacao().classify_clientes(ltv_por_cliente, valor='LTV_Total')
             return ltv_por_cliente
         return pd.DataFrame()
     
@@ -57,7 +69,7 @@ class DataProcessor:
         
         if metodo_pagamento != 'Todos' and 'Paga com' in df_filtrado.columns:
             if metodo_pagamento == 'Não Informado':
-                df_filtrado = df_filtrado[df_filtrado['Paga com'].isna()]
+                df_filtrado = df_filtrado[df_filtrado['Paga com'].isna() | (df_filtrado['Paga com'] == 'Não Informado')]
             else:
                 df_filtrado = df_filtrado[df_filtrado['Paga com'] == metodo_pagamento]
         
@@ -1,21 +1,103 @@
 import streamlit as st
-import pandas as pd
+from lazy_imports import lazy_import
 from datetime import datetime
+import itertools
+import os
+import threading
+import time
 import traceback
+from contextlib import contextmanager
+import backup
+from config import BACKUP_CONFIG, LEITURA_CONFIG
+from circuit_breaker import Disjuntor, BackendIndisponivel, chamar
+from partitioned_fetch import particoes_mensais, buscar_em_paralelo
+from single_flight import CargasCompartilhadas
+from metadata_service import MetadataService
+from dataset_store import DatasetStore
+from precompute import PrecomputeWorker
+from metrics_state import MetricsState
+from disk_dataset import DiskDataset
+from streaming_metrics import artefatos_fora_da_memoria
+from validation import validar_faturamento, parse_valores
+pd = lazy_import('pandas')
+
+# Mapeamento das colunas do banco para os nomes usados no dashboard
+COLUMN_MAPPING = {
+   'nome': 'Nome',
+   'cpf_cnpj': 'CPF/CNPJ',
+   'total': 'Total',
+   'taxa': 'Taxa',
+   'situacao': 'Situação',
+   'paga_com': 'Paga com'
+}
+
+# Colunas de data do banco e seus nomes no dashboard
+DATE_COLUMN_MAPPING = {
+   'data_criacao': 'Data de criação',
+   'data_pagamento': 'Data do pagamento'
+}
+
+# Código do PostgREST para função RPC não encontrada (sql/ não instalado)
+FUNCAO_INEXISTENTE = 'PGRST202'
+
+# Coluna do dashboard -> coluna do banco (usado na projeção)
+DB_COLUMNS = {col: db_col for db_col, col in {**COLUMN_MAPPING, **DATE_COLUMN_MAPPING}.items()}
 
 class DatabaseManager:
-   def __init__(self):
+   def __init__(self, mode=None, client=None, dataset_path=None):
        self.supabase = None
-       self.mode = "memory"  # memory ou supabase
+       self.mode = "memory"  # memory, supabase ou disco (fora da memória)
+       self.metadata = None
+       self.store = None
+       self.dataset = None
+       self.precompute = None
+       self.disjuntor = None  # modo supabase: recusa leituras enquanto o backend falha
+       self.cargas = CargasCompartilhadas()  # modo supabase: uma busca por versão, compartilhada entre sessões
+       self._revalidado_em = float('-inf')
+       self.metrics = MetricsState()  # métricas incrementais (delta a cada inserção)
+       self._quarentena = []  # modo memória: lotes reprovados na validação
+       self._escrita = threading.Lock()
+       self._escritas = 0  # contador de escritas (detecta carga concorrente no pré-cálculo)
+       
+       if client is not None:
+           # Cliente injetado (ex.: LocalSupabaseClient)
+           self._init_supabase(client)
+           return
+       
+       if mode == "memory":
+           # Modo memória explícito (scripts e benchmarks)
+           self._init_memory_storage()
+           return
+       
+       if mode == "disco":
+           # Modo fora da memória explícito (scripts e benchmarks)
+           self._init_disk_storage(dataset_path)
+           return
        
        try:
            # Tentar carregar secrets
-           if hasattr(st.secrets, "SUPABASE_URL") and hasattr(st.secrets, "SUPABASE_KEY"):
-               from supabase import create_client, Client
+           if hasattr(st.secrets, "LOCAL_DATABASE_PATH"):
+               from local_backend import LocalSupabaseClient
+               self._init_supabase(LocalSupabaseClient(st.secrets["LOCAL_DATABASE_PATH"]))
+               st.sidebar.success("🔗 Conectado ao banco local")
+           elif hasattr(st.secrets, "DATASET_PATH"):
+               self._init_disk_storage(st.secrets["DATASET_PATH"])
+               st.sidebar.success("🗄️ Dataset em disco (fora da memória)")
+           elif hasattr(st.secrets, "SUPABASE_URL") and hasattr(st.secrets, "SUPABASE_KEY"):
+               import httpx
+               from supabase import create_client, ClientOptions
                url = st.secrets["SUPABASE_URL"]
                key = st.secrets["SUPABASE_KEY"]
-               self.supabase = create_client(url, key)
-               self.mode = "supabase"
+               # Conexões mantidas abertas para as partições buscadas em paralelo; requisições
+               # sem resposta terminam também no cliente HTTP (não só na espera de quem chamou)
+               paralelas = LEITURA_CONFIG['requisicoes_paralelas']
+               http = httpx.Client(
+                   timeout=LEITURA_CONFIG['timeout_dados_segundos'],
+                   limits=httpx.Limits(max_connections=paralelas * 2, max_keepalive_connections=paralelas),
+                   http2=True,
+                   follow_redirects=True
+               )
+               self._init_supabase(create_client(url, key, options=ClientOptions(httpx_client=http)))
                st.sidebar.success("🔗 Conectado ao Supabase")
            else:
                st.sidebar.warning("⚠️ Usando modo de memória (dados não persistem)")
@@ -25,28 +107,240 @@ class DatabaseManager:
            st.sidebar.info("🔄 Usando modo de memória")
            self._init_memory_storage()
    
+   def _init_supabase(self, client):
+       """Configura o modo Supabase com o cliente informado"""
+       self.supabase = client
+       self.mode = "supabase"
+       self.disjuntor = Disjuntor()
+       # Metadados expirados são servidos enquanto recarregam; só a primeira leitura espera (com timeout)
+       self.metadata = MetadataService(loader=self._load_metadata_supabase, timeout=LEITURA_CONFIG['timeout_segundos'])
+       self.precompute = PrecomputeWorker(self._precompute_source, metricas=self.metrics)
+       self.precompute.schedule()
+   
    def _init_memory_storage(self):
-       """Inicializa armazenamento em memória"""
-       if 'database' not in st.session_state:
-           st.session_state.database = pd.DataFrame()
+       """Inicializa armazenamento em memória (compartilhado entre sessões)"""
+       self.store = DatasetStore()
+       self.metadata = MetadataService()
+       # Reduções lote a lote sobre os chunks do snapshot: a tabela não é concatenada a cada versão
+       self.precompute = PrecomputeWorker(
+           self._precompute_source, metricas=self.metrics, construtor=artefatos_fora_da_memoria
+       )
+   
+   def _init_disk_storage(self, caminho=None):
+       """Dataset Parquet particionado em disco; métricas por reduções em lotes"""
+       self.dataset = DiskDataset(caminho)
+       self.mode = "disco"
+       # Metadados lidos do disco uma vez; depois mantidos pelas escritas deste processo
+       self.metadata = MetadataService(loader=self._load_metadata_disk, ttl=float('inf'))
+       self.precompute = PrecomputeWorker(
+           self._precompute_source, metricas=self.metrics, construtor=artefatos_fora_da_memoria
+       )
+       self.precompute.schedule()
+   
+   def _session_snapshot(self):
+       """Snapshot lido pela sessão; a referência mantém a versão viva enquanto a sessão a usa"""
+       snapshot = self.store.current()
+       st.session_state.snapshot = snapshot
+       return snapshot
+   
+   def _get_metadata(self):
+       """Serviço de metadados do modo atual"""
+       return self.metadata
+   
+   def _ler(self, consulta, timeout=None):
+       """Executa uma consulta de leitura com timeout, passando pelo disjuntor do backend"""
+       return chamar(consulta.execute, timeout or LEITURA_CONFIG['timeout_segundos'], self.disjuntor)
+   
+   def _load_metadata_supabase(self):
+       """Carrega contagem, última atualização e valores distintos em uma única chamada"""
+       try:
+           # Função definida em sql/faturamento_metadata.sql
+           data = self._ler(self.supabase.rpc('faturamento_metadata')).data
+           return {
+               'total_records': data.get('total_records', 0),
+               'last_update': data.get('last_update'),
+               'distinct': {COLUMN_MAPPING.get(col, col): valores for col, valores in (data.get('distinct') or {}).items()},
+               'nulls': {COLUMN_MAPPING.get(col, col): valor for col, valor in (data.get('nulls') or {}).items()}
+           }
+       except BackendIndisponivel:
+           # Disjuntor aberto ou sem resposta: não é falta da função
+           raise
+       except Exception as e:
+           if getattr(e, 'code', None) != FUNCAO_INEXISTENTE:
+               raise
+           # Sem alternativa por varredura: ela percorreria a tabela a cada TTL e a cada escrita
+           raise RuntimeError(
+               "Metadados indisponíveis: a função faturamento_metadata é obrigatória. "
+               f"Rode sql/faturamento_metadata.sql no SQL editor do Supabase ({e})"
+           ) from e
+   
+   def _load_metadata_disk(self):
+       """Contagem pelos metadados dos arquivos e valores distintos lidos em lotes"""
+       snapshot = self.dataset.current()
+       colunas = [col for col in self.metadata.colunas if col in snapshot.columns]
+       distintos = {col: {} for col in colunas}
+       nulos = {col: False for col in colunas}
+       for lote in snapshot.iter_batches(colunas):
+           for col in colunas:
+               distintos[col].update(dict.fromkeys(lote[col].dropna().unique().tolist()))
+               nulos[col] = nulos[col] or bool(lote[col].isna().any())
+       return {
+           'total_records': len(snapshot),
+           'last_update': self.dataset.last_update(),
+           'distinct': {col: list(valores) for col, valores in distintos.items()},
+           'nulls': nulos
+       }
    
    def test_connection(self):
        """Testa conexão"""
        if self.mode == "supabase" and self.supabase:
            try:
-               result = self.supabase.table('faturamento').select("count").execute()
-               return True
+               # Metadados em cache, recarregados em segundo plano: não bloqueia o script
+               self.metadata.get()
            except Exception as e:
                st.error(f"❌ Erro de conexão Supabase: {str(e)}")
                return False
+           if self.disjuntor.estado != 'fechado':
+               st.error(
+                   f"❌ Supabase indisponível: {self.disjuntor.ultimo_erro}. "
+                   f"Nova tentativa em {self.disjuntor.nova_tentativa_em():.0f}s"
+               )
+               return False
+           return True
        return True  # Modo memória sempre "conectado"
    
-   def insert_faturamento(self, df):
-       """Insere dados"""
+   def _validate(self, df):
+       """Valida o lote e envia as linhas reprovadas para a quarentena; retorna as aprovadas (None se faltam colunas)"""
+       validacao = validar_faturamento(df)
+       if validacao.colunas_faltando:
+           st.error(f"❌ Colunas obrigatórias ausentes: {', '.join(validacao.colunas_faltando)}")
+           return None
+       if not validacao.quarentena.empty:
+           self._quarantine(validacao.quarentena)
+           motivos = ', '.join(f"{motivo} ({total})" for motivo, total in validacao.resumo().items())
+           st.warning(f"⚠️ {len(validacao.quarentena)} registros enviados para a quarentena: {motivos}")
+       return validacao.validos
+   
+   def _quarantine(self, quarentena):
+       """Guarda as linhas reprovadas com os valores originais e os motivos"""
        if self.mode == "supabase" and self.supabase:
-           return self._insert_supabase(df)
+           registros = pd.DataFrame({
+               db_col: self._raw_text_series(quarentena, col) for col, db_col in DB_COLUMNS.items()
+           }, index=quarentena.index)
+           registros['motivos'] = quarentena['Motivos']
+           registros = registros.to_dict('records')
+           try:
+               for i in range(0, len(registros), 1000):
+                   self.supabase.table('faturamento_quarentena').insert(registros[i:i + 1000]).execute()
+           except Exception as e:
+               st.error(f"❌ Erro ao gravar a quarentena: {str(e)}")
        else:
-           return self._insert_memory(df)
+           colunas = list(DB_COLUMNS) + ['Motivos']
+           self._quarentena.append(
+               quarentena.reindex(columns=colunas).assign(**{'Data da quarentena': datetime.now().isoformat()})
+           )
+   
+   def _raw_text_series(self, df, col):
+       """Valores originais como texto (None quando ausentes)"""
+       if col not in df.columns:
+           return pd.Series(None, index=df.index, dtype=object)
+       serie = df[col].astype(object)
+       return serie.where(serie.notna(), None).map(str, na_action='ignore')
+   
+   def get_quarentena(self, limite=None):
+       """Linhas em quarentena (mais recentes primeiro) com os motivos"""
+       colunas = list(DB_COLUMNS) + ['Motivos', 'Data da quarentena']
+       if self.mode == "supabase" and self.supabase:
+           try:
+               query = self.supabase.table('faturamento_quarentena').select('*').order('id', desc=True)
+               if limite:
+                   query = query.limit(limite)
+               data = query.execute().data
+           except Exception as e:
+               st.error(f"❌ Erro ao buscar a quarentena: {str(e)}")
+               return pd.DataFrame(columns=colunas)
+           df = pd.DataFrame(data or [], columns=['created_at', 'motivos'] + list(DB_COLUMNS.values()))
+           df = df.rename(columns={db_col: col for col, db_col in DB_COLUMNS.items()})
+           return df.rename(columns={'motivos': 'Motivos', 'created_at': 'Data da quarentena'})[colunas]
+       if not self._quarentena:
+           return pd.DataFrame(columns=colunas)
+       df = pd.concat(self._quarentena[::-1], ignore_index=True)
+       return df.head(limite) if limite else df
+   
+   def count_quarentena(self):
+       """Total de linhas em quarentena"""
+       if self.mode == "supabase" and self.supabase:
+           try:
+               return self.supabase.table('faturamento_quarentena').select("count").execute().data[0]['count']
+           except Exception:
+               return 0
+       return sum(len(lote) for lote in self._quarentena)
+   
+   def clear_quarentena(self):
+       """Descarta as linhas em quarentena"""
+       if self.mode == "supabase" and self.supabase:
+           try:
+               self.supabase.table('faturamento_quarentena').delete().neq('id', 0).execute()
+               return True
+           except Exception as e:
+               st.error(f"❌ Erro ao limpar a quarentena: {str(e)}")
+               return False
+       self._quarentena = []
+       return True
+   
+   def insert_faturamento(self, df):
+       """Insere dados (apenas as linhas aprovadas na validação)"""
+       df = self._validate(df)
+       if df is None:
+           return False
+       if df.empty:
+           return 0
+       
+       with self._escrevendo():
+           anterior = self._current_version()
+           if self.mode == "supabase" and self.supabase:
+               result = self._insert_supabase(df)
+           elif self.mode == "disco":
+               result = self._insert_disk(df)
+           else:
+               result = self._insert_memory(df)
+           
+           if result:
+               self._get_metadata().apply_insert(df, result)
+               self._sync_metadata()
+               if result == len(df):
+                   # Delta proporcional ao lote sobre o estado da versão anterior
+                   self.metrics.apply(self._stored_view(df), anterior, self._current_version())
+               else:
+                   # Inserção parcial: não se sabe quais linhas entraram
+                   self.metrics.invalidate()
+               self.precompute.schedule()
+       return result
+   
+   def _sync_metadata(self):
+       """Modo supabase: relê os metadados após a escrita, para a versão ser a mesma que o banco informa"""
+       if self.mode != "supabase":
+           return
+       try:
+           self.metadata.reload()
+       except Exception:
+           # Mantém a estimativa local; a recarga em segundo plano corrige depois
+           pass
+   
+   @contextmanager
+   def _escrevendo(self):
+       """Serializa as escritas e as métricas incrementais que dependem da ordem delas"""
+       with self._escrita:
+           self._escritas += 1
+           yield
+   
+   def _stored_view(self, df):
+       """Lote como será lido de volta do armazenamento (base do delta das métricas)"""
+       if self.mode == "supabase" and self.supabase:
+           return self._records_to_dataframe(self._to_records(df))
+       if self.mode == "disco":
+           return backup.normalizar_chunk(df)
+       return self._prepare_memory(df)
    
    def _convert_date(self, date_value):
        """Converte qualquer formato de data para ISO string"""
@@ -98,23 +392,44 @@ class DatabaseManager:
        except (ValueError, TypeError):
            return 0.0
    
-   def _insert_supabase(self, df):
+   def _safe_float_series(self, serie):
+       """Versão vetorizada de _safe_float"""
+       return parse_valores(serie).fillna(0.0)
+   
+   def _convert_date_series(self, serie):
+       """Versão vetorizada de _convert_date"""
+       datas = pd.to_datetime(serie, errors='coerce', format='mixed') if not pd.api.types.is_datetime64_any_dtype(serie) else serie
+       if not pd.api.types.is_datetime64_any_dtype(datas):
+           # Fusos horários misturados: converter valor a valor
+           return serie.map(self._convert_date)
+       iso = datas.map(lambda data: data.isoformat(), na_action='ignore')
+       return iso.astype(object).where(datas.notna(), None)
+   
+   def _text_series(self, df, col):
+       if col not in df.columns:
+           return pd.Series('', index=df.index)
+       serie = df[col]
+       return serie.astype(object).where(serie.notna(), '').astype(str)
+   
+   def _to_records(self, df):
+       """Converte o DataFrame para registros do banco de forma vetorizada"""
+       vazio = pd.Series(None, index=df.index, dtype=object)
+       registros = pd.DataFrame({
+           'nome': self._text_series(df, 'Nome'),
+           'cpf_cnpj': self._text_series(df, 'CPF/CNPJ'),
+           'total': self._safe_float_series(df['Total']) if 'Total' in df.columns else 0.0,
+           'taxa': self._safe_float_series(df['Taxa']) if 'Taxa' in df.columns else 0.0,
+           'situacao': self._text_series(df, 'Situação'),
+           'paga_com': self._text_series(df, 'Paga com'),
+           'data_criacao': self._convert_date_series(df['Data de criação']) if 'Data de criação' in df.columns else vazio,
+           'data_pagamento': self._convert_date_series(df['Data do pagamento']) if 'Data do pagamento' in df.columns else vazio,
+       }, index=df.index)
+       return registros.to_dict('records')
+   
+   def _insert_supabase(self, df, table='faturamento', stop_on_error=False):
        """Inserir no Supabase"""
        try:
-           records = []
-           
-           for _, row in df.iterrows():
-               record = {
-                   'nome': str(row.get('Nome', '')) if pd.notna(row.get('Nome')) else '',
-                   'cpf_cnpj': str(row.get('CPF/CNPJ', '')) if pd.notna(row.get('CPF/CNPJ')) else '',
-                   'total': self._safe_float(row.get('Total')),
-                   'taxa': self._safe_float(row.get('Taxa')),
-                   'situacao': str(row.get('Situação', '')) if pd.notna(row.get('Situação')) else '',
-                   'paga_com': str(row.get('Paga com', '')) if pd.notna(row.get('Paga com')) else '',
-                   'data_criacao': self._convert_date(row.get('Data de criação')),
-                   'data_pagamento': self._convert_date(row.get('Data do pagamento')),
-               }
-               records.append(record)
+           records = self._to_records(df)
            
            # Inserir em lotes
            batch_size = 1000
@@ -126,7 +441,7 @@ class DatabaseManager:
                batch = records[i:i + batch_size]
                
                try:
-                   result = self.supabase.table('faturamento').insert(batch).execute()
+                   result = self.supabase.table(table).insert(batch).execute()
                    total_inserted += len(batch)
                    
                    # Mostrar progresso
@@ -136,6 +451,9 @@ class DatabaseManager:
                        
                except Exception as batch_error:
                    st.error(f"❌ Erro no lote {i//batch_size + 1}: {str(batch_error)}")
+                   if stop_on_error:
+                       progress_placeholder.empty()
+                       return False
                    continue
            
            progress_placeholder.empty()
@@ -146,73 +464,265 @@ class DatabaseManager:
            st.error(f"Detalhes: {traceback.format_exc()}")
            return False
    
+   def _prepare_memory(self, df):
+       """Processa as datas antes de armazenar"""
+       df_processed = df.copy()
+       
+       # Converter datas para datetime se possível
+       date_columns = ['Data de criação', 'Data do pagamento']
+       for col in date_columns:
+           if col in df_processed.columns:
+               df_processed[col] = pd.to_datetime(df_processed[col], errors='coerce')
+       return df_processed
+   
    def _insert_memory(self, df):
        """Inserir na memória"""
        try:
-           # Processar as datas antes de armazenar
-           df_processed = df.copy()
-           
-           # Converter datas para datetime se possível
-           date_columns = ['Data de criação', 'Data do pagamento']
-           for col in date_columns:
-               if col in df_processed.columns:
-                   df_processed[col] = pd.to_datetime(df_processed[col], errors='coerce')
-           
-           st.session_state.database = pd.concat([st.session_state.database, df_processed], ignore_index=True)
+           self.store.append(self._prepare_memory(df))
            return len(df)
        except Exception as e:
            st.error(f"❌ Erro ao salvar em memória: {str(e)}")
            return False
    
-   def get_all_faturamento(self):
-       """Busca todos os dados"""
+   def _insert_disk(self, df):
+       """Grava o lote como novos arquivos do dataset em disco"""
+       try:
+           self.dataset.append(df)
+           return len(df)
+       except Exception as e:
+           st.error(f"❌ Erro ao gravar no disco: {str(e)}")
+           return False
+   
+   def replace_faturamento(self, df):
+       """Substitui todos os dados: carga completa em staging e troca atômica"""
+       return self.replace_faturamento_blocos([df])
+   
+   def replace_faturamento_blocos(self, blocos):
+       """Substitui todos os dados por blocos (ex.: restauração de backup); a troca só acontece se todos entrarem"""
+       dicionario = []
+       validados = self._validar_blocos(blocos, dicionario)
+       try:
+           primeiro = next(validados, None)
+       except ValueError:
+           return False
+       if primeiro is None:
+           # Nada válido para carregar: os dados atuais continuam intactos
+           return False
+       blocos = itertools.chain([primeiro], validados)
+       
+       with self._escrevendo():
+           if self.mode == "supabase" and self.supabase:
+               result = self._replace_supabase(blocos)
+           elif self.mode == "disco":
+               result = self._replace_disk(blocos)
+           else:
+               result = self._replace_memory(blocos)
+           
+           if result:
+               metadata = self._get_metadata()
+               metadata.reset()
+               metadata.apply_insert(pd.concat(dicionario), result)
+               self._sync_metadata()
+               # Substituição: as métricas são reconstruídas no próximo pré-cálculo
+               self.metrics.invalidate()
+               self.precompute.schedule()
+       return result
+   
+   def _validar_blocos(self, blocos, dicionario):
+       """Valida bloco a bloco (reprovadas vão para a quarentena); interrompe se faltam colunas"""
+       for bloco in blocos:
+           validos = self._validate(bloco)
+           if validos is None:
+               raise ValueError("Colunas obrigatórias ausentes")
+           if not validos.empty:
+               # Combinações distintas das colunas do dicionário: base dos metadados após a troca
+               dicionario.append(validos.reindex(columns=self.metadata.colunas).drop_duplicates())
+               yield validos
+   
+   def _replace_supabase(self, blocos):
+       """Carrega em faturamento_staging e troca via sql/faturamento_staging.sql"""
+       try:
+           self.supabase.rpc('reset_faturamento_staging').execute()
+           total = 0
+           for bloco in blocos:
+               # Qualquer lote com erro aborta: os dados atuais continuam intactos
+               inseridos = self._insert_supabase(bloco, table='faturamento_staging', stop_on_error=True)
+               if not inseridos:
+                   return False
+               total += inseridos
+           self.supabase.rpc('swap_faturamento_staging').execute()
+           return total
+       except Exception as e:
+           st.error(f"❌ Erro ao substituir dados no Supabase: {str(e)}")
+           return False
+   
+   def _replace_memory(self, blocos):
+       """Monta a nova versão fora do ar e a publica de uma vez"""
+       try:
+           return len(self.store.replace(self._prepare_memory(bloco) for bloco in blocos))
+       except Exception as e:
+           st.error(f"❌ Erro ao substituir dados em memória: {str(e)}")
+           return False
+   
+   def _replace_disk(self, blocos):
+       """Grava a nova geração do dataset ao lado e troca de uma vez"""
+       try:
+           return len(self.dataset.replace(blocos))
+       except Exception as e:
+           st.error(f"❌ Erro ao substituir dados no disco: {str(e)}")
+           return False
+   
+   def get_all_faturamento(self, columns=None):
+       """Busca todos os dados (ou apenas as colunas informadas, indexadas pela chave da linha)"""
        if self.mode == "supabase" and self.supabase:
-           return self._get_supabase()
+           return self._get_supabase(columns)
+       elif self.mode == "disco":
+           # Materializa o dataset: no modo fora da memória as métricas não passam por aqui
+           return self.dataset.current().to_frame(columns)
        else:
-           return self._get_memory()
+           return self._get_memory(columns)
    
-   def _get_supabase(self):
+   def _get_supabase(self, columns=None):
        """Buscar do Supabase"""
        try:
-           result = self.supabase.table('faturamento').select("*").order('created_at', desc=True).execute()
-           
-           if result.data:
-               df = pd.DataFrame(result.data)
-               
-               # Converter e renomear colunas
-               if 'data_criacao' in df.columns:
-                   df['Data de criação'] = pd.to_datetime(df['data_criacao'], errors='coerce')
-               if 'data_pagamento' in df.columns:
-                   df['Data do pagamento'] = pd.to_datetime(df['data_pagamento'], errors='coerce')
-               
-               column_mapping = {
-                   'nome': 'Nome',
-                   'cpf_cnpj': 'CPF/CNPJ',
-                   'total': 'Total',
-                   'taxa': 'Taxa',
-                   'situacao': 'Situação',
-                   'paga_com': 'Paga com'
-               }
-               
-               df = df.rename(columns=column_mapping)
-               
-               # Debug: verificar se as colunas estão corretas
-               expected_columns = ['Nome', 'CPF/CNPJ', 'Total', 'Taxa', 'Situação', 'Paga com', 'Data de criação']
-               missing_columns = [col for col in expected_columns if col not in df.columns]
-               if missing_columns:
-                   st.warning(f"⚠️ Colunas faltando: {missing_columns}")
-               
-               return df
-           else:
-               return pd.DataFrame()
-               
+           return self._load_supabase(columns)
        except Exception as e:
            st.error(f"❌ Erro ao buscar do Supabase: {str(e)}")
            return pd.DataFrame()
    
-   def _get_memory(self):
+   def _load_supabase(self, columns=None, versao=None):
+       """Busca agrupada por versão: quem pede durante uma busca que já cobre as colunas espera por ela"""
+       if not LEITURA_CONFIG['agrupar_cargas']:
+           return self._fetch_supabase(columns)
+       versao = self._current_version() if versao is None else versao
+       colunas = None if columns is None else tuple(columns)
+       
+       def cobre(chave):
+           # Mesma versão e todas as colunas pedidas (buscas projetadas são indexadas pela chave da linha)
+           em_andamento, disponiveis = chave
+           return (em_andamento == versao and colunas is not None and disponiveis is not None
+                   and set(colunas) <= set(disponiveis))
+       
+       chave, df = self.cargas.executar((versao, colunas), lambda: self._fetch_supabase(columns), cobre)
+       if chave[1] != colunas:
+           return df[[col for col in colunas if col in df.columns]]
+       # Cópia rasa: colunas derivadas por quem recebe não alteram o resultado compartilhado (copy-on-write)
+       return df.copy(deep=False)
+   
+   def _fetch_supabase(self, columns=None):
+       """Busca a tabela em partições mensais paralelas (com timeout e disjuntor); erros são propagados, nunca viram tabela vazia"""
+       if columns is None:
+           select = "*"
+       else:
+           # 'id' é a chave usada para juntar colunas carregadas depois
+           select = ",".join(['id'] + [DB_COLUMNS[col] for col in columns if col in DB_COLUMNS])
+       
+       paralelas = LEITURA_CONFIG['requisicoes_paralelas']
+       minimo, maximo = buscar_em_paralelo(
+           [lambda: self._extremo_criacao(False), lambda: self._extremo_criacao(True)], paralelas
+       )
+       # Mais recentes primeiro, como na ordem por created_at decrescente; sem data por último.
+       # A primeira partição começa na menor data: filtrada, não inclui as linhas sem data.
+       particoes = [] if minimo is None else [
+           (inicio or minimo, fim, False) for inicio, fim in reversed(particoes_mensais(minimo, maximo))
+       ]
+       particoes.append((None, None, True))
+       partes = buscar_em_paralelo(
+           [lambda p=particao: self._fetch_partition(select, *p) for particao in particoes], paralelas
+       )
+       partes = [parte for parte in partes if not parte.empty]
+       if not partes:
+           return pd.DataFrame()
+       df = pd.concat(partes, ignore_index=True)
+       
+       if columns is not None:
+           df = df.drop(columns=[col for col in DATE_COLUMN_MAPPING if col in df.columns]).set_index('id')
+       
+       # Debug: verificar se as colunas estão corretas
+       expected_columns = ['Nome', 'CPF/CNPJ', 'Total', 'Taxa', 'Situação', 'Paga com', 'Data de criação']
+       if columns is not None:
+           expected_columns = [col for col in expected_columns if col in columns]
+       missing_columns = [col for col in expected_columns if col not in df.columns]
+       if missing_columns:
+           st.warning(f"⚠️ Colunas faltando: {missing_columns}")
+       
+       return df
+   
+   def _extremo_criacao(self, maior):
+       """Menor (ou maior) data de criação não nula"""
+       consulta = self.supabase.table('faturamento').select('data_criacao').order(
+           'data_criacao', desc=maior, nullsfirst=False
+       ).limit(1)
+       data = self._ler(consulta).data
+       return data[0]['data_criacao'] if data else None
+   
+   def _fetch_partition(self, select, inicio, fim, sem_data):
+       """Páginas de uma partição por chave (id decrescente), convertidas em DataFrame nesta thread"""
+       pagina = BACKUP_CONFIG['linhas_por_pagina_supabase']
+       registros = []
+       ultimo = None
+       while True:
+           consulta = self.supabase.table('faturamento').select(select)
+           if sem_data:
+               consulta = consulta.is_('data_criacao', 'null')
+           if inicio is not None:
+               consulta = consulta.gte('data_criacao', inicio)
+           if fim is not None:
+               consulta = consulta.lt('data_criacao', fim)
+           if ultimo is not None:
+               # Paginação por chave: sem offset, estável com inserções concorrentes
+               consulta = consulta.lt('id', ultimo)
+           data = self._ler(consulta.order('id', desc=True).limit(pagina), LEITURA_CONFIG['timeout_dados_segundos']).data
+           registros.extend(data)
+           if len(data) < pagina:
+               break
+           ultimo = data[-1]['id']
+       return self._records_to_dataframe(registros) if registros else pd.DataFrame()
+   
+   def _records_to_dataframe(self, data):
+       """Converte registros do banco para o DataFrame do dashboard"""
+       df = pd.DataFrame(data)
+       
+       # Converter e renomear colunas
+       if 'data_criacao' in df.columns:
+           df['Data de criação'] = pd.to_datetime(df['data_criacao'], errors='coerce')
+       if 'data_pagamento' in df.columns:
+           df['Data do pagamento'] = pd.to_datetime(df['data_pagamento'], errors='coerce')
+       
+       return df.rename(columns=COLUMN_MAPPING)
+   
+   def iter_faturamento(self, chunk_size=None):
+       """Percorre os dados em blocos, sem materializar a tabela inteira"""
+       if self.mode == "supabase" and self.supabase:
+           chunk_size = chunk_size or BACKUP_CONFIG['linhas_por_pagina_supabase']
+           inicio = 0
+           while True:
+               result = self.supabase.table('faturamento').select("*").order('id').range(
+                   inicio, inicio + chunk_size - 1
+               ).execute()
+               if not result.data:
+                   break
+               yield self._records_to_dataframe(result.data)
+               if len(result.data) < chunk_size:
+                   break
+               inicio += chunk_size
+       elif self.mode == "disco":
+           # Lotes do próprio dataset (até linhas_por_lote linhas cada)
+           yield from self.dataset.current().iter_batches()
+       else:
+           chunk_size = chunk_size or BACKUP_CONFIG['linhas_por_bloco']
+           for chunk in self._session_snapshot().table.iter_chunks():
+               for inicio in range(0, len(chunk), chunk_size):
+                   yield chunk.iloc[inicio:inicio + chunk_size]
+   
+   def _get_memory(self, columns=None):
        """Buscar da memória"""
-       return st.session_state.database.copy()
+       snapshot = self._session_snapshot()
+       if columns is None:
+           # Concatenação dos chunks para quem chamou (não fica guardada no snapshot)
+           return snapshot.df
+       # Apenas as colunas pedidas são concatenadas entre os chunks
+       return snapshot.table.select(columns)
    
    def get_faturamento_by_period(self, start_date, end_date):
        """Busca dados por período"""
@@ -223,30 +733,19 @@ class DatabaseManager:
                ).lte('data_criacao', end_date.isoformat()).execute()
                
                if result.data:
-                   df = pd.DataFrame(result.data)
-                   # Aplicar mesmo mapeamento de colunas
-                   if 'data_criacao' in df.columns:
-                       df['Data de criação'] = pd.to_datetime(df['data_criacao'], errors='coerce')
-                   if 'data_pagamento' in df.columns:
-                       df['Data do pagamento'] = pd.to_datetime(df['data_pagamento'], errors='coerce')
-                   
-                   column_mapping = {
-                       'nome': 'Nome',
-                       'cpf_cnpj': 'CPF/CNPJ',
-                       'total': 'Total',
-                       'taxa': 'Taxa',
-                       'situacao': 'Situação',
-                       'paga_com': 'Paga com'
-                   }
-                   
-                   df = df.rename(columns=column_mapping)
-                   return df
+                   return self._records_to_dataframe(result.data)
                else:
                    return pd.DataFrame()
                    
            except Exception as e:
                st.error(f"❌ Erro ao buscar por período: {str(e)}")
                return pd.DataFrame()
+       elif self.mode == "disco":
+           partes = [
+               lote.loc[(lote['Data de criação'] >= start_date) & (lote['Data de criação'] <= end_date)]
+               for lote in self.dataset.current().iter_batches()
+           ]
+           return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
        else:
            # Buscar da memória por período
            df = self._get_memory()
@@ -257,64 +756,188 @@ class DatabaseManager:
    
    def delete_all_data(self):
        """Limpa todos os dados"""
-       if self.mode == "supabase" and self.supabase:
-           try:
-               result = self.supabase.table('faturamento').delete().neq('id', 0).execute()
+       with self._escrevendo():
+           if self.mode == "supabase" and self.supabase:
+               try:
+                   result = self.supabase.table('faturamento').delete().neq('id', 0).execute()
+                   self.metadata.reset()
+                   self._sync_metadata()
+                   self.metrics.invalidate()
+                   self.precompute.schedule()
+                   return True
+               except Exception as e:
+                   st.error(f"❌ Erro ao limpar Supabase: {str(e)}")
+                   return False
+           elif self.mode == "disco":
+               self.dataset.clear()
+               self.metadata.reset()
+               self.metrics.invalidate()
+               self.precompute.schedule()
+               return True
+           else:
+               self.store.clear()
+               self.metadata.reset()
+               self.metrics.invalidate()
+               self.precompute.schedule()
                return True
-           except Exception as e:
-               st.error(f"❌ Erro ao limpar Supabase: {str(e)}")
-               return False
-       else:
-           st.session_state.database = pd.DataFrame()
-           return True
    
    def get_stats(self):
        """Retorna estatísticas"""
        if self.mode == "supabase" and self.supabase:
            try:
-               result = self.supabase.table('faturamento').select("id", count="exact").execute()
-               total_records = result.count
-               
-               last_result = self.supabase.table('faturamento').select("created_at").order('created_at', desc=True).limit(1).execute()
-               last_update = last_result.data[0]['created_at'] if last_result.data else None
-               
-               return {
-                   'total_records': total_records,
-                   'last_update': last_update,
-                   'mode': 'Supabase'
-               }
+               stats = self.metadata.get_stats()
+               stats['mode'] = 'Supabase'
+               return stats
            except Exception as e:
                st.error(f"❌ Erro ao buscar stats: {str(e)}")
                return {'total_records': 0, 'mode': 'Memory (Error)'}
+       elif self.mode == "disco":
+           stats = self.metadata.get_stats()
+           stats['mode'] = 'Disco (fora da memória)'
+           return stats
        else:
-           df = st.session_state.database
-           return {
-               'total_records': len(df),
-               'last_update': datetime.now().isoformat(),
-               'mode': 'Memory'
-           }
+           stats = self.metadata.get_stats()
+           stats.update(self.store.stats(self._session_snapshot()))
+           stats['mode'] = 'Memory'
+           return stats
+   
+   def has_data(self):
+       """Indica se há registros, pelos metadados (sem carregar os dados)"""
+       return bool(self._get_metadata().get_stats()['total_records'])
+   
+   def get_precomputed(self):
+       """Artefatos pré-calculados da última versão pronta (None se ainda não há)"""
+       return self.precompute.current()
+   
+   def _precompute_source(self):
+       """Versão e dados completos para o pré-cálculo (executa fora da sessão)"""
+       if self.mode == "supabase" and self.supabase:
+           with self._escrita:
+               versao, escritas = self._current_version(), self._escritas
+           # Falhas chegam ao pré-cálculo, que mantém os últimos artefatos publicados.
+           # Sessões que pedem dados desta versão durante a carga esperam por ela em vez de buscar de novo.
+           df = self._load_supabase(list(DB_COLUMNS), versao)
+           if self._escritas != escritas:
+               # Escrita durante a carga: os dados podem não corresponder à versão lida.
+               # A escrita agenda um novo cálculo ao terminar.
+               raise RuntimeError("Dados alterados durante a carga do pré-cálculo")
+           if df.empty and self.metadata.get()['total_records']:
+               raise RuntimeError("Falha ao carregar os dados para o pré-cálculo")
+           return versao, df
+       if self.mode == "disco":
+           # Snapshot imutável: lido em lotes pelo construtor fora da memória
+           snapshot = self.dataset.current()
+           return f"disco:{snapshot.versao}", snapshot
+       # Snapshot imutável: os chunks são lidos em lotes, sem concatenar a tabela
+       snapshot = self.store.current()
+       return f"mem:{snapshot.versao}", snapshot
    
-   def backup_data(self):
-       """Faz backup dos dados em CSV"""
+   def revalidate(self):
+       """Agenda a recarga em segundo plano se os artefatos publicados não são da versão atual"""
+       if self.mode != "supabase" or self.precompute.pending() or not self.disjuntor.disponivel():
+           return
+       agora = time.monotonic()
+       if agora - self._revalidado_em < LEITURA_CONFIG['intervalo_revalidacao_segundos']:
+           # Várias sessões (e reexecuções) disparam no máximo uma recarga por intervalo
+           return
        try:
-           df = self.get_all_faturamento()
-           if not df.empty:
-               timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-               filename = f"backup_faturamento_{timestamp}.csv"
-               return df.to_csv(index=False), filename
-           else:
+           metadata = self.metadata.get()
+       except Exception:
+           return
+       publicados = self.precompute.current()
+       if publicados is None:
+           desatualizado = bool(metadata['total_records'])
+       else:
+           desatualizado = publicados.versao != self._current_version()
+       if desatualizado:
+           self._revalidado_em = agora
+           self.precompute.schedule()
+   
+   def get_freshness(self, artefatos):
+       """Idade dos artefatos exibidos e, se não são os da versão atual, o motivo"""
+       frescor = {'carregado_em': artefatos.carregado_em, 'desatualizado': False, 'motivo': None}
+       if self.mode != "supabase":
+           return frescor
+       if self.disjuntor.estado != 'fechado':
+           frescor['motivo'] = (
+               f"Supabase indisponível ({self.disjuntor.ultimo_erro}); "
+               f"nova tentativa em {self.disjuntor.nova_tentativa_em():.0f}s"
+           )
+       elif self.metadata.erro is not None:
+           frescor['motivo'] = f"falha ao consultar o Supabase ({self.metadata.erro})"
+       elif self.precompute.erro is not None:
+           frescor['motivo'] = f"falha ao recarregar os dados ({self.precompute.erro})"
+       else:
+           try:
+               if artefatos.versao != self._current_version():
+                   frescor['motivo'] = "nova versão sendo carregada em segundo plano"
+           except Exception as e:
+               frescor['motivo'] = f"falha ao consultar o Supabase ({e})"
+       frescor['desatualizado'] = frescor['motivo'] is not None
+       return frescor
+   
+   def _current_version(self):
+       """Versão atual dos dados, sem depender da sessão"""
+       if self.mode == "supabase" and self.supabase:
+           metadata = self.metadata.get()
+           return f"{metadata['total_records']}:{metadata['last_update']}"
+       if self.mode == "disco":
+           return f"disco:{self.dataset.current().versao}"
+       return f"mem:{self.store.current().versao}"
+   
+   def get_dataset_version(self):
+       """Identificador da versão atual dos dados (chave dos cálculos memorizados)"""
+       if self.mode != "memory":
+           return self._current_version()
+       return f"mem:{self._session_snapshot().versao}"
+   
+   def backup_data(self, formato=None, diretorio=None):
+       """Faz backup compactado em streaming; retorna (caminho, manifesto)"""
+       caminho = None
+       try:
+           formato = formato or BACKUP_CONFIG['formato_padrao']
+           # Microssegundos: backups de sessões diferentes no mesmo segundo não se sobrescrevem
+           timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+           filename = f"backup_faturamento_{timestamp}{backup.FORMATOS[formato]}"
+           caminho = os.path.join(diretorio or backup.diretorio_temporario(), filename)
+           
+           manifesto = backup.write_backup(self.iter_faturamento(), caminho, formato)
+           if manifesto['linhas'] == 0:
+               backup.remove_backup(caminho)
                return None, None
+           return caminho, manifesto
        except Exception as e:
+           if caminho is not None:
+               backup.remove_backup(caminho)
            st.error(f"❌ Erro ao fazer backup: {str(e)}")
            return None, None
    
+   def restore_data(self, caminho, manifesto=None):
+       """Substitui os dados pelo backup (em blocos, com troca atômica)"""
+       try:
+           return backup.restore_backup(self, caminho, manifesto)
+       except Exception as e:
+           st.error(f"❌ Erro ao restaurar backup: {str(e)}")
+           return False
+   
    def get_unique_values(self, column):
        """Retorna valores únicos de uma coluna"""
        try:
+           metadata = self._get_metadata()
+           if metadata.tracks(column):
+               return metadata.get_unique_values(column)
+           
            df = self.get_all_faturamento()
            if not df.empty and column in df.columns:
                return df[column].dropna().unique().tolist()
            return []
        except Exception as e:
            st.error(f"❌ Erro ao buscar valores únicos: {str(e)}")
-           return []
\ No newline at end of file
+           return []
+   
+   def has_null_values(self, column):
+       """Indica se uma coluna do dicionário possui valores nulos"""
+       try:
+           return self._get_metadata().has_nulls(column)
+       except Exception:
+           return False
@@ -0,0 +1,145 @@
+"""
+Armazenamento compartilhado entre sessões para o modo memória: snapshots
+imutáveis e versionados, referenciados pelas sessões sem cópia.
+"""
+import threading
+import weakref
+from lazy_imports import lazy_import
+from datetime import datetime
+from chunked_table import ChunkedTable
+from config import ARMAZENAMENTO_CONFIG
+pd = lazy_import('pandas')
+
+def _habilitar_copy_on_write():
+    """Cópias rasas e projeções compartilham memória com o snapshot (padrão no pandas >= 3)."""
+    if int(pd.__version__.split('.')[0]) == 2:
+        pd.set_option('mode.copy_on_write', True)
+
+class Snapshot:
+    def __init__(self, versao, table):
+        self.versao = versao
+        self.table = table
+        self.criado_em = datetime.now().isoformat()
+        self.nbytes = table.memory_usage()
+
+    @property
+    def df(self):
+        """Tabela lógica completa (materializada a cada acesso, sem ficar guardada)."""
+        return self.table.to_frame()
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def empty(self):
+        return self.table.empty
+
+    @property
+    def columns(self):
+        return self.table.columns
+
+    def iter_batches(self, columns=None):
+        """Percorre os dados em lotes de até `linhas_por_lote` linhas, fatias dos chunks."""
+        linhas = ARMAZENAMENTO_CONFIG['linhas_por_lote']
+        for chunk in self.table.iter_chunks(columns):
+            for inicio in range(0, len(chunk), linhas):
+                yield chunk.iloc[inicio:inicio + linhas]
+
+    def head(self, n, columns=None):
+        partes, faltam = [], n
+        for chunk in self.table.iter_chunks(columns):
+            if faltam <= 0:
+                break
+            partes.append(chunk.head(faltam))
+            faltam -= len(partes[-1])
+        if not partes:
+            return pd.DataFrame(columns=list(columns or self.columns))
+        return pd.concat(partes) if len(partes) > 1 else partes[0]
+
+class DatasetStore:
+    def __init__(self, linhas_min_chunk=None, max_chunks_pequenos=None):
+        self.linhas_min_chunk = linhas_min_chunk or ARMAZENAMENTO_CONFIG['linhas_min_chunk']
+        self.max_chunks_pequenos = max_chunks_pequenos or ARMAZENAMENTO_CONFIG['max_chunks_pequenos']
+        self._lock = threading.Lock()
+        self._compactando = False
+        self._atual = Snapshot(0, ChunkedTable())
+        # Snapshots antigos ficam vivos apenas enquanto alguma sessão os referencia
+        self._snapshots = weakref.WeakSet([self._atual])
+
+    def current(self):
+        """Retorna o snapshot mais recente."""
+        return self._atual
+
+    def _publish(self, table, versao=None):
+        _habilitar_copy_on_write()
+        snapshot = Snapshot(self._atual.versao + 1 if versao is None else versao, table)
+        self._snapshots.add(snapshot)
+        self._atual = snapshot
+        return snapshot
+
+    def append(self, df):
+        """Cria uma nova versão com o lote adicionado como um novo chunk."""
+        with self._lock:
+            snapshot = self._publish(self._atual.table.append(df))
+        self._schedule_compaction()
+        return snapshot
+
+    def replace(self, blocos):
+        """Cria uma nova versão com o conteúdo informado (um chunk por bloco)."""
+        # Montada fora do lock: leitores e inserções seguem na versão atual até a publicação
+        tabela = ChunkedTable()
+        for bloco in blocos:
+            tabela = tabela.append(bloco)
+        with self._lock:
+            return self._publish(tabela)
+
+    def clear(self):
+        """Cria uma nova versão vazia."""
+        with self._lock:
+            return self._publish(ChunkedTable())
+
+    def _schedule_compaction(self):
+        """Compacta em segundo plano quando há muitos chunks pequenos."""
+        with self._lock:
+            if self._compactando or self._atual.table.small_chunks(self.linhas_min_chunk) <= self.max_chunks_pequenos:
+                return
+            self._compactando = True
+        threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        """Junta chunks pequenos; o conteúdo lógico (e a versão) não mudam."""
+        try:
+            base = self._atual
+            compactada = base.table.compacted(self.linhas_min_chunk)
+            with self._lock:
+                atual = self._atual
+                if compactada is base.table or not atual.table.starts_with(base.table):
+                    # Nada a compactar, ou tabela substituída/limpa durante a compactação
+                    return
+                # Mantém os chunks inseridos durante a compactação
+                n = len(base.table.chunks)
+                self._publish(ChunkedTable(
+                    compactada.chunks + atual.table.chunks[n:],
+                    compactada.chunk_nbytes + atual.table.chunk_nbytes[n:]
+                ), versao=atual.versao)
+        finally:
+            self._compactando = False
+
+    def stats(self, snapshot=None):
+        """Estatísticas do armazenamento, do ponto de vista de um snapshot de sessão."""
+        if snapshot is None:
+            snapshot = self._atual
+        snapshots = list(self._snapshots)
+        # Chunks compartilhados entre versões contam uma única vez
+        chunks = {
+            id(chunk): nbytes
+            for s in snapshots
+            for chunk, nbytes in zip(s.table.chunks, s.table.chunk_nbytes)
+        }
+        return {
+            'versao': snapshot.versao,
+            'versao_atual': self._atual.versao,
+            'versoes_ativas': len({s.versao for s in snapshots}),
+            'chunks': len(snapshot.table.chunks),
+            'memoria_compartilhada': sum(chunks.values())
+        }
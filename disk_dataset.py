@@ -0,0 +1,217 @@
+"""
+Dataset do faturamento em disco para o modo fora da memória: arquivos
+Parquet particionados pelo mês de criação e lidos em lotes de tamanho
+limitado. Inserções gravam novos arquivos; substituição e limpeza montam
+uma nova geração do diretório e trocam o ponteiro de uma vez.
+"""
+import os
+import shutil
+import threading
+import time
+import uuid
+import weakref
+from datetime import datetime
+from lazy_imports import lazy_import
+from backup import BACKUP_SCHEMA, normalizar_chunk
+from config import FORA_DA_MEMORIA_CONFIG
+pa = lazy_import('pyarrow')
+ds = lazy_import('pyarrow.dataset')
+pd = lazy_import('pandas')
+
+# Coluna de partição (AAAAMM), derivada de 'Data de criação'
+COLUNA_PARTICAO = 'mes'
+
+# Arquivo com o nome da geração atual (trocado de forma atômica)
+ARQUIVO_PONTEIRO = 'ATUAL'
+
+def _esquema():
+    tipos = {'string': pa.string(), 'float64': pa.float64(), 'datetime64[ns]': pa.timestamp('ns')}
+    campos = [(col, tipos[dtype]) for col, dtype in BACKUP_SCHEMA.items()]
+    return pa.schema(campos + [(COLUNA_PARTICAO, pa.int32())])
+
+def _particionamento():
+    return ds.partitioning(pa.schema([(COLUNA_PARTICAO, pa.int32())]), flavor='hive')
+
+def _arquivos(caminho):
+    return [
+        os.path.join(raiz, nome)
+        for raiz, _, nomes in os.walk(caminho)
+        for nome in nomes if nome.endswith('.parquet')
+    ]
+
+class _Geracao:
+    """Diretório de uma geração; removido quando nenhum snapshot o referencia mais."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+
+class DiskSnapshot:
+    """Conjunto fixo de arquivos de uma versão do dataset."""
+
+    def __init__(self, versao, geracao, dataset, linhas_por_lote):
+        self.versao = versao
+        # Referência à geração: mantém os arquivos em disco enquanto o snapshot é usado
+        self.geracao = geracao
+        # dataset: pyarrow.dataset com a lista de arquivos desta versão (None se vazio)
+        self.dataset = dataset
+        self.linhas_por_lote = linhas_por_lote
+        self._num_linhas = None
+
+    def __len__(self):
+        # Contagem pelos metadados dos arquivos, sem ler as colunas
+        if self._num_linhas is None:
+            self._num_linhas = self.dataset.count_rows() if self.dataset is not None else 0
+        return self._num_linhas
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def columns(self):
+        return list(BACKUP_SCHEMA)
+
+    def _to_pandas(self, batches, columns):
+        return pa.Table.from_batches(batches).to_pandas()[columns]
+
+    def iter_batches(self, columns=None):
+        """Percorre os dados em lotes pandas de até `linhas_por_lote` linhas, um por vez."""
+        if self.dataset is None:
+            return
+        columns = [col for col in (columns or BACKUP_SCHEMA) if col in BACKUP_SCHEMA]
+        pendentes, linhas = [], 0
+        # Leitura antecipada mínima: a memória de trabalho fica em torno de um lote
+        for batch in self.dataset.to_batches(columns=columns, batch_size=self.linhas_por_lote,
+                                             batch_readahead=1, fragment_readahead=1):
+            if batch.num_rows == 0:
+                continue
+            # Arquivos pequenos (inserções pequenas) são agrupados até completar um lote
+            pendentes.append(batch)
+            linhas += batch.num_rows
+            if linhas >= self.linhas_por_lote:
+                yield self._to_pandas(pendentes, columns)
+                pendentes, linhas = [], 0
+        if pendentes:
+            yield self._to_pandas(pendentes, columns)
+
+    def head(self, n, columns=None):
+        columns = [col for col in (columns or BACKUP_SCHEMA) if col in BACKUP_SCHEMA]
+        if self.dataset is None:
+            return pd.DataFrame(columns=columns)
+        return self.dataset.head(n, columns=columns).to_pandas()[columns]
+
+    def to_frame(self, columns=None):
+        """Materializa o dataset (apenas para volumes que cabem na memória)."""
+        partes = list(self.iter_batches(columns))
+        if not partes:
+            return pd.DataFrame(columns=[col for col in (columns or BACKUP_SCHEMA) if col in BACKUP_SCHEMA])
+        return pd.concat(partes, ignore_index=True)
+
+class DiskDataset:
+    def __init__(self, caminho=None, linhas_por_lote=None, compressao=None):
+        self.caminho = os.path.abspath(caminho or FORA_DA_MEMORIA_CONFIG['diretorio'])
+        self.linhas_por_lote = linhas_por_lote or FORA_DA_MEMORIA_CONFIG['linhas_por_lote']
+        self.compressao = compressao or FORA_DA_MEMORIA_CONFIG['compressao']
+        self._lock = threading.Lock()
+        self._versao = 0
+        os.makedirs(self.caminho, exist_ok=True)
+        self._geracao = self._carregar_geracao()
+        self._atual = self._abrir()
+
+    def _carregar_geracao(self):
+        """Geração indicada pelo ponteiro; diretórios de trocas interrompidas são descartados."""
+        ponteiro = os.path.join(self.caminho, ARQUIVO_PONTEIRO)
+        if os.path.exists(ponteiro):
+            with open(ponteiro, encoding='utf-8') as arquivo:
+                nome = arquivo.read().strip()
+        else:
+            nome = self._criar_geracao()
+            self._gravar_ponteiro(nome)
+        for outro in os.listdir(self.caminho):
+            if outro.startswith('geracao-') and outro != nome:
+                shutil.rmtree(os.path.join(self.caminho, outro), ignore_errors=True)
+        return _Geracao(os.path.join(self.caminho, nome))
+
+    def _criar_geracao(self):
+        nome = f"geracao-{time.time_ns()}"
+        os.makedirs(os.path.join(self.caminho, nome))
+        return nome
+
+    def _gravar_ponteiro(self, nome):
+        ponteiro = os.path.join(self.caminho, ARQUIVO_PONTEIRO)
+        temporario = f"{ponteiro}.{uuid.uuid4().hex[:8]}"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(nome)
+        os.replace(temporario, ponteiro)
+
+    def _abrir(self):
+        arquivos = sorted(_arquivos(self._geracao.caminho))
+        dataset = None
+        if arquivos:
+            dataset = ds.dataset(arquivos, schema=_esquema(), format='parquet',
+                                 partitioning=_particionamento(), partition_base_dir=self._geracao.caminho)
+        return DiskSnapshot(self._versao, self._geracao, dataset, self.linhas_por_lote)
+
+    def current(self):
+        """Snapshot da versão mais recente."""
+        return self._atual
+
+    def last_update(self):
+        arquivos = _arquivos(self._geracao.caminho)
+        if not arquivos:
+            return None
+        return datetime.fromtimestamp(max(os.path.getmtime(arquivo) for arquivo in arquivos)).isoformat()
+
+    def _gravar(self, df, destino):
+        """Grava o lote no esquema fixo, um arquivo por mês de criação."""
+        chunk = normalizar_chunk(df)
+        criacao = chunk['Data de criação']
+        chunk[COLUNA_PARTICAO] = (criacao.dt.year * 100 + criacao.dt.month).astype('Int32')
+        tabela = pa.Table.from_pandas(chunk, schema=_esquema(), preserve_index=False)
+        ds.write_dataset(
+            tabela, destino, format='parquet', partitioning=_particionamento(),
+            basename_template=f"lote-{self._versao + 1:010d}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+            file_options=ds.ParquetFileFormat().make_write_options(compression=self.compressao),
+            max_rows_per_group=self.linhas_por_lote
+        )
+
+    def _publicar(self):
+        self._versao += 1
+        self._atual = self._abrir()
+        return self._atual
+
+    def append(self, df):
+        """Grava o lote em novos arquivos e publica a nova versão."""
+        with self._lock:
+            if not df.empty:
+                self._gravar(df, self._geracao.caminho)
+            return self._publicar()
+
+    def _trocar(self, blocos):
+        # Nova geração montada ao lado; a atual continua legível até a troca do ponteiro
+        nome = self._criar_geracao()
+        geracao = _Geracao(os.path.join(self.caminho, nome))
+        try:
+            for bloco in blocos:
+                if not bloco.empty:
+                    self._gravar(bloco, geracao.caminho)
+        except BaseException:
+            # Falha no meio da carga: a geração incompleta nunca chega ao ponteiro
+            shutil.rmtree(geracao.caminho, ignore_errors=True)
+            raise
+        with self._lock:
+            self._gravar_ponteiro(nome)
+            anterior, self._geracao = self._geracao, geracao
+            snapshot = self._publicar()
+        # Arquivos da geração anterior saem do disco quando o último snapshot dela é descartado
+        weakref.finalize(anterior, shutil.rmtree, anterior.caminho, True)
+        return snapshot
+
+    def replace(self, blocos):
+        """Publica uma nova versão apenas com o conteúdo dos blocos informados."""
+        return self._trocar(blocos)
+
+    def clear(self):
+        """Publica uma nova versão vazia."""
+        return self._trocar(())
@@ -0,0 +1,41 @@
+"""
+Importação sob demanda dos módulos pesados (pandas, numpy, plotly): o
+módulo só é importado no primeiro acesso a um atributo, reduzindo o tempo
+de inicialização de páginas que não chegam a usá-los.
+"""
+import importlib
+import sys
+from config import INICIALIZACAO_CONFIG
+
+class LazyModule:
+    """Substituto do módulo até o primeiro uso.
+
+    Não é registrado em sys.modules: varreduras de sys.modules (ex.: inspect,
+    feita pelo Streamlit no primeiro elemento) não disparam a importação.
+    """
+
+    def __init__(self, nome):
+        self._nome = nome
+        self._modulo = None
+
+    def _carregar(self):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nome)
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._carregar(), atributo)
+
+    def __repr__(self):
+        estado = 'carregado' if self._modulo is not None else 'sob demanda'
+        return f"<módulo {self._nome} ({estado})>"
+
+def lazy_import(nome):
+    """Retorna o módulo `nome`, importado apenas no primeiro uso."""
+    if nome in sys.modules or not INICIALIZACAO_CONFIG['importacao_sob_demanda']:
+        return importlib.import_module(nome)
+    return LazyModule(nome)
+
+def is_loaded(nome):
+    """Indica se o módulo já foi importado."""
+    return nome in sys.modules
@@ -0,0 +1,272 @@
+"""
+Substituto local do cliente Supabase (SQLite) para desenvolvimento,
+verificação e benchmarks. Implementa o subconjunto da API usado pelo
+DatabaseManager e permite injetar latência e falhas.
+"""
+import sqlite3
+import threading
+import time
+
+COLUNAS_FATURAMENTO = ['nome', 'cpf_cnpj', 'total', 'taxa', 'situacao', 'paga_com', 'data_criacao', 'data_pagamento']
+
+_SCHEMA = """
+create table if not exists {tabela} (
+    id integer primary key autoincrement,
+    created_at text default (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    nome text,
+    cpf_cnpj text,
+    total real,
+    taxa real,
+    situacao text,
+    paga_com text,
+    data_criacao text,
+    data_pagamento text
+)
+"""
+
+# Quarentena guarda os valores originais como texto (sql/faturamento_quarentena.sql)
+_SCHEMA_QUARENTENA = """
+create table if not exists faturamento_quarentena (
+    id integer primary key autoincrement,
+    created_at text default (strftime('%Y-%m-%dT%H:%M:%f', 'now')),
+    nome text,
+    cpf_cnpj text,
+    total text,
+    taxa text,
+    situacao text,
+    paga_com text,
+    data_criacao text,
+    data_pagamento text,
+    motivos text not null
+)
+"""
+
+COLUNAS_TABELA = {
+    'faturamento': COLUNAS_FATURAMENTO,
+    'faturamento_staging': COLUNAS_FATURAMENTO,
+    'faturamento_quarentena': COLUNAS_FATURAMENTO + ['motivos']
+}
+
+class FuncaoInexistente(RuntimeError):
+    """Função RPC não instalada, com o mesmo código de erro do PostgREST."""
+    code = 'PGRST202'
+
+class LocalResult:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class LocalQuery:
+    def __init__(self, client, tabela):
+        self.client = client
+        self.tabela = tabela
+        self.operacao = 'select'
+        self.colunas = '*'
+        self.count = None
+        self.registros = None
+        self.filtros = []
+        self.ordem = []
+        self.limite = None
+        self.offset = None
+
+    def select(self, colunas='*', count=None):
+        self.operacao = 'select'
+        self.colunas = colunas
+        self.count = count
+        return self
+
+    def insert(self, registros):
+        self.operacao = 'insert'
+        self.registros = registros if isinstance(registros, list) else [registros]
+        return self
+
+    def delete(self):
+        self.operacao = 'delete'
+        return self
+
+    def _filtro(self, coluna, operador, valor):
+        self.filtros.append((coluna, operador, valor))
+        return self
+
+    def eq(self, coluna, valor):
+        return self._filtro(coluna, '=', valor)
+
+    def neq(self, coluna, valor):
+        return self._filtro(coluna, '!=', valor)
+
+    def gt(self, coluna, valor):
+        return self._filtro(coluna, '>', valor)
+
+    def gte(self, coluna, valor):
+        return self._filtro(coluna, '>=', valor)
+
+    def lt(self, coluna, valor):
+        return self._filtro(coluna, '<', valor)
+
+    def lte(self, coluna, valor):
+        return self._filtro(coluna, '<=', valor)
+
+    def is_(self, coluna, valor):
+        # Apenas 'null' (como no PostgREST: is.null)
+        self.filtros.append((coluna, 'is', None))
+        return self
+
+    def order(self, coluna, desc=False, nullsfirst=None):
+        nulos = '' if nullsfirst is None else (' nulls first' if nullsfirst else ' nulls last')
+        self.ordem.append(f"{coluna} {'desc' if desc else 'asc'}{nulos}")
+        return self
+
+    def limit(self, n):
+        self.limite = n
+        return self
+
+    def range(self, inicio, fim):
+        self.offset = inicio
+        self.limite = fim - inicio + 1
+        return self
+
+    def _where(self):
+        if not self.filtros:
+            return '', []
+        clausulas = [f"{coluna} is null" if operador == 'is' else f"{coluna} {operador} ?"
+                     for coluna, operador, _ in self.filtros]
+        return ' where ' + ' and '.join(clausulas), [valor for _, operador, valor in self.filtros if operador != 'is']
+
+    def execute(self):
+        return self.client._execute(self)
+
+class LocalSupabaseClient:
+    def __init__(self, caminho=':memory:', latencia=0.0):
+        # latencia: atraso (segundos) aplicado a cada requisição, fora do lock
+        self.latencia = latencia
+        # fora_do_ar: toda requisição falha (após a latência), como um backend indisponível
+        self.fora_do_ar = False
+        self.requisicoes = 0
+        self._falhas = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        for tabela in ['faturamento', 'faturamento_staging']:
+            self._conn.execute(_SCHEMA.format(tabela=tabela))
+        self._conn.execute(_SCHEMA_QUARENTENA)
+
+    def table(self, nome):
+        return LocalQuery(self, nome)
+
+    def falhar(self, operacao, tabela, apos=0):
+        """Faz a próxima `operacao` em `tabela` falhar após `apos` chamadas bem-sucedidas."""
+        self._falhas[(operacao, tabela)] = apos
+
+    def _checar_falha(self, operacao, tabela):
+        if self.fora_do_ar:
+            raise ConnectionError(f"Backend fora do ar: {operacao} em {tabela}")
+        chave = (operacao, tabela)
+        if chave in self._falhas:
+            if self._falhas[chave] <= 0:
+                del self._falhas[chave]
+                raise RuntimeError(f"Falha injetada: {operacao} em {tabela}")
+            self._falhas[chave] -= 1
+
+    def _execute(self, query):
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.requisicoes += 1
+            self._checar_falha(query.operacao, query.tabela)
+            where, params = query._where()
+
+            if query.operacao == 'insert':
+                colunas = [col for col in COLUNAS_TABELA[query.tabela] if any(col in r for r in query.registros)]
+                sql = f"insert into {query.tabela} ({','.join(colunas)}) values ({','.join('?' * len(colunas))})"
+                self._conn.execute('begin')
+                try:
+                    self._conn.executemany(sql, [[r.get(col) for col in colunas] for r in query.registros])
+                    self._conn.execute('commit')
+                except Exception:
+                    self._conn.execute('rollback')
+                    raise
+                return LocalResult(query.registros)
+
+            if query.operacao == 'delete':
+                cursor = self._conn.execute(f"delete from {query.tabela}{where}", params)
+                return LocalResult([], cursor.rowcount)
+
+            if query.colunas.strip() == 'count':
+                total = self._conn.execute(f"select count(*) from {query.tabela}{where}", params).fetchone()[0]
+                return LocalResult([{'count': total}])
+
+            sql = f"select {query.colunas} from {query.tabela}{where}"
+            if query.ordem:
+                sql += ' order by ' + ', '.join(query.ordem)
+            if query.limite is not None:
+                sql += f" limit {int(query.limite)} offset {int(query.offset or 0)}"
+            cursor = self._conn.execute(sql, params)
+            nomes = [d[0] for d in cursor.description]
+            data = [dict(zip(nomes, linha)) for linha in cursor.fetchall()]
+
+            count = None
+            if query.count == 'exact':
+                count = self._conn.execute(f"select count(*) from {query.tabela}{where}", params).fetchone()[0]
+            return LocalResult(data, count)
+
+    def rpc(self, nome, params=None):
+        return _LocalRpc(self, nome, params or {})
+
+    def _rpc(self, nome, params):
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.requisicoes += 1
+            self._checar_falha('rpc', nome)
+            funcao = getattr(self, f"_rpc_{nome}", None)
+            if funcao is None:
+                raise FuncaoInexistente(f"Função RPC inexistente: {nome}")
+            return LocalResult(funcao(**params))
+
+    # Equivalentes das funções em sql/
+
+    def _rpc_faturamento_metadata(self):
+        conn = self._conn
+        distintos = {}
+        nulos = {}
+        for col in ['situacao', 'paga_com']:
+            distintos[col] = [v for (v,) in conn.execute(
+                f"select distinct {col} from faturamento where coalesce({col}, '') <> ''"
+            )]
+            nulos[col] = conn.execute(
+                f"select exists(select 1 from faturamento where coalesce({col}, '') = '')"
+            ).fetchone()[0] == 1
+        total, ultima = conn.execute("select count(*), max(created_at) from faturamento").fetchone()
+        return {
+            'total_records': total,
+            'last_update': ultima,
+            'distinct': distintos,
+            'nulls': nulos
+        }
+
+    def _rpc_reset_faturamento_staging(self):
+        self._conn.execute("delete from faturamento_staging")
+        return None
+
+    def _rpc_swap_faturamento_staging(self):
+        colunas = ','.join(['created_at'] + COLUNAS_FATURAMENTO)
+        conn = self._conn
+        conn.execute('begin')
+        try:
+            conn.execute("delete from faturamento where true")
+            conn.execute(f"insert into faturamento ({colunas}) select {colunas} from faturamento_staging")
+            conn.execute("delete from faturamento_staging")
+            total = conn.execute("select count(*) from faturamento").fetchone()[0]
+            conn.execute('commit')
+        except Exception:
+            conn.execute('rollback')
+            raise
+        return total
+
+class _LocalRpc:
+    def __init__(self, client, nome, params):
+        self.client = client
+        self.nome = nome
+        self.params = params
+
+    def execute(self):
+        return self.client._rpc(self.nome, self.params)
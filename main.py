@@ -1,11 +1,21 @@
 import streamlit as st
-import pandas as pd
+import json
+import os
+import shutil
+import tempfile
+import backup
 from database import DatabaseManager
 from data_processor import DataProcessor
 from metrics_calculator import MetricsCalculator
 from visualizations import Visualizations
 from ui_components import UIComponents
-from utils import formatar_moeda, get_ordem_faixas
+from projection import colunas_necessarias
+from precompute import Artefatos
+from config import PRECOMPUTACAO_CONFIG, LEITURA_CONFIG, CONCENTRACAO_CONFIG
+from time_buckets import GRANULARIDADES
+from payment_timing import DIMENSOES as DIMENSOES_PRAZO
+from upload_reader import ler_upload, FORMATOS_UPLOAD
+from utils import formatar_moeda, formatar_bytes
 from datetime import datetime, timedelta
 
 # Configuração da página
@@ -21,6 +31,32 @@ st.set_page_config(
 def init_database():
     return DatabaseManager()
 
+# Seções do dashboard
+SECOES = {
+    'visao_geral': '📈 Visão Geral',
+    'faixa': '🏆 Faixas de Cliente',
+    'ranking': '🥇 Ranking',
+    'status': '📊 Evolução por Status',
+    'visuais': '🥧 Análises Visuais',
+    'prazos': '⏱️ Prazos de Pagamento',
+    'detalhes': '📋 Dados Detalhados'
+}
+
+# Colunas declaradas por seção do dashboard (projeção na carga)
+COLUNAS_SECOES = {
+    'visao_geral': colunas_necessarias(
+        MetricsCalculator.calculate_basic_kpis,
+        MetricsCalculator.calculate_valores_por_situacao,
+        MetricsCalculator.calculate_advanced_metrics
+    ),
+    'faixa': colunas_necessarias(DataProcessor.get_ltv_por_cliente, ['Data de criação']),
+    'ranking': colunas_necessarias(MetricsCalculator.calculate_ranking_clientes, ['Nome']),
+    'status': ['Data de criação', 'Total', 'Situação'],
+    'visuais': ['Situação', 'Paga com'],
+    'prazos': ['CPF/CNPJ', 'Total', 'Situação', 'Paga com', 'Data de criação', 'Data do pagamento'],
+    'detalhes': ['Nome', 'CPF/CNPJ', 'Total', 'Taxa', 'Situação', 'Paga com', 'Data de criação', 'Data do pagamento']
+}
+
 # CSS personalizado
 st.markdown("""
 <style>
@@ -55,6 +91,8 @@ st.sidebar.header("💾 Gerenciamento de Dados")
 if db.test_connection():
     if db.mode == "supabase":
         st.sidebar.success("✅ Conectado ao Supabase")
+    elif db.mode == "disco":
+        st.sidebar.success("✅ Dataset em disco (fora da memória)")
     else:
         st.sidebar.warning("⚠️ Modo Memória (dados temporários)")
     
@@ -63,6 +101,11 @@ if db.test_connection():
     if stats:
         st.sidebar.metric("📊 Total de Registros", stats.get('total_records', 0))
         st.sidebar.info(f"🔧 Modo: {stats.get('mode', 'Unknown')}")
+        if 'memoria_compartilhada' in stats:
+            st.sidebar.info(
+                f"🧠 Versão {stats['versao']} ({stats['versoes_ativas']} ativas) · "
+                f"compartilhada: {formatar_bytes(stats['memoria_compartilhada'])}"
+            )
         if stats.get('last_update'):
             try:
                 last_update = datetime.fromisoformat(stats['last_update'].replace('Z', '+00:00'))
@@ -76,11 +119,15 @@ st.sidebar.markdown("---")
 
 # Upload de novos dados
 st.sidebar.subheader("📁 Upload de Dados")
-uploaded_file = st.sidebar.file_uploader("Carregar CSV", type=['csv'])
+uploaded_file = st.sidebar.file_uploader("Carregar arquivo (CSV, Parquet ou Excel)", type=list(FORMATOS_UPLOAD))
+
+# Aviso da última carga (sobrevive ao st.rerun após salvar)
+if 'aviso_quarentena' in st.session_state:
+    st.sidebar.warning(st.session_state.pop('aviso_quarentena'))
 
 if uploaded_file:
     try:
-        new_df = pd.read_csv(uploaded_file)
+        new_df = ler_upload(uploaded_file)
         st.sidebar.success(f"✅ {len(new_df)} registros no arquivo")
         
         # Preview dos dados
@@ -95,21 +142,29 @@ if uploaded_file:
                     result = db.insert_faturamento(new_df)
                     if result:
                         st.success(f"✅ {result} registros salvos!")
+                        if result < len(new_df):
+                            st.session_state.aviso_quarentena = f"⚠️ {len(new_df) - result} registros do arquivo foram para a quarentena"
                         st.rerun()
-                    else:
+                    elif result is False:
                         st.error("❌ Erro ao salvar!")
+                    else:
+                        st.error("❌ Nenhum registro válido no arquivo!")
         
         with col2:
-            if st.button("🔄 Substituir Dados"):
-                if st.checkbox("⚠️ Confirmar substituição"):
-                    with st.spinner("Substituindo dados..."):
-                        db.delete_all_data()
-                        result = db.insert_faturamento(new_df)
-                        if result:
-                            st.success(f"✅ Dados substituídos! {result} registros")
-                            st.rerun()
-                        else:
-                            st.error("❌ Erro na substituição!")
+            # Confirmação antes do botão: o clique só substitui com ela marcada
+            confirmado = st.checkbox("⚠️ Confirmar substituição", key='confirmar_substituicao')
+            if st.button("🔄 Substituir Dados", disabled=not confirmado):
+                with st.spinner("Substituindo dados..."):
+                    result = db.replace_faturamento(new_df)
+                    if result:
+                        st.success(f"✅ Dados substituídos! {result} registros")
+                        if result < len(new_df):
+                            st.session_state.aviso_quarentena = f"⚠️ {len(new_df) - result} registros do arquivo foram para a quarentena"
+                        # A confirmação vale para uma substituição
+                        st.session_state.pop('confirmar_substituicao', None)
+                        st.rerun()
+                    else:
+                        st.error("❌ Erro na substituição!")
     
     except Exception as e:
         st.sidebar.error(f"❌ Erro ao ler arquivo: {str(e)}")
@@ -118,202 +173,452 @@ st.sidebar.markdown("---")
 
 # Gerenciamento avançado
 with st.sidebar.expander("⚙️ Gerenciamento Avançado"):
-    if st.button("🗑️ Limpar Todos os Dados", type="secondary"):
-        if st.checkbox("⚠️ CONFIRMO que quero apagar TODOS os dados"):
-            if db.delete_all_data():
-                st.success("🗑️ Todos os dados foram removidos!")
-                st.rerun()
-            else:
-                st.error("❌ Erro ao limpar dados!")
+    confirmado = st.checkbox("⚠️ CONFIRMO que quero apagar TODOS os dados", key='confirmar_limpeza')
+    if st.button("🗑️ Limpar Todos os Dados", type="secondary", disabled=not confirmado):
+        if db.delete_all_data():
+            st.success("🗑️ Todos os dados foram removidos!")
+            st.session_state.pop('confirmar_limpeza', None)
+            st.rerun()
+        else:
+            st.error("❌ Erro ao limpar dados!")
+    
+    st.markdown("---")
+    st.markdown("**📦 Backup**")
+    formato_backup = st.selectbox("Formato do backup", list(backup.FORMATOS))
+    if st.button("📦 Gerar Backup"):
+        with st.spinner("Gerando backup..."):
+            caminho_backup, manifesto = db.backup_data(formato_backup)
+        if caminho_backup:
+            if 'ultimo_backup' in st.session_state:
+                # Apenas o último backup da sessão fica em disco
+                backup.remove_backup(st.session_state.ultimo_backup[0])
+            st.session_state.ultimo_backup = (caminho_backup, manifesto)
+        else:
+            st.info("📝 Nenhum dado para backup.")
+    
+    if 'ultimo_backup' in st.session_state:
+        caminho_backup, manifesto = st.session_state.ultimo_backup
+        try:
+            with open(caminho_backup, 'rb') as arquivo_backup:
+                st.caption(f"{manifesto['linhas']} registros · {manifesto['bytes'] / 1024:.1f} KB · sha256 {manifesto['sha256'][:12]}…")
+                st.download_button("⬇️ Baixar Backup", arquivo_backup, file_name=manifesto['arquivo'])
+            st.download_button(
+                "⬇️ Baixar Manifesto",
+                json.dumps(manifesto, ensure_ascii=False, indent=2),
+                file_name=f"{manifesto['arquivo']}.manifest.json"
+            )
+        except OSError:
+            # Arquivo removido (limpeza do diretório temporário): gerar de novo
+            del st.session_state.ultimo_backup
+            st.warning("⚠️ O arquivo do último backup não está mais disponível. Gere o backup novamente.")
+    
+    st.markdown("**♻️ Restaurar Backup**")
+    arquivo_restore = st.file_uploader("Arquivo de backup", type=['parquet', 'gz'])
+    manifesto_restore = st.file_uploader("Manifesto", type=['json'])
+    # A restauração substitui todos os dados (troca atômica): confirmação antes do botão
+    confirmado = st.checkbox("⚠️ Confirmar restauração (substitui todos os dados)", key='confirmar_restauracao')
+    if arquivo_restore and manifesto_restore and st.button("♻️ Restaurar", disabled=not confirmado):
+        manifesto = json.load(manifesto_restore)
+        with tempfile.NamedTemporaryFile(suffix=backup.FORMATOS[manifesto['formato']], delete=False) as destino:
+            shutil.copyfileobj(arquivo_restore, destino)
+        with st.spinner("Restaurando backup..."):
+            result = db.restore_data(destino.name, manifesto)
+        os.remove(destino.name)
+        if result is not False:
+            st.success(f"✅ {result} registros restaurados!")
+            if result != manifesto['linhas']:
+                # Linhas reprovadas na validação: restauração parcial não passa por completa
+                st.session_state.aviso_quarentena = (
+                    f"⚠️ {result} de {manifesto['linhas']} registros do backup restaurados; "
+                    f"os demais foram para a quarentena"
+                )
+            st.session_state.pop('confirmar_restauracao', None)
+            st.rerun()
+    
+    st.markdown("---")
+    st.markdown("**🚫 Quarentena**")
+    # Consulta apenas sob demanda: a quarentena não faz parte do caminho de leitura do dashboard
+    if st.checkbox("Mostrar registros em quarentena"):
+        total_quarentena = db.count_quarentena()
+        if total_quarentena:
+            quarentena = db.get_quarentena(limite=1000)
+            st.caption(f"{total_quarentena} registros reprovados na validação (exibindo até {len(quarentena)})")
+            st.dataframe(quarentena, hide_index=True)
+            st.download_button(
+                "⬇️ Baixar Quarentena",
+                quarentena.to_csv(index=False),
+                file_name="quarentena_faturamento.csv"
+            )
+            if st.button("🧹 Limpar Quarentena"):
+                if db.clear_quarentena():
+                    st.rerun()
+        else:
+            st.caption("Nenhum registro em quarentena.")
 
-# Carregar dados do banco
-try:
-    with st.spinner("Carregando dados do banco..."):
-        df = db.get_all_faturamento()
+# Artefatos calculados na sessão quando o pré-cálculo em segundo plano não está disponível.
+# Sessões simultâneas com a mesma chave esperam pelo mesmo cálculo (lock por chave do cache) e a
+# busca no Supabase é compartilhada com as outras seções e com o pré-cálculo da mesma versão.
+@st.cache_resource(show_spinner=False, max_entries=8)
+def artefatos_locais(versao, colunas):
+    if db.mode == "disco":
+        # Fora da memória: reduções em lotes sobre o dataset, sem materializá-lo
+        return db.precompute.build()
+    df = db.get_all_faturamento(list(colunas))
+    if df.empty:
+        return None
+    return Artefatos(versao, DataProcessor(df))
+
+@st.fragment(run_every=PRECOMPUTACAO_CONFIG['intervalo_verificacao_segundos'])
+def aviso_atualizacao(versao):
+    """Enquanto a nova versão é calculada, mantém a anterior e troca quando ficar pronta."""
+    if db.precompute.pending():
+        st.info("⏳ Calculando métricas da nova versão dos dados; exibindo a versão anterior.")
+        return
+    publicados = db.get_precomputed()
+    if publicados is None or publicados.versao != versao:
+        st.rerun()
+
+@st.fragment(run_every=LEITURA_CONFIG['intervalo_revalidacao_segundos'])
+def indicador_frescor(versao):
+    """Selo de idade dos dados exibidos quando não são os da versão atual (backend lento ou fora do ar)."""
+    db.revalidate()
+    artefatos = db.get_precomputed()
+    if (artefatos.versao if artefatos is not None else None) != versao:
+        # Recarga concluída em segundo plano
+        st.rerun()
+    if artefatos is None:
+        return
+    frescor = db.get_freshness(artefatos)
+    if not frescor['desatualizado']:
+        return
+    idade = datetime.now() - frescor['carregado_em']
+    minutos = int(idade.total_seconds() // 60)
+    st.warning(
+        f"🕒 Exibindo dados de {frescor['carregado_em'].strftime('%d/%m/%Y %H:%M')} "
+        f"(há {minutos} min): {frescor['motivo']}."
+    )
+
+def seletor_granularidade(key):
+    """Granularidade dos gráficos de evolução (chaves de período já calculadas por linha)."""
+    return st.radio(
+        "📅 Granularidade temporal:",
+        list(GRANULARIDADES),
+        index=list(GRANULARIDADES).index('mes'),
+        format_func=lambda g: GRANULARIDADES[g]['rotulo'],
+        horizontal=True,
+        key=key
+    )
+
+def formatar_concentracao(tabela):
+    """Tabela de concentração (maiores clientes, Gini e HHI) formatada para exibição."""
+    tabela = tabela[['Clientes', 'Faturamento', 'Pct_Maior_Cliente', 'Pct_Top_Clientes', 'Gini', 'HHI', 'Risco']].copy()
+    tabela['Faturamento'] = tabela['Faturamento'].apply(formatar_moeda)
+    for col in ['Pct_Maior_Cliente', 'Pct_Top_Clientes']:
+        tabela[col] = tabela[col].apply(lambda x: f"{x:.1f}%")
+    tabela['Gini'] = tabela['Gini'].apply(lambda x: f"{x:.3f}")
+    tabela['HHI'] = tabela['HHI'].apply(lambda x: f"{x:,.0f}".replace(',', '.'))
+    return tabela.rename(columns={
+        'Pct_Maior_Cliente': 'Maior Cliente',
+        'Pct_Top_Clientes': f"Top {CONCENTRACAO_CONFIG['top_clientes']}"
+    })
+
+# Seções do dashboard: cada uma é um fragmento que reexecuta sozinho quando seus widgets mudam
+@st.fragment
+def secao_visao_geral(artefatos):
+    kpis, valores_situacao, advanced_metrics = artefatos.visao_geral()
+    ui.display_basic_kpis(kpis)
+    ui.display_valores_situacao(valores_situacao)
+    ui.display_advanced_metrics(advanced_metrics)
+
+@st.fragment
+def secao_faixa(artefatos):
+    viz = Visualizations()
+    st.header("🏆 Análise por Faixa de Cliente (LTV)")
     
-    if not df.empty:
-        st.success(f"✅ {len(df)} registros carregados do banco de dados!")
-        
-        # Debug: mostrar colunas disponíveis
-        with st.expander("🔍 Debug - Colunas disponíveis"):
-            st.write("Colunas no DataFrame:", list(df.columns))
-            st.write("Primeiras linhas:")
-            st.dataframe(df.head())
-        
-        # Processar dados
-        processor = DataProcessor(df)
-        df = processor.df
-        
-        # Inicializar componentes de análise
-        calculator = MetricsCalculator(df)
-        viz = Visualizations()
-        
-        # Calcular LTV por cliente
-        ltv_por_cliente = processor.get_ltv_por_cliente()
-        
-        # **DASHBOARD PRINCIPAL - TODOS OS GRÁFICOS E INDICADORES**
-        
-        # Exibir KPIs principais
-        kpis = calculator.calculate_basic_kpis()
-        ui.display_basic_kpis(kpis)
-        
-        # Exibir valores por situação
-        valores_situacao = calculator.calculate_valores_por_situacao()
-        ui.display_valores_situacao(valores_situacao)
-        
-        # Exibir métricas avançadas
-        advanced_metrics = calculator.calculate_advanced_metrics()
-        ui.display_advanced_metrics(advanced_metrics)
-        
-        # Análise por Faixa de Cliente
-        st.header("🏆 Análise por Faixa de Cliente (LTV)")
+    ltv_por_cliente = artefatos.ltv_por_cliente()
+    if ltv_por_cliente.empty:
+        st.warning("⚠️ Não foi possível calcular LTV por cliente. Verifique se existem dados com situação 'Paga'.")
+        return
+    
+    # Calcular estatísticas por faixa
+    faixa_stats = artefatos.faixa_stats()
+    if faixa_stats.empty:
+        return
+    
+    # Exibir resumo por faixa
+    ui.display_faixa_summary(faixa_stats)
+    
+    # Gráficos de faixa
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig_pizza = viz.create_faixa_pizza_chart(faixa_stats)
+        st.plotly_chart(fig_pizza, use_container_width=True)
+    
+    with col2:
+        fig_bar = viz.create_faixa_bar_chart(faixa_stats)
+        st.plotly_chart(fig_bar, use_container_width=True)
+    
+    # Evolução por faixa na granularidade escolhida
+    granularidade = seletor_granularidade('granularidade_faixa')
+    st.subheader(f"📈 Evolução por Faixa de Cliente ({GRANULARIDADES[granularidade]['rotulo']})")
+    
+    if GRANULARIDADES[granularidade]['coluna'] not in artefatos.colunas:
+        st.warning("⚠️ Colunas de período não encontradas. Verifique o processamento de datas.")
+        return
+    
+    evolucao_mensal = artefatos.evolucao_faixa(granularidade)
+    if not evolucao_mensal.empty:
+        fig_evolucao = viz.create_evolucao_mensal_chart(evolucao_mensal)
+        st.plotly_chart(fig_evolucao, use_container_width=True)
+        
+        # Tabela de evolução
+        pivot_evolucao = evolucao_mensal.pivot(
+            index='Periodo_Str', 
+            columns='Faixa_Cliente', 
+            values='Total'
+        ).fillna(0)
+        st.write("📋 **Tabela de Evolução:**")
+        st.dataframe(pivot_evolucao.round(2), use_container_width=True)
+
+@st.fragment
+def secao_ranking(artefatos):
+    viz = Visualizations()
+    st.header("🏆 Ranking de Clientes por Valor")
+    
+    ranking_clientes = artefatos.ranking()
+    
+    if ranking_clientes.empty:
+        st.warning("⚠️ Não foi possível calcular ranking de clientes.")
+        return
+    
+    total_geral = ranking_clientes['Valor_Total'].sum()
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.subheader("🥇 Top 20 Clientes")
         
-        if not ltv_por_cliente.empty:
-            # Calcular estatísticas por faixa
-            faixa_stats = calculator.calculate_faixa_stats(ltv_por_cliente)
-            
-            if not faixa_stats.empty:
-                # Ordenar por importância
-                ordem_faixas = get_ordem_faixas()
-                faixa_stats = faixa_stats.reindex(ordem_faixas)
-                
-                # Exibir resumo por faixa
-                ui.display_faixa_summary(faixa_stats)
-                
-                # Gráficos de faixa
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    fig_pizza = viz.create_faixa_pizza_chart(faixa_stats)
-                    st.plotly_chart(fig_pizza, use_container_width=True)
-                
-                with col2:
-                    fig_bar = viz.create_faixa_bar_chart(faixa_stats)
-                    st.plotly_chart(fig_bar, use_container_width=True)
-                
-                # Evolução mensal por faixa
-                st.subheader("📈 Evolução Mensal por Faixa de Cliente")
-                
-                if 'Mes_Ano' in df.columns:
-                    df_com_faixa = processor.get_df_com_faixa(ltv_por_cliente)
-                    
-                    if not df_com_faixa.empty:
-                        evolucao_mensal = df_com_faixa.groupby(['Mes_Ano', 'Faixa_Cliente'])['Total'].sum().reset_index()
-                        evolucao_mensal['Mes_Ano_Str'] = evolucao_mensal['Mes_Ano'].astype(str)
-                        
-                        fig_evolucao = viz.create_evolucao_mensal_chart(evolucao_mensal)
-                        st.plotly_chart(fig_evolucao, use_container_width=True)
-                        
-                        # Tabela de evolução
-                        pivot_evolucao = evolucao_mensal.pivot(
-                            index='Mes_Ano_Str', 
-                            columns='Faixa_Cliente', 
-                            values='Total'
-                        ).fillna(0)
-                        st.write("📋 **Tabela de Evolução Mensal:**")
-                        st.dataframe(pivot_evolucao.round(2), use_container_width=True)
-                else:
-                    st.warning("⚠️ Coluna 'Mes_Ano' não encontrada. Verifique o processamento de datas.")
-        else:
-            st.warning("⚠️ Não foi possível calcular LTV por cliente. Verifique se existem dados com situação 'Paga'.")
+        # Formatação para exibição
+        ranking_display = ranking_clientes.head(20).copy()
+        ranking_display['Valor_Total'] = ranking_display['Valor_Total'].apply(formatar_moeda)
+        ranking_display['Percentual'] = ranking_display['Percentual'].apply(lambda x: f"{x:.2f}%")
+        ranking_display['Percentual_Acumulado'] = ranking_display['Percentual_Acumulado'].apply(lambda x: f"{x:.2f}%")
         
-        # Ranking de Clientes
-        st.header("🏆 Ranking de Clientes por Valor")
+        # Renomear colunas para exibição
+        ranking_display = ranking_display[['Nome', 'Valor_Total', 'Percentual', 'Percentual_Acumulado', 'Num_Transacoes', 'Faixa']]
+        ranking_display.columns = ['Cliente', 'Valor Total', '% Individual', '% Acumulado', 'Transações', 'Faixa']
         
-        ranking_clientes = calculator.calculate_ranking_clientes()
+        st.dataframe(ranking_display, use_container_width=True, hide_index=True)
+    
+    concentracao = artefatos.concentracao()
+    
+    with col2:
+        ui.display_ranking_analysis(ranking_clientes, total_geral, concentracao)
+    
+    # Gráfico de Pareto
+    st.subheader("📈 Análise de Pareto - Concentração de Clientes")
+    
+    pareto_data = ranking_clientes.head(30)
+    fig_pareto = viz.create_pareto_chart(pareto_data)
+    st.plotly_chart(fig_pareto, use_container_width=True)
+    
+    # Concentração sobre todos os clientes
+    st.subheader("📉 Curva de Lorenz e Concentração")
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        fig_lorenz = viz.create_lorenz_chart(concentracao['lorenz'])
+        st.plotly_chart(fig_lorenz, use_container_width=True)
+    
+    with col2:
+        st.write("🏆 **Por faixa de cliente:**")
+        st.dataframe(formatar_concentracao(concentracao['por_faixa']), use_container_width=True)
+    
+    if concentracao['por_mes'] is not None and not concentracao['por_mes'].empty:
+        st.write("📅 **Por mês:**")
+        st.dataframe(formatar_concentracao(concentracao['por_mes']), use_container_width=True)
+
+@st.fragment
+def secao_status(artefatos):
+    viz = Visualizations()
+    colunas = artefatos.colunas
+    granularidade = seletor_granularidade('granularidade_status')
+    st.header(f"📊 Evolução por Status ({GRANULARIDADES[granularidade]['rotulo']})")
+    
+    if GRANULARIDADES[granularidade]['coluna'] in colunas and 'Total' in colunas and 'Situação' in colunas:
+        df_mensal_status = artefatos.evolucao_status(granularidade)
         
-        if not ranking_clientes.empty:
-            total_geral = ranking_clientes['Valor_Total'].sum()
-            
-            col1, col2 = st.columns([2, 1])
-            
-            with col1:
-                st.subheader("🥇 Top 20 Clientes")
-                
-                # Formatação para exibição
-                ranking_display = ranking_clientes.head(20).copy()
-                ranking_display['Valor_Total'] = ranking_display['Valor_Total'].apply(formatar_moeda)
-                ranking_display['Percentual'] = ranking_display['Percentual'].apply(lambda x: f"{x:.2f}%")
-                ranking_display['Percentual_Acumulado'] = ranking_display['Percentual_Acumulado'].apply(lambda x: f"{x:.2f}%")
-                
-                # Renomear colunas para exibição
-                ranking_display = ranking_display[['Nome', 'Valor_Total', 'Percentual', 'Percentual_Acumulado', 'Num_Transacoes', 'Faixa']]
-                ranking_display.columns = ['Cliente', 'Valor Total', '% Individual', '% Acumulado', 'Transações', 'Faixa']
-                
-                st.dataframe(ranking_display, use_container_width=True, hide_index=True)
-            
-            with col2:
-                ui.display_ranking_analysis(ranking_clientes, total_geral)
-            
-            # Gráfico de Pareto
-            st.subheader("📈 Análise de Pareto - Concentração de Clientes")
-            
-            pareto_data = ranking_clientes.head(30)
-            fig_pareto = viz.create_pareto_chart(pareto_data)
-            st.plotly_chart(fig_pareto, use_container_width=True)
+        fig_mensal = viz.create_evolucao_status_chart(df_mensal_status)
+        st.plotly_chart(fig_mensal, use_container_width=True)
+    else:
+        st.warning("⚠️ Dados insuficientes para evolução por status.")
+
+@st.fragment
+def secao_visuais(artefatos):
+    viz = Visualizations()
+    colunas = artefatos.colunas
+    st.header("📊 Análises Visuais")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if 'Situação' in colunas:
+            situacao_counts = artefatos.contagens('Situação')
+            fig_situacao = viz.create_situacao_pie_chart(situacao_counts)
+            st.plotly_chart(fig_situacao, use_container_width=True)
         else:
-            st.warning("⚠️ Não foi possível calcular ranking de clientes.")
-        
-        # Evolução Mensal por Status
-        st.header("📊 Evolução Mensal por Status")
-        
-        if 'Mes_Ano' in df.columns and 'Total' in df.columns and 'Situação' in df.columns:
-            df_mensal_status = df.groupby(['Mes_Ano', 'Situação'])['Total'].sum().reset_index()
-            df_mensal_status['Mes_Ano_Str'] = df_mensal_status['Mes_Ano'].astype(str)
-            
-            fig_mensal = viz.create_evolucao_status_chart(df_mensal_status)
-            st.plotly_chart(fig_mensal, use_container_width=True)
+            st.warning("⚠️ Coluna 'Situação' não encontrada.")
+    
+    with col2:
+        if 'Paga com' in colunas:
+            metodos_pagamento = artefatos.contagens('Paga com')
+            fig_pagamento = viz.create_pagamento_pie_chart(metodos_pagamento)
+            st.plotly_chart(fig_pagamento, use_container_width=True)
         else:
-            st.warning("⚠️ Dados insuficientes para evolução mensal por status.")
-        
-        # Análises Visuais
-        st.header("📊 Análises Visuais")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if 'Situação' in df.columns:
-                situacao_counts = df['Situação'].value_counts()
-                fig_situacao = viz.create_situacao_pie_chart(situacao_counts)
-                st.plotly_chart(fig_situacao, use_container_width=True)
-            else:
-                st.warning("⚠️ Coluna 'Situação' não encontrada.")
-        
-        with col2:
-            if 'Paga com' in df.columns:
-                metodos_pagamento = df['Paga com'].value_counts()
-                fig_pagamento = viz.create_pagamento_pie_chart(metodos_pagamento)
-                st.plotly_chart(fig_pagamento, use_container_width=True)
-            else:
-                st.warning("⚠️ Coluna 'Paga com' não encontrada.")
-        
-        # Dados Detalhados
-        st.header("📋 Dados Detalhados")
-        
-        col1, col2 = st.columns(2)
+            st.warning("⚠️ Coluna 'Paga com' não encontrada.")
+
+@st.fragment
+def secao_prazos(artefatos):
+    viz = Visualizations()
+    st.header("⏱️ Prazos de Pagamento")
+    
+    prazos = artefatos.prazos()
+    geral = prazos.resumo()
+    
+    if geral.empty:
+        st.warning("⚠️ Nenhuma transação paga com data de pagamento.")
+    else:
+        geral = geral.iloc[0]
+        col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            situacoes_disponiveis = ['Todas']
-            if 'Situação' in df.columns:
-                situacoes_disponiveis += list(df['Situação'].unique())
-            situacao_selecionada = st.selectbox("🔍 Filtrar por situação:", situacoes_disponiveis)
-        
+            st.metric("✅ Pagamentos", f"{int(geral['Qtd']):,}".replace(',', '.'))
         with col2:
-            metodos_disponiveis = ['Todos']
-            if 'Paga com' in df.columns:
-                metodos_disponiveis += list(df['Paga com'].unique())
-            metodo_selecionado = st.selectbox("🔍 Filtrar por método de pagamento:", metodos_disponiveis)
-        
-        # Aplicar filtros
-        df_filtrado = processor.apply_filters(situacao_selecionada, metodo_selecionado)
-        
-        if len(df_filtrado) != len(df):
-            st.info(f"📊 Exibindo {len(df_filtrado)} de {len(df)} registros (filtrados)")
-        
-        st.dataframe(df_filtrado.head(50), use_container_width=True)
+            st.metric("📅 Prazo Médio", f"{geral['Media_Dias']:.1f} dias")
+        with col3:
+            st.metric("⏱️ Prazo Mediano", f"{geral['Mediana_Dias']:.1f} dias")
+        with col4:
+            st.metric("🐢 90% Pagos Em Até", f"{geral['P90_Dias']:.1f} dias")
+        
+        dimensao = st.radio(
+            "📊 Distribuição por:",
+            list(DIMENSOES_PRAZO),
+            format_func=lambda d: DIMENSOES_PRAZO[d][1],
+            horizontal=True,
+            key='dimensao_prazos'
+        )
+        
+        fig_prazos = viz.create_prazo_pagamento_chart(prazos.histograma(dimensao))
+        st.plotly_chart(fig_prazos, use_container_width=True)
+        
+        resumo = prazos.resumo(dimensao)
+        resumo['Valor'] = resumo['Valor'].apply(formatar_moeda)
+        for coluna in ['Media_Dias', 'Mediana_Dias', 'P90_Dias']:
+            resumo[coluna] = resumo[coluna].apply(lambda x: f"{x:.1f}")
+        resumo.columns = ['Pagamentos', 'Valor', 'Prazo Médio (dias)', 'Mediana (dias)', 'P90 (dias)']
+        st.dataframe(resumo, use_container_width=True)
+    
+    # Aging dos valores em aberto
+    st.subheader("📆 Aging de Pendentes e Expirados")
+    aging = prazos.aging()
+    
+    if aging.empty:
+        st.success("✅ Nenhum valor pendente ou expirado.")
+    else:
+        fig_aging = viz.create_aging_chart(aging)
+        st.plotly_chart(fig_aging, use_container_width=True)
+
+@st.fragment
+def secao_detalhes(artefatos):
+    colunas = artefatos.colunas
+    st.header("📋 Dados Detalhados")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        situacoes_disponiveis = ['Todas']
+        if 'Situação' in colunas:
+            situacoes_disponiveis += db.get_unique_values('Situação')
+        situacao_selecionada = st.selectbox("🔍 Filtrar por situação:", situacoes_disponiveis)
+    
+    with col2:
+        metodos_disponiveis = ['Todos']
+        if 'Paga com' in colunas:
+            metodos_disponiveis += db.get_unique_values('Paga com')
+            if db.has_null_values('Paga com') and 'Não Informado' not in metodos_disponiveis:
+                metodos_disponiveis.append('Não Informado')
+        metodo_selecionado = st.selectbox("🔍 Filtrar por método de pagamento:", metodos_disponiveis)
+    
+    # Aplicar filtros
+    exibidos, total_filtrados = artefatos.filtrar(situacao_selecionada, metodo_selecionado, limite=50)
+    
+    if total_filtrados != artefatos.linhas:
+        st.info(f"📊 Exibindo {total_filtrados} de {artefatos.linhas} registros (filtrados)")
+    
+    st.dataframe(exibidos, use_container_width=True)
+    
+    if total_filtrados > 50:
+        st.info(f"Mostrando 50 de {total_filtrados} registros filtrados")
+
+# Carregar dados do banco
+try:
+    indisponivel = None
+    # Navegação: apenas a seção visível é exibida
+    secao = st.radio("📑 Seção:", list(SECOES), format_func=SECOES.get, horizontal=True)
+    
+    # Artefatos pré-calculados em segundo plano: a versão anterior fica visível até a nova ficar pronta
+    db.revalidate()
+    artefatos = db.get_precomputed()
+    if artefatos is None and db.precompute.pending():
+        with st.spinner("Calculando métricas..."):
+            db.precompute.wait(PRECOMPUTACAO_CONFIG['espera_inicial_segundos'])
+        artefatos = db.get_precomputed()
+    
+    if artefatos is not None:
+        if db.precompute.pending():
+            aviso_atualizacao(artefatos.versao)
+        elif db.precompute.erro is not None:
+            st.warning(f"⚠️ Falha ao atualizar as métricas: {db.precompute.erro}. Exibindo a última versão calculada.")
+        if db.mode == "supabase":
+            indicador_frescor(artefatos.versao)
+    elif db.mode == "supabase" and db.precompute.erro is not None:
+        # Nenhum snapshot bom ainda e o backend falhou: não é o mesmo que "sem dados"
+        indisponivel = db.precompute.erro
+    elif db.has_data():
+        # Sem pré-cálculo disponível: carregar apenas as colunas declaradas pela seção visível
+        with st.spinner("Carregando dados do banco..."):
+            artefatos = artefatos_locais(db.get_dataset_version(), COLUNAS_SECOES[secao])
+    
+    if indisponivel is not None:
+        st.error(f"❌ Não foi possível carregar os dados do Supabase: {indisponivel}")
+        st.info("🔄 Nova tentativa em segundo plano; o dashboard é exibido assim que a carga terminar.")
+        indicador_frescor(None)
+    elif artefatos is not None:
+        st.success(f"✅ {artefatos.linhas} registros carregados do banco de dados!")
         
-        if len(df_filtrado) > 50:
-            st.info(f"Mostrando 50 de {len(df_filtrado)} registros filtrados")
+        # Debug: mostrar colunas disponíveis
+        with st.expander("🔍 Debug - Colunas disponíveis"):
+            st.write("Colunas no DataFrame:", artefatos.colunas)
+            st.write("Primeiras linhas:")
+            st.dataframe(artefatos.amostra())
+        
+        # **DASHBOARD PRINCIPAL - SEÇÃO SELECIONADA**
+        if secao == 'visao_geral':
+            secao_visao_geral(artefatos)
+        elif secao == 'faixa':
+            secao_faixa(artefatos)
+        elif secao == 'ranking':
+            secao_ranking(artefatos)
+        elif secao == 'status':
+            secao_status(artefatos)
+        elif secao == 'visuais':
+            secao_visuais(artefatos)
+        elif secao == 'prazos':
+            secao_prazos(artefatos)
+        elif secao == 'detalhes':
+            secao_detalhes(artefatos)
         
     else:
         # Instruções quando não há dados
@@ -324,11 +629,11 @@ try:
             st.markdown("""
             ### 🚀 Como começar:
             
-            1. **📁 Upload**: Use a barra lateral para fazer upload do seu CSV
+            1. **📁 Upload**: Use a barra lateral para fazer upload do seu CSV, Parquet ou Excel
             2. **💾 Salvar**: Clique em "Salvar no Banco" para persistir os dados
             3. **📊 Analisar**: O dashboard será carregado automaticamente
             
-            ### 📋 Formato esperado do CSV:
+            ### 📋 Colunas esperadas no arquivo:
             - `Nome`: Nome do cliente
             - `CPF/CNPJ`: Documento do cliente  
             - `Total`: Valor da transação
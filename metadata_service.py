@@ -0,0 +1,169 @@
+"""
+Serviço de metadados do faturamento: dicionários de valores distintos,
+contagem de registros e data da última atualização.
+"""
+import threading
+import time
+from datetime import datetime
+from config import METADATA_CONFIG
+
+class MetadataService:
+    def __init__(self, loader=None, ttl=None, colunas=None, timeout=None):
+        # loader: função que devolve os metadados completos em uma única ida ao banco
+        self.loader = loader
+        self.ttl = METADATA_CONFIG['ttl_segundos'] if ttl is None else ttl
+        # timeout: espera máxima pela primeira leitura (None: sem limite)
+        self.timeout = timeout
+        self.colunas = list(colunas or METADATA_CONFIG['colunas_dicionario'])
+        self.erro = None  # erro da última recarga (os metadados anteriores continuam servidos)
+        self._lock = threading.Lock()
+        self._metadata = None
+        self._carregado_em = 0.0
+        self._recarga = None
+        self._geracao = 0  # muda a cada escrita local; recargas iniciadas antes dela são descartadas
+
+    def _vazio(self):
+        """Metadados de uma tabela vazia."""
+        return {
+            'total_records': 0,
+            'last_update': None,
+            'distinct': {col: {} for col in self.colunas},
+            'nulls': {col: False for col in self.colunas}
+        }
+
+    def _expirado(self):
+        return self._metadata is None or (time.monotonic() - self._carregado_em) > self.ttl
+
+    def get(self):
+        """Retorna os metadados; expirados, são servidos enquanto o loader recarrega em segundo plano.
+
+        O dicionário devolvido nunca é alterado: escritas publicam um novo (copy-on-write),
+        então quem o percorre fora do lock não vê mudanças no meio da leitura.
+        """
+        with self._lock:
+            if self.loader is None:
+                if self._metadata is None:
+                    self._metadata = self._vazio()
+                    self._carregado_em = time.monotonic()
+                return self._metadata
+            if self._expirado():
+                self._recarregar()
+            if self._metadata is not None:
+                return self._metadata
+            recarga = self._recarga
+        # Primeira leitura: não há o que servir, espera a recarga (no máximo `timeout`)
+        recarga.join(self.timeout)
+        with self._lock:
+            if self._metadata is None:
+                raise self.erro or TimeoutError(f"Metadados sem resposta em {self.timeout:g}s")
+            return self._metadata
+
+    def reload(self):
+        """Recarrega agora, na thread chamadora (erros são propagados; o valor atual é mantido)."""
+        metadata = self._normalizar(self.loader())
+        with self._lock:
+            self._geracao += 1
+            self._metadata = metadata
+            self._carregado_em = time.monotonic()
+            self.erro = None
+
+    def _recarregar(self):
+        """Inicia a recarga em uma thread (uma por vez); chamado com o lock."""
+        if self._recarga is not None and self._recarga.is_alive():
+            return
+        geracao = self._geracao
+
+        def executar():
+            try:
+                metadata = self._normalizar(self.loader())
+            except Exception as e:
+                # Mantém o último valor conhecido; a próxima leitura tenta de novo
+                with self._lock:
+                    self.erro = e
+                return
+            with self._lock:
+                self.erro = None
+                if self._geracao == geracao:
+                    self._metadata = metadata
+                    self._carregado_em = time.monotonic()
+                elif self._metadata is None:
+                    # Escrita durante a leitura: serve o resultado, mas já expirado
+                    self._metadata = metadata
+                    self._carregado_em = float('-inf')
+
+        self._recarga = threading.Thread(target=executar, name='metadados', daemon=True)
+        self._recarga.start()
+
+    def _normalizar(self, metadata):
+        """Converte o resultado do loader para o formato interno."""
+        normalizado = self._vazio()
+        normalizado['total_records'] = int(metadata.get('total_records') or 0)
+        normalizado['last_update'] = metadata.get('last_update')
+        for col in self.colunas:
+            valores = (metadata.get('distinct') or {}).get(col) or []
+            normalizado['distinct'][col] = dict.fromkeys(valores)
+            normalizado['nulls'][col] = bool((metadata.get('nulls') or {}).get(col, False))
+        return normalizado
+
+    def apply_insert(self, df, total_inserido=None):
+        """Atualiza os metadados com um lote recém-inserido."""
+        with self._lock:
+            self._geracao += 1
+            atual = self._metadata
+            if atual is None:
+                if self.loader is not None:
+                    # Sem cache: a próxima leitura busca tudo do banco
+                    return
+                atual = self._vazio()
+
+            # Cópia dos dicionários alterados: leitores continuam com a versão anterior intacta
+            metadata = {
+                'total_records': atual['total_records'] + (len(df) if total_inserido is None else int(total_inserido)),
+                'last_update': datetime.now().isoformat(),
+                'distinct': dict(atual['distinct']),
+                'nulls': dict(atual['nulls'])
+            }
+            for col in self.colunas:
+                if col in df.columns:
+                    serie = df[col]
+                    distintos = dict(metadata['distinct'][col])
+                    for valor in serie.dropna().unique():
+                        distintos.setdefault(valor, None)
+                    metadata['distinct'][col] = distintos
+                    if serie.isna().any():
+                        metadata['nulls'][col] = True
+            self._metadata = metadata
+
+    def reset(self):
+        """Zera os metadados após remoção de todos os dados."""
+        with self._lock:
+            self._geracao += 1
+            metadata = self._vazio()
+            metadata['last_update'] = datetime.now().isoformat()
+            self._metadata = metadata
+            self._carregado_em = time.monotonic()
+
+    def invalidate(self):
+        """Força nova leitura na próxima consulta."""
+        with self._lock:
+            self._geracao += 1
+            self._metadata = None
+
+    def get_stats(self):
+        """Retorna contagem e última atualização."""
+        metadata = self.get()
+        return {
+            'total_records': metadata['total_records'],
+            'last_update': metadata['last_update']
+        }
+
+    def get_unique_values(self, column):
+        """Retorna os valores distintos de uma coluna do dicionário."""
+        return list(self.get()['distinct'].get(column, {}))
+
+    def has_nulls(self, column):
+        """Indica se a coluna possui valores nulos."""
+        return self.get()['nulls'].get(column, False)
+
+    def tracks(self, column):
+        return column in self.colunas
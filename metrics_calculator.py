@@ -1,11 +1,15 @@
-import pandas as pd
+from lazy_imports import lazy_import
 from datetime import datetime, timedelta
-from utils import classificar_cliente_faixa
+from segmentation import Segmentacao
+from projection import requires
+from config import ANALISE_CONFIG
+pd = lazy_import('pandas')
 
 class MetricsCalculator:
     def __init__(self, df):
         self.df = df
     
+    @requires('CPF/CNPJ', 'Total', 'Taxa', 'Situação')
     def calculate_basic_kpis(self):
         """Calcula KPIs básicos."""
         kpis = {
@@ -24,6 +28,7 @@ class MetricsCalculator:
             
         return kpis
     
+    @requires('Situação', 'Total')
     def calculate_valores_por_situacao(self):
         """Calcula valores por situação de pagamento."""
         valores = {
@@ -41,6 +46,7 @@ class MetricsCalculator:
             
         return valores
     
+    @requires('CPF/CNPJ', 'Total', 'Situação', 'Data de criação')
     def calculate_advanced_metrics(self):
         """Calcula métricas avançadas (LTV, Churn, etc)."""
         metrics = {
@@ -57,7 +63,7 @@ class MetricsCalculator:
         
         # Taxa de Churn
         if all(col in self.df.columns for col in ['CPF/CNPJ', 'Data de criação', 'Situação']):
-            data_limite = datetime.now() - timedelta(days=60)
+            data_limite = datetime.now() - timedelta(days=ANALISE_CONFIG['dias_churn'])
             clientes_pagaram = self.df[self.df['Situação'].str.lower() == 'paga']['CPF/CNPJ'].unique()
             df_recente = self.df[self.df['Data de criação'] >= data_limite]
             clientes_ativos = df_recente['CPF/CNPJ'].unique()
@@ -78,12 +84,13 @@ class MetricsCalculator:
         
         return metrics
     
-    def calculate_faixa_stats(self, ltv_por_cliente):
+    @staticmethod
+    def calculate_faixa_stats(ltv_por_cliente):
         """Calcula estatísticas por faixa de cliente."""
         if ltv_por_cliente.empty:
             return pd.DataFrame()
         
-        faixa_stats = ltv_por_cliente.groupby('Faixa_Cliente').agg({
+        faixa_stats = ltv_por_cliente.groupby('Faixa_Cliente', observed=True).agg({
             'LTV_Total': ['sum', 'mean', 'count']
         }).round(2)
         
@@ -95,24 +102,32 @@ class MetricsCalculator:
         
         return faixa_stats
     
+    @requires('CPF/CNPJ', 'Total', 'Situação')
     def calculate_ranking_clientes(self):
         """Calcula ranking de clientes por valor."""
         if not all(col in self.df.columns for col in ['CPF/CNPJ', 'Total', 'Situação']):
             return pd.DataFrame()
         
-        ranking = self.df[self.df['Situação'].str.lower() == 'paga'].groupby('CPF/CNPJ').agg({
-            'Total': 'sum',
-            'Nome': 'first',
-            'Situação': 'count'
-        }).reset_index()
+        agregacoes = {'Total': 'sum', 'Situação': 'count'}
+        if 'Nome' in self.df.columns:
+            agregacoes['Nome'] = 'first'
+        if 'Data de criação' in self.df.columns:
+            agregacoes['Data de criação'] = 'max'
         
-        ranking.columns = ['CPF/CNPJ', 'Valor_Total', 'Nome', 'Num_Transacoes']
+        ranking = self.df[self.df['Situação'].str.lower() == 'paga'].groupby('CPF/CNPJ').agg(agregacoes).reset_index()
+        
+        ranking = ranking.rename(columns={'Total': 'Valor_Total', 'Situação': 'Num_Transacoes', 'Data de criação': 'Ultima_Compra'})
+        return MetricsCalculator.finalize_ranking(ranking)
+    
+    @staticmethod
+    def finalize_ranking(ranking):
+        """Ordena o resumo por cliente e adiciona percentuais e faixa."""
         ranking = ranking.sort_values('Valor_Total', ascending=False)
         
         # Calcular percentuais
         total_geral = ranking['Valor_Total'].sum()
         ranking['Percentual'] = (ranking['Valor_Total'] / total_geral * 100).round(2)
         ranking['Percentual_Acumulado'] = ranking['Percentual'].cumsum().round(2)
-        ranking['Faixa'] = ranking['Valor_Total'].apply(classificar_cliente_faixa)
+        ranking['Faixa'] = Segmentacao().classify_clientes(ranking, valor='Valor_Total')
         
         return ranking
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+Estado incremental das métricas: somas acumuladas, contagens e acumuladores
+por cliente. Uma inserção aplica apenas o lote (custo proporcional ao lote);
+remoções e substituições invalidam o estado, que é reconstruído por inteiro.
+"""
+import threading
+from datetime import datetime, timedelta
+from lazy_imports import lazy_import
+from config import ANALISE_CONFIG
+from metrics_calculator import MetricsCalculator
+from segmentation import Segmentacao
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Datas guardadas como inteiros (ns); NaT é o menor int64
+_NAT = -2 ** 63
+
+# Acumuladores por cliente: nome -> (dtype, valor inicial)
+_ACUMULADORES = {
+    'transacoes': ('int64', 0),
+    'pago_total': ('float64', 0.0),
+    'pago_qtd': ('int64', 0),
+    'ultima_criacao': ('int64', _NAT),
+    'ultima_compra': ('int64', _NAT),
+    'nome': ('object', None)
+}
+
+def _datas_ns(serie):
+    datas = serie if pd.api.types.is_datetime64_any_dtype(serie) else pd.to_datetime(serie, errors='coerce')
+    return datas.astype('datetime64[ns]').to_numpy().view('int64')
+
+class MetricsState:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._limpar()
+
+    def _limpar(self):
+        # versao: versão dos dados refletida pelo estado (None = precisa reconstruir)
+        self.versao = None
+        self.linhas = 0
+        self.valor_total = 0.0
+        self.total_taxas = 0.0
+        self.valores_situacao = {'paga': 0.0, 'pendente': 0.0, 'expirado': 0.0}
+        self.qtd_pagas = 0          # transações pagas com Total preenchido (ticket médio)
+        self.ltv_clientes = 0.0     # soma do LTV dos clientes identificados
+        self.clientes_pagos = 0
+        self.clientes_recorrentes = 0
+        self.tem_nome = False
+        self.tem_data = False
+        self._posicoes = {}
+        self._chaves = []
+        self._acc = {}  # criados na primeira inserção (numpy só é carregado com dados)
+
+    def _garantir_capacidade(self, total):
+        """Cresce os acumuladores em potências de dois (custo amortizado constante por cliente)."""
+        capacidade = len(self._acc.get('transacoes', ()))
+        if total <= capacidade:
+            return
+        nova = max(total, capacidade * 2, 1024)
+        for nome, (dtype, inicial) in _ACUMULADORES.items():
+            array = np.full(nova, inicial, dtype=dtype)
+            if capacidade:
+                array[:capacidade] = self._acc[nome]
+            self._acc[nome] = array
+
+    def _aplicar(self, df):
+        if df.empty:
+            return
+        self.linhas += len(df)
+        self.tem_nome = self.tem_nome or 'Nome' in df.columns
+        self.tem_data = self.tem_data or 'Data de criação' in df.columns
+
+        total = df['Total']
+        situacao = df['Situação'].str.lower()
+        pagas = (situacao == 'paga').fillna(False).to_numpy(dtype=bool)
+        self.valor_total += total.sum()
+        if 'Taxa' in df.columns:
+            self.total_taxas += df['Taxa'].sum()
+        for nome in self.valores_situacao:
+            self.valores_situacao[nome] += total[(situacao == nome).fillna(False).to_numpy(dtype=bool)].sum()
+        self.qtd_pagas += int(total[pagas].notna().sum())
+
+        # Agregação do lote por cliente: uma linha por cliente do lote
+        criacao = _datas_ns(df['Data de criação']) if 'Data de criação' in df.columns else np.full(len(df), _NAT)
+        lote = pd.DataFrame({
+            'pago_total': total.where(pagas),
+            'pago_qtd': pagas.astype('int64'),
+            'ultima_criacao': criacao,
+            'ultima_compra': np.where(pagas, criacao, _NAT),
+            'nome': df['Nome'].where(pagas) if 'Nome' in df.columns else None
+        }, index=df.index)
+        grupos = lote.groupby(df['CPF/CNPJ'].to_numpy(), sort=False)
+        por_cliente = grupos.agg({
+            'pago_total': 'sum', 'pago_qtd': 'sum', 'ultima_criacao': 'max', 'ultima_compra': 'max', 'nome': 'first'
+        })
+        transacoes = grupos.size().to_numpy()
+        if por_cliente.empty:
+            return
+
+        # Posição de cada cliente nos acumuladores; clientes novos vão para o fim
+        posicoes = np.fromiter((self._posicoes.get(chave, -1) for chave in por_cliente.index), dtype='int64', count=len(por_cliente))
+        novos = posicoes < 0
+        if novos.any():
+            inicio = len(self._chaves)
+            chaves_novas = por_cliente.index[novos].tolist()
+            posicoes[novos] = np.arange(inicio, inicio + len(chaves_novas))
+            self._garantir_capacidade(inicio + len(chaves_novas))
+            self._posicoes.update(zip(chaves_novas, range(inicio, inicio + len(chaves_novas))))
+            self._chaves.extend(chaves_novas)
+
+        acc = self._acc
+        antes_transacoes = acc['transacoes'][posicoes]
+        antes_pago = acc['pago_qtd'][posicoes]
+        acc['transacoes'][posicoes] += transacoes
+        acc['pago_qtd'][posicoes] += por_cliente['pago_qtd'].to_numpy()
+        acc['pago_total'][posicoes] += por_cliente['pago_total'].to_numpy()
+        acc['ultima_criacao'][posicoes] = np.maximum(acc['ultima_criacao'][posicoes], por_cliente['ultima_criacao'].to_numpy())
+        acc['ultima_compra'][posicoes] = np.maximum(acc['ultima_compra'][posicoes], por_cliente['ultima_compra'].to_numpy())
+        # Nome: o primeiro visto em transação paga
+        nomes = por_cliente['nome'].to_numpy(dtype=object)
+        sem_nome = pd.isna(acc['nome'][posicoes]) & ~pd.isna(nomes)
+        acc['nome'][posicoes[sem_nome]] = nomes[sem_nome]
+
+        self.ltv_clientes += por_cliente['pago_total'].sum()
+        self.clientes_pagos += int(((antes_pago == 0) & (acc['pago_qtd'][posicoes] > 0)).sum())
+        self.clientes_recorrentes += int(((antes_transacoes <= 1) & (acc['transacoes'][posicoes] > 1)).sum())
+
+    def apply(self, df, versao_anterior, versao):
+        """Aplica um lote inserido; sem o estado da versão anterior, invalida para reconstrução."""
+        with self._lock:
+            if self.versao is None or self.versao != versao_anterior:
+                self._limpar()
+                return False
+            self._aplicar(df)
+            self.versao = versao
+            return True
+
+    def rebuild(self, dados, versao):
+        """Reconstrução completa a partir de todos os dados da versão (DataFrame ou lotes)."""
+        with self._lock:
+            self._limpar()
+            for lote in ([dados] if isinstance(dados, pd.DataFrame) else dados):
+                self._aplicar(lote)
+            self.versao = versao
+
+    def adopt(self, outro):
+        """Passa a usar o estado reconstruído fora do lock (ex.: leitura longa do disco)."""
+        with self._lock, outro._lock:
+            estado = {chave: valor for chave, valor in vars(outro).items() if chave != '_lock'}
+            vars(self).update(estado)
+
+    def invalidate(self):
+        """Descarta o estado (remoção ou substituição de dados)."""
+        with self._lock:
+            self._limpar()
+
+    def _acumulador(self, nome):
+        """Valores de um acumulador para os clientes já vistos."""
+        dtype, inicial = _ACUMULADORES[nome]
+        return self._acc[nome][:len(self._chaves)] if self._acc else np.full(0, inicial, dtype=dtype)
+
+    def _clientes(self):
+        """Resumo dos clientes com transações pagas."""
+        pagos = self._acumulador('pago_qtd') > 0
+        clientes = pd.DataFrame({
+            'CPF/CNPJ': np.array(self._chaves, dtype=object)[pagos],
+            'Total': self._acumulador('pago_total')[pagos],
+            'Num_Transacoes': self._acumulador('pago_qtd')[pagos]
+        })
+        if self.tem_nome:
+            clientes['Nome'] = self._acumulador('nome')[pagos]
+        if self.tem_data:
+            clientes['Ultima_Compra'] = self._acumulador('ultima_compra')[pagos].view('datetime64[ns]')
+        return clientes
+
+    def _kpis(self):
+        n = len(self._chaves)
+        return {
+            'total_clientes': n,
+            'valor_total': self.valor_total,
+            'total_taxas': self.total_taxas,
+            'clientes_pagos': self.clientes_pagos,
+            'taxa_conversao': (self.clientes_pagos / n) * 100 if n > 0 else 0
+        }
+
+    def _valores_por_situacao(self):
+        valores = {
+            'valor_pago': self.valores_situacao['paga'],
+            'valor_pendente': self.valores_situacao['pendente'],
+            'valor_expirado': self.valores_situacao['expirado']
+        }
+        valores['valor_risco'] = valores['valor_pendente'] + valores['valor_expirado']
+        return valores
+
+    def _advanced_metrics(self):
+        metrics = {
+            'ltv_medio': self.ltv_clientes / self.clientes_pagos if self.clientes_pagos > 0 else 0,
+            'churn_rate': 0,
+            'ticket_medio': self.valores_situacao['paga'] / self.qtd_pagas if self.qtd_pagas > 0 else 0,
+            'clientes_recorrentes': self.clientes_recorrentes
+        }
+        if self.tem_data and self.clientes_pagos > 0:
+            # Depende da data atual: uma passada vetorizada pelos clientes, não pelas transações
+            limite = np.datetime64(datetime.now() - timedelta(days=ANALISE_CONFIG['dias_churn']), 'ns').astype('int64')
+            inativos = (self._acumulador('pago_qtd') > 0) & (self._acumulador('ultima_criacao') < limite)
+            metrics['churn_rate'] = (inativos.sum() / self.clientes_pagos) * 100
+        return metrics
+
+    def _ltv_por_cliente(self):
+        ltv = self._clientes().rename(columns={'Total': 'LTV_Total'})
+        # Mesma ordem do groupby por CPF/CNPJ (tolera chaves de tipos mistos)
+        codigos, _ = pd.factorize(ltv['CPF/CNPJ'], sort=True)
+        ltv = ltv.iloc[np.argsort(codigos, kind='stable')].reset_index(drop=True)
+        ltv['Faixa_Cliente'] = Segmentacao().classify_clientes(ltv, valor='LTV_Total')
+        return ltv
+
+    def _ranking(self):
+        return MetricsCalculator.finalize_ranking(self._clientes().rename(columns={'Total': 'Valor_Total'}))
+
+    def resultados(self, versao):
+        """Métricas da versão informada (None se o estado não está nessa versão)."""
+        with self._lock:
+            if self.versao is None or self.versao != versao:
+                return None
+            return {
+                'visao_geral': (self._kpis(), self._valores_por_situacao(), self._advanced_metrics()),
+                'ltv': self._ltv_por_cliente(),
+                'ranking': self._ranking()
+            }
@@ -0,0 +1,44 @@
+"""
+Carga da tabela em partições por mês de criação: as partições são buscadas
+em paralelo (com limite de requisições simultâneas) e cada uma é convertida
+em DataFrame na própria thread, assim que chega.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from lazy_imports import lazy_import
+pd = lazy_import('pandas')
+
+def _data(valor):
+    """Data sem fuso (só o mês importa para as partições); None vira NaT."""
+    data = pd.Timestamp(valor)
+    return data.tz_convert(None) if data.tzinfo is not None else data
+
+def particoes_mensais(minimo, maximo):
+    """Limites [início, fim) mês a mês entre duas datas; a primeira e a última partição são abertas.
+
+    Sem limite inferior na primeira nem superior na última, toda data não nula cai em
+    exatamente uma partição, mesmo que esteja fora do intervalo ou em outro formato.
+    """
+    try:
+        inicio, fim = _data(minimo), _data(maximo)
+    except (TypeError, ValueError):
+        return [(None, None)]
+    if pd.isna(inicio) or pd.isna(fim) or fim < inicio:
+        return [(None, None)]
+    bordas = pd.date_range(inicio.to_period('M').to_timestamp() + pd.offsets.MonthBegin(1), fim, freq='MS')
+    bordas = [borda.strftime('%Y-%m-%d') for borda in bordas]
+    return list(zip([None] + bordas, bordas + [None]))
+
+def buscar_em_paralelo(tarefas, paralelas):
+    """Executa as tarefas com no máximo `paralelas` threads; resultados na ordem das tarefas.
+
+    A primeira falha cancela as tarefas que ainda não começaram e é propagada.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, paralelas), thread_name_prefix='carga') as executor:
+        futuros = [executor.submit(tarefa) for tarefa in tarefas]
+        concluidos, _ = wait(futuros, return_when=FIRST_EXCEPTION)
+        for futuro in concluidos:
+            if futuro.exception() is not None:
+                for pendente in futuros:
+                    pendente.cancel()
+                raise futuro.exception()
+        return [futuro.result() for futuro in futuros]
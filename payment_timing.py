@@ -0,0 +1,180 @@
+"""
+Prazo de pagamento (data do pagamento - data de criação) e aging dos valores
+pendentes e expirados. Histogramas com bordas fixas em dias, que podem ser
+somados entre meses, lotes ou versões; resumos e percentis saem dos próprios
+histogramas, sem voltar às transações.
+"""
+from datetime import datetime
+from lazy_imports import lazy_import
+from config import PRAZOS_CONFIG
+from time_buckets import GRANULARIDADES, key_to_timestamp, period_labels
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Dimensões do histograma de prazos: chave -> (coluna, rótulo)
+DIMENSOES = {
+    'metodo': ('Paga com', 'Método de pagamento'),
+    'mes': (GRANULARIDADES['mes']['coluna'], 'Mês de criação'),
+    'faixa': ('Faixa_Cliente', 'Faixa de cliente')
+}
+
+COLUNA_BIN = 'Bin'
+COLUNA_DIA = GRANULARIDADES['dia']['coluna']
+MEDIDAS = ['Qtd', 'Valor', 'Soma_Dias']
+
+def rotulos_bins(bordas):
+    """Rótulos dos bins: '0-1d', ..., '90d+' (o último é aberto)."""
+    return [f"{inicio}-{fim}d" for inicio, fim in zip(bordas, bordas[1:])] + [f"{bordas[-1]}d+"]
+
+def _bins(dias, bordas):
+    """Índice do bin de cada valor em dias (abaixo da primeira borda vai para o primeiro bin)."""
+    return np.clip(np.searchsorted(np.asarray(bordas, dtype=float), dias, side='right') - 1, 0, len(bordas) - 1)
+
+def _dias(fim, inicio):
+    """Diferença em dias; NaN quando falta uma das datas (NaT não vira o menor int64)."""
+    return (fim - inicio).dt.total_seconds().to_numpy(dtype=float) / 86_400
+
+def _somar(a, b):
+    if a is None or a.empty:
+        return b
+    if b is None or b.empty:
+        return a
+    return a.add(b, fill_value=0)
+
+def cubo_prazos(df, faixas=None, config=None):
+    """Transações pagas com as duas datas, agregadas por (mês, método, faixa, bin): Qtd, Valor, Soma_Dias."""
+    config = config or PRAZOS_CONFIG
+    colunas = ['Situação', 'Total', 'Data de criação', 'Data do pagamento', 'Paga com', DIMENSOES['mes'][0]]
+    if not all(col in df.columns for col in colunas):
+        return None
+    pagos = df[(df['Situação'].str.lower() == 'paga').fillna(False).to_numpy(dtype=bool)]
+    # Pagas sem uma das datas ficam fora do histograma (não contam como prazo zero)
+    validos = (pagos['Data do pagamento'].notna() & pagos['Data de criação'].notna()).to_numpy(dtype=bool)
+    pagos = pagos[validos]
+    # Pagamento no mesmo dia, em hora anterior à criação, conta como prazo zero
+    dias = np.maximum(_dias(pagos['Data do pagamento'], pagos['Data de criação']), 0)
+    if faixas is not None and 'CPF/CNPJ' in pagos.columns:
+        faixa = pagos['CPF/CNPJ'].map(faixas)
+    else:
+        faixa = pd.Series('Todas', index=pagos.index)
+    chaves = pd.DataFrame({
+        DIMENSOES['mes'][0]: pagos[DIMENSOES['mes'][0]],
+        'Paga com': pagos['Paga com'],
+        'Faixa_Cliente': faixa,
+        COLUNA_BIN: _bins(dias, config['bordas_prazo_dias']),
+        'Qtd': 1,
+        'Valor': pagos['Total'],
+        'Soma_Dias': dias
+    })
+    return chaves.groupby(list(chaves.columns[:4]), observed=True, sort=False)[MEDIDAS].sum()
+
+def base_aging(df, config=None):
+    """Valores pendentes/expirados agregados por (situação, dia de criação); a idade é aplicada na leitura."""
+    config = config or PRAZOS_CONFIG
+    if not all(col in df.columns for col in ['Situação', 'Total', COLUNA_DIA]):
+        return None
+    situacao = df['Situação'].str.lower()
+    abertos = situacao.isin(config['situacoes_aging']).fillna(False).to_numpy(dtype=bool)
+    base = pd.DataFrame({
+        'Situação': situacao[abertos],
+        COLUNA_DIA: df[COLUNA_DIA][abertos],
+        'Qtd': 1,
+        'Valor': df['Total'][abertos]
+    })
+    return base.groupby(['Situação', COLUNA_DIA], observed=True, sort=False)[['Qtd', 'Valor']].sum()
+
+class PrazosPagamento:
+    """Histogramas de prazo e base de aging de uma versão dos dados (somáveis com combinar)."""
+
+    def __init__(self, cubo=None, aging=None, config=None):
+        self.config = config or PRAZOS_CONFIG
+        self.cubo = cubo
+        self.aging_base = aging
+
+    @classmethod
+    def de_dataframe(cls, df, faixas=None, config=None):
+        """Uma passada vetorizada sobre as transações (ou um lote delas)."""
+        return cls(cubo_prazos(df, faixas, config), base_aging(df, config), config)
+
+    def combinar(self, outro):
+        """Soma de dois conjuntos de histogramas (bordas fixas: basta somar as contagens)."""
+        return PrazosPagamento(_somar(self.cubo, outro.cubo), _somar(self.aging_base, outro.aging_base), self.config)
+
+    def _por_bin(self, dimensao=None):
+        """Medidas por (grupo, bin), somando as demais dimensões."""
+        if self.cubo is None or self.cubo.empty:
+            return pd.DataFrame(columns=MEDIDAS)
+        if dimensao is None:
+            por_bin = self.cubo.groupby(COLUNA_BIN).sum()
+            por_bin.index = pd.MultiIndex.from_product([['Total'], por_bin.index], names=[None, COLUNA_BIN])
+            return por_bin
+        coluna = DIMENSOES[dimensao][0]
+        return self.cubo.groupby([coluna, COLUNA_BIN], observed=True).sum()
+
+    def _rotular(self, indice, dimensao):
+        if dimensao == 'mes':
+            return pd.Index(period_labels(indice, 'mes').to_numpy(), name=DIMENSOES[dimensao][1])
+        return pd.Index(indice.astype(str), name=DIMENSOES[dimensao][1] if dimensao else None)
+
+    def histograma(self, dimensao=None):
+        """Quantidade de transações pagas por bin de prazo: uma linha por grupo da dimensão."""
+        bordas = self.config['bordas_prazo_dias']
+        por_bin = self._por_bin(dimensao)
+        if por_bin.empty:
+            return pd.DataFrame(columns=rotulos_bins(bordas))
+        tabela = por_bin['Qtd'].unstack(COLUNA_BIN, fill_value=0).reindex(columns=range(len(bordas)), fill_value=0)
+        tabela.columns = rotulos_bins(bordas)
+        tabela.index = self._rotular(tabela.index, dimensao)
+        return tabela.astype('int64')
+
+    def _percentis(self, contagens, quantis):
+        """Percentis estimados pelo histograma (interpolação linear dentro do bin)."""
+        bordas = np.asarray(self.config['bordas_prazo_dias'], dtype=float)
+        # O último bin é aberto: percentis que caem nele ficam na sua borda inferior
+        fins = np.append(bordas[1:], bordas[-1])
+        acumulado = np.cumsum(contagens, axis=1)
+        total = acumulado[:, -1:]
+        resultado = {}
+        for quantil in quantis:
+            alvo = quantil * total
+            indice = np.argmax(acumulado >= alvo, axis=1)
+            linhas = np.arange(len(contagens))
+            antes = acumulado[linhas, indice] - contagens[linhas, indice]
+            no_bin = np.where(contagens[linhas, indice] > 0, contagens[linhas, indice], 1)
+            fracao = np.clip((alvo[:, 0] - antes) / no_bin, 0, 1)
+            resultado[quantil] = bordas[indice] + fracao * (fins[indice] - bordas[indice])
+        return resultado
+
+    def resumo(self, dimensao=None):
+        """Por grupo: transações, valor, prazo médio (exato), mediana e P90 (pelo histograma)."""
+        colunas = ['Qtd', 'Valor', 'Media_Dias', 'Mediana_Dias', 'P90_Dias']
+        histograma = self.histograma(dimensao)
+        if histograma.empty:
+            return pd.DataFrame(columns=colunas)
+        por_bin = self._por_bin(dimensao)
+        totais = por_bin.groupby(level=0, observed=True).sum()
+        totais.index = self._rotular(totais.index, dimensao)
+        totais = totais.reindex(histograma.index)
+        percentis = self._percentis(histograma.to_numpy(dtype=float), [0.5, 0.9])
+        return pd.DataFrame({
+            'Qtd': totais['Qtd'].astype('int64'),
+            'Valor': totais['Valor'],
+            'Media_Dias': totais['Soma_Dias'] / totais['Qtd'],
+            'Mediana_Dias': percentis[0.5],
+            'P90_Dias': percentis[0.9]
+        }, index=histograma.index)
+
+    def aging(self, hoje=None):
+        """Valor e quantidade em aberto por faixa de idade (hoje - criação) e situação."""
+        bordas = self.config['bordas_aging_dias']
+        colunas = ['Faixa_Idade', 'Situação', 'Qtd', 'Valor']
+        if self.aging_base is None or self.aging_base.empty:
+            return pd.DataFrame(columns=colunas)
+        base = self.aging_base.reset_index()
+        hoje = pd.Timestamp(hoje or datetime.now()).normalize()
+        idade = _dias(pd.Series(hoje, index=base.index), key_to_timestamp(base[COLUNA_DIA], 'dia').set_axis(base.index))
+        rotulos = rotulos_bins(bordas)
+        base['Faixa_Idade'] = pd.Categorical.from_codes(_bins(np.nan_to_num(idade), bordas), categories=rotulos, ordered=True)
+        aging = base.groupby(['Faixa_Idade', 'Situação'], observed=True)[['Qtd', 'Valor']].sum().reset_index()
+        aging['Qtd'] = aging['Qtd'].astype('int64')
+        return aging[colunas]
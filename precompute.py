@@ -0,0 +1,221 @@
+"""
+Pré-cálculo em segundo plano dos artefatos derivados (resumo por cliente,
+séries mensais e KPIs) de cada versão dos dados. A versão anterior continua
+publicada até a nova ficar pronta; a troca é uma única atribuição.
+"""
+import threading
+from datetime import datetime
+from concentration import Concentracao
+from data_processor import DataProcessor
+from metrics_calculator import MetricsCalculator
+from payment_timing import PrazosPagamento
+from time_buckets import GRANULARIDADES, period_labels, resample
+from utils import get_ordem_faixas
+
+class Artefatos:
+    """Cálculos de uma versão dos dados, memorizados e compartilhados entre sessões."""
+
+    def __init__(self, versao, processor, metricas=None):
+        self.versao = versao
+        self.processor = processor
+        # Momento da leitura dos dados (idade exibida quando o backend não responde)
+        self.carregado_em = datetime.now()
+        # metricas: MetricsState opcional com os resultados incrementais desta versão
+        self.metricas = metricas
+        self._lock = threading.RLock()
+        self._memo = {}
+
+    @property
+    def df(self):
+        return self.processor.df
+
+    @property
+    def linhas(self):
+        return len(self.df)
+
+    @property
+    def colunas(self):
+        return list(self.df.columns)
+
+    def amostra(self, n=5):
+        return self.df.head(n)
+
+    def filtrar(self, situacao='Todas', metodo_pagamento='Todos', limite=50):
+        """Primeiras `limite` linhas filtradas e o total de linhas que passam no filtro."""
+        df_filtrado = self.processor.apply_filters(situacao, metodo_pagamento)
+        return df_filtrado.head(limite), len(df_filtrado)
+
+    def _memorizar(self, chave, calcular):
+        with self._lock:
+            if chave not in self._memo:
+                self._memo[chave] = calcular()
+            return self._memo[chave]
+
+    def visao_geral(self):
+        """KPIs básicos, valores por situação e métricas avançadas."""
+        def calcular():
+            calculator = MetricsCalculator(self.df)
+            return (
+                calculator.calculate_basic_kpis(),
+                calculator.calculate_valores_por_situacao(),
+                calculator.calculate_advanced_metrics()
+            )
+        return self._memorizar('visao_geral', calcular)
+
+    def ltv_por_cliente(self):
+        return self._memorizar('ltv', self.processor.get_ltv_por_cliente)
+
+    def faixa_stats(self):
+        def calcular():
+            faixa_stats = MetricsCalculator.calculate_faixa_stats(self.ltv_por_cliente())
+            if faixa_stats.empty:
+                return faixa_stats
+            # Ordenar por importância
+            ordem_faixas = get_ordem_faixas()
+            return faixa_stats.reindex([faixa for faixa in ordem_faixas if faixa in faixa_stats.index])
+        return self._memorizar('faixa_stats', calcular)
+
+    def evolucao_faixa(self, granularidade):
+        def calcular():
+            df_com_faixa = self.processor.get_df_com_faixa(self.ltv_por_cliente())
+            if df_com_faixa.empty:
+                return df_com_faixa
+            return resample(df_com_faixa, granularidade, 'Total', 'Faixa_Cliente')
+        return self._memorizar(('evolucao_faixa', granularidade), calcular)
+
+    def ranking(self):
+        return self._memorizar('ranking', MetricsCalculator(self.df).calculate_ranking_clientes)
+
+    def evolucao_status(self, granularidade):
+        return self._memorizar(
+            ('evolucao_status', granularidade),
+            lambda: resample(self.df, granularidade, 'Total', 'Situação')
+        )
+
+    def _clientes_por_mes(self):
+        """Valor pago por (mês, cliente), ou None sem as colunas necessárias."""
+        coluna = GRANULARIDADES['mes']['coluna']
+        if not all(col in self.df.columns for col in ['CPF/CNPJ', 'Total', 'Situação', coluna]):
+            return None
+        pagos = self.df[self.df['Situação'].str.lower() == 'paga']
+        return pagos.groupby([coluna, 'CPF/CNPJ'], observed=True, sort=False)['Total'].sum()
+
+    def concentracao(self):
+        """Curva de Lorenz, Gini e HHI de todos os clientes, no total, por faixa e por mês."""
+        def calcular():
+            ranking = self.ranking()
+            if ranking.empty:
+                return None
+            concentracao = Concentracao()
+            por_mes = self._clientes_por_mes()
+            if por_mes is not None and not por_mes.empty:
+                por_mes = concentracao.indicadores(por_mes.to_numpy(), por_mes.index.get_level_values(0))
+                por_mes.index = period_labels(por_mes.index, 'mes').to_numpy()
+            por_faixa = concentracao.indicadores(ranking['Valor_Total'], ranking['Faixa'])
+            por_faixa.index = por_faixa.index.astype(str)
+            return {
+                'geral': concentracao.indicadores(ranking['Valor_Total']).iloc[0],
+                'lorenz': concentracao.curva_lorenz(ranking['Valor_Total']),
+                'por_faixa': por_faixa.reindex([faixa for faixa in get_ordem_faixas() if faixa in por_faixa.index]),
+                'por_mes': por_mes
+            }
+        return self._memorizar('concentracao', calcular)
+
+    def prazos(self):
+        """Histogramas de prazo de pagamento (por método, mês e faixa) e base do aging."""
+        def calcular():
+            ltv = self.ltv_por_cliente()
+            faixas = ltv.set_index('CPF/CNPJ')['Faixa_Cliente'] if not ltv.empty else None
+            return PrazosPagamento.de_dataframe(self.df, faixas)
+        return self._memorizar('prazos', calcular)
+
+    def contagens(self, coluna):
+        return self._memorizar(('contagens', coluna), lambda: self.df[coluna].value_counts())
+
+    def aquecer(self):
+        """Calcula os artefatos exibidos por padrão."""
+        if self.metricas is not None:
+            resultados = self.metricas.resultados(self.versao)
+            if resultados is None:
+                # Estado sem esta versão (início, remoção ou substituição): reconstrução completa
+                self.metricas.rebuild(self.df, self.versao)
+                resultados = self.metricas.resultados(self.versao)
+            with self._lock:
+                self._memo.update(resultados or {})
+        self.visao_geral()
+        self.faixa_stats()
+        self.evolucao_faixa('mes')
+        self.ranking()
+        self.evolucao_status('mes')
+        return self
+
+def _artefatos_em_memoria(versao, df, metricas=None):
+    if df.empty:
+        return None
+    return Artefatos(versao, DataProcessor(df), metricas).aquecer()
+
+class PrecomputeWorker:
+    """Thread única que recalcula os artefatos quando os dados mudam."""
+
+    def __init__(self, fonte, metricas=None, construtor=None):
+        # fonte() -> (versao, dados) da versão atual; por padrão os dados são o DataFrame completo
+        self.fonte = fonte
+        self.metricas = metricas
+        # construtor(versao, dados, metricas) -> artefatos aquecidos (None sem dados)
+        self.construtor = construtor or _artefatos_em_memoria
+        self.erro = None
+        self._artefatos = None
+        self._condicao = threading.Condition()
+        self._pendente = False
+        self._executando = False
+        self._thread = None
+
+    def current(self):
+        """Artefatos publicados mais recentes (None se ainda não há)."""
+        return self._artefatos
+
+    def pending(self):
+        with self._condicao:
+            return self._pendente or self._executando
+
+    def schedule(self):
+        """Agenda um recálculo; pedidos durante a execução são agrupados em um só."""
+        with self._condicao:
+            self._pendente = True
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='precompute', daemon=True)
+                self._thread.start()
+
+    def wait(self, timeout=None):
+        """Aguarda o fim dos recálculos pendentes; retorna False no timeout."""
+        with self._condicao:
+            return self._condicao.wait_for(lambda: not (self._pendente or self._executando), timeout)
+
+    def _loop(self):
+        while True:
+            with self._condicao:
+                if not self._pendente:
+                    self._thread = None
+                    self._condicao.notify_all()
+                    return
+                self._pendente = False
+                self._executando = True
+            try:
+                self._publicar(self.build())
+                self.erro = None
+            except Exception as e:
+                # Mantém os últimos artefatos publicados
+                self.erro = e
+            finally:
+                with self._condicao:
+                    self._executando = False
+                    self._condicao.notify_all()
+
+    def build(self):
+        """Calcula os artefatos da versão atual na thread chamadora."""
+        versao, dados = self.fonte()
+        return self.construtor(versao, dados, self.metricas)
+
+    def _publicar(self, artefatos):
+        # Troca atômica: leitores veem a versão anterior ou a nova, nunca uma mistura
+        self._artefatos = artefatos
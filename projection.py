@@ -0,0 +1,25 @@
+"""
+Projeção de colunas: cada cálculo declara as colunas de que precisa e a
+carga de fallback na sessão (sem pré-cálculo pronto) busca apenas a união
+delas. O pré-cálculo carrega todas as colunas, pois atende todas as seções.
+"""
+
+def requires(*colunas):
+    """Declara as colunas necessárias para um cálculo."""
+    def decorator(func):
+        func.colunas_necessarias = tuple(colunas)
+        return func
+    return decorator
+
+def colunas_necessarias(*computacoes):
+    """Retorna a união (ordenada) das colunas declaradas pelos cálculos ou listas de colunas."""
+    colunas = []
+    for computacao in computacoes:
+        if isinstance(computacao, (list, tuple)):
+            declaradas = computacao
+        else:
+            declaradas = getattr(computacao, 'colunas_necessarias', ())
+        for col in declaradas:
+            if col not in colunas:
+                colunas.append(col)
+    return colunas
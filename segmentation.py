@@ -0,0 +1,84 @@
+"""
+Segmentação de clientes dirigida por configuração: faixas fixas de valor,
+faixas por quantis ou pontuação RFM, calculadas de forma vetorizada em
+categorias ordenadas.
+"""
+from lazy_imports import lazy_import
+from config import SEGMENTACAO_CONFIG
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+def _formatar_limite(valor):
+    return f"{int(valor):,}".replace(',', '.')
+
+class Segmentacao:
+    def __init__(self, config=None):
+        self.config = config or SEGMENTACAO_CONFIG
+        self.modo = self.config['modo']
+        # Faixas da mais valiosa para a menos valiosa
+        self.faixas = self.config['faixas']
+
+    def _limites(self):
+        """Limite inferior de cada faixa no modo atual."""
+        campo = {'faixas': 'minimo', 'quantis': 'quantil_minimo', 'rfm': 'rfm_minimo'}[self.modo]
+        return [faixa[campo] for faixa in self.faixas]
+
+    def _rotulo(self, indice):
+        faixa = self.faixas[indice]
+        limites = self._limites()
+        if self.modo == 'quantis':
+            inicio = f"P{int(limites[indice] * 100)}"
+            fim = f"P{int(limites[indice - 1] * 100) - 1}" if indice > 0 else None
+        else:
+            prefixo = 'R$ ' if self.modo == 'faixas' else 'RFM '
+            inicio = prefixo + _formatar_limite(limites[indice])
+            fim = _formatar_limite(limites[indice - 1] - 1) if indice > 0 else None
+        return f"{faixa['nome']} ({inicio}+)" if fim is None else f"{faixa['nome']} ({inicio}-{fim})"
+
+    def labels(self):
+        """Rótulos na ordem de exibição (mais valiosa primeiro)."""
+        return [self._rotulo(i) for i in range(len(self.faixas))]
+
+    def colors(self):
+        return {rotulo: faixa['cor'] for rotulo, faixa in zip(self.labels(), self.faixas)}
+
+    def bands(self):
+        """Definição completa de cada faixa, com rótulo."""
+        return [dict(faixa, rotulo=rotulo) for rotulo, faixa in zip(self.labels(), self.faixas)]
+
+    def dtype(self):
+        """Categoria ordenada da menos para a mais valiosa."""
+        return pd.CategoricalDtype(self.labels()[::-1], ordered=True)
+
+    def _cortar(self, valores, limites):
+        bordas = [-np.inf] + sorted(limites)[1:] + [np.inf]
+        categorias = pd.cut(valores, bins=bordas, right=False, labels=self.labels()[::-1])
+        return categorias.astype(self.dtype())
+
+    def classify(self, valores):
+        """Classifica valores: LTV (faixas fixas), LTV relativo (quantis) ou pontuação RFM."""
+        valores = pd.Series(valores, dtype=float)
+        if self.modo == 'quantis':
+            # Percentil de cada cliente: 0 para o menor valor, 1 para o maior
+            percentis = (valores.rank(method='max') - 1) / max(len(valores) - 1, 1)
+            return self._cortar(percentis, self._limites())
+        return self._cortar(valores, self._limites())
+
+    def rfm_scores(self, clientes, valor, frequencia, recencia):
+        """Pontuações R, F e M (1..n) por quantis de cada dimensão."""
+        n = self.config['rfm']['quantis']
+        dimensoes = {'R': recencia, 'F': frequencia, 'M': valor}
+        return pd.DataFrame({
+            nome: np.ceil(clientes[coluna].rank(method='average', pct=True).fillna(0) * n).clip(lower=1).astype(int)
+            for nome, coluna in dimensoes.items()
+            if coluna in clientes.columns
+        }, index=clientes.index)
+
+    def classify_clientes(self, clientes, valor='LTV_Total', frequencia='Num_Transacoes', recencia='Ultima_Compra'):
+        """Classifica o resumo por cliente conforme o modo configurado."""
+        if self.modo == 'rfm':
+            scores = self.rfm_scores(clientes, valor, frequencia, recencia)
+            # Dimensões ausentes (ex.: sem datas) não reduzem a escala de 3 dimensões
+            total = scores.sum(axis=1) * 3 / max(len(scores.columns), 1)
+            return self.classify(total)
+        return self.classify(clientes[valor])
@@ -0,0 +1,57 @@
+"""
+Agrupamento de cargas simultâneas (single-flight): chamadas concorrentes
+com a mesma chave compartilham uma única execução em andamento e recebem o
+mesmo resultado (ou o mesmo erro). Nada é guardado depois que a execução
+termina; a retenção fica a cargo do cache de quem chama.
+"""
+import threading
+
+class _Execucao:
+    def __init__(self, chave):
+        self.chave = chave
+        self.pronta = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+class CargasCompartilhadas:
+    """Execuções em andamento por chave; quem chega durante uma delas espera pelo resultado."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+        self.execucoes = 0  # execuções de fato
+        self.agrupadas = 0  # chamadas atendidas pela execução de outra
+
+    def executar(self, chave, funcao, aproveita=None):
+        """Resultado de funcao() para a chave; retorna (chave da execução usada, resultado).
+
+        aproveita(chave) -> bool permite esperar uma execução em andamento de outra
+        chave cujo resultado contém o pedido (ex.: mais colunas da mesma versão).
+        """
+        with self._lock:
+            execucao = self._em_andamento.get(chave)
+            if execucao is None and aproveita is not None:
+                execucao = next((e for k, e in self._em_andamento.items() if aproveita(k)), None)
+            lider = execucao is None
+            if lider:
+                execucao = self._em_andamento[chave] = _Execucao(chave)
+                self.execucoes += 1
+            else:
+                self.agrupadas += 1
+
+        if lider:
+            try:
+                execucao.resultado = funcao()
+            except Exception as e:
+                execucao.erro = e
+            finally:
+                # Fora do mapa antes de acordar quem espera: chamadas seguintes executam de novo
+                with self._lock:
+                    del self._em_andamento[chave]
+                execucao.pronta.set()
+        else:
+            execucao.pronta.wait()
+
+        if execucao.erro is not None:
+            raise execucao.erro
+        return execucao.chave, execucao.resultado
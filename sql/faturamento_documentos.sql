@@ -0,0 +1,18 @@
+-- Migração: CPF/CNPJ gravados antes da normalização na ingestão para a forma
+-- canônica (só dígitos, zeros à esquerda, 11 ou 14 dígitos), a mesma de
+-- validation.normalizar_documentos. Sem ela, o cliente gravado como
+-- 1234567890 e o mesmo cliente enviado depois como 01234567890 contam como dois.
+-- Rodar uma vez no SQL editor do Supabase; rodar de novo não altera nada.
+-- No modo fora da memória, restaurar um backup (que passa pela validação) normaliza os documentos.
+with documentos as (
+  select id,
+         regexp_replace(regexp_replace(btrim(cpf_cnpj), '\.0+$', ''), '\D', '', 'g') as digitos
+  from faturamento
+  where cpf_cnpj ~ '\d'
+)
+update faturamento f
+set cpf_cnpj = lpad(d.digitos, case when length(d.digitos) <= 11 then 11 else 14 end, '0')
+from documentos d
+where f.id = d.id
+  and length(d.digitos) <= 14
+  and f.cpf_cnpj <> lpad(d.digitos, case when length(d.digitos) <= 11 then 11 else 14 end, '0');
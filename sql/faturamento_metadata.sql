@@ -0,0 +1,20 @@
+-- Metadados do faturamento em uma única chamada (MetadataService)
+-- Valores vazios são gravados como '' pelo DatabaseManager e contam como nulos.
+create or replace function faturamento_metadata()
+returns json
+language sql
+stable
+as $$
+  select json_build_object(
+    'total_records', (select count(*) from faturamento),
+    'last_update', (select max(created_at) from faturamento),
+    'distinct', json_build_object(
+      'situacao', (select coalesce(json_agg(distinct situacao), '[]'::json) from faturamento where coalesce(situacao, '') <> ''),
+      'paga_com', (select coalesce(json_agg(distinct paga_com), '[]'::json) from faturamento where coalesce(paga_com, '') <> '')
+    ),
+    'nulls', json_build_object(
+      'situacao', exists(select 1 from faturamento where coalesce(situacao, '') = ''),
+      'paga_com', exists(select 1 from faturamento where coalesce(paga_com, '') = '')
+    )
+  );
+$$;
@@ -0,0 +1,15 @@
+-- Linhas reprovadas na validação da ingestão, com os valores originais
+-- (como texto) e os motivos da reprovação
+create table if not exists faturamento_quarentena (
+  id bigserial primary key,
+  created_at timestamptz default now(),
+  nome text,
+  cpf_cnpj text,
+  total text,
+  taxa text,
+  situacao text,
+  paga_com text,
+  data_criacao text,
+  data_pagamento text,
+  motivos text not null
+);
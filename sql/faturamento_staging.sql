@@ -0,0 +1,46 @@
+-- Carga em staging e troca atômica para o fluxo "Substituir Dados"
+-- A troca roda em uma única transação: leitores continuam vendo os dados
+-- antigos (MVCC) até o commit.
+--
+-- Permissões: as funções rodam com os privilégios de quem chama (security
+-- invoker), a role da chave em SUPABASE_KEY. Essa role precisa de select,
+-- insert e delete em faturamento, de select, insert e truncate em
+-- faturamento_staging, de usage na sequência do id de faturamento (a staging
+-- usa o mesmo default) e de execute nas duas funções. Os grants no fim do
+-- arquivo dão isso a anon e authenticated; service_role já tem tudo.
+--
+-- RLS: com RLS ativo em faturamento, a role precisa de policies de select e
+-- delete que enxerguem todas as linhas (senão o delete remove só as visíveis e
+-- a troca mistura dados antigos e novos) e de insert. Na staging, truncate
+-- ignora RLS, mas o insert da carga precisa de policy se o RLS for ativado.
+create table if not exists faturamento_staging (like faturamento including defaults);
+
+create or replace function reset_faturamento_staging()
+returns void
+language sql
+as $$
+  truncate faturamento_staging;
+$$;
+
+create or replace function swap_faturamento_staging()
+returns integer
+language plpgsql
+as $$
+declare
+  total integer;
+begin
+  -- where true: o pg-safeupdate (se carregado para o PostgREST) recusa delete sem where
+  delete from faturamento where true;
+  insert into faturamento (created_at, nome, cpf_cnpj, total, taxa, situacao, paga_com, data_criacao, data_pagamento)
+    select created_at, nome, cpf_cnpj, total, taxa, situacao, paga_com, data_criacao, data_pagamento
+    from faturamento_staging;
+  truncate faturamento_staging;
+  select count(*) into total from faturamento;
+  return total;
+end;
+$$;
+
+grant select, insert, delete on faturamento to anon, authenticated;
+grant select, insert, truncate on faturamento_staging to anon, authenticated;
+grant execute on function reset_faturamento_staging() to anon, authenticated;
+grant execute on function swap_faturamento_staging() to anon, authenticated;
@@ -0,0 +1,193 @@
+"""
+Artefatos calculados por reduções em lotes: KPIs, resumo por cliente e
+séries por período sobre o dataset em disco (modo fora da memória) ou sobre
+os chunks do snapshot em memória. Apenas um lote e os agregados (por
+cliente, por período) ficam em memória além dos próprios dados.
+"""
+from lazy_imports import lazy_import
+from data_processor import DataProcessor
+from metrics_state import MetricsState
+from payment_timing import PrazosPagamento
+from precompute import Artefatos
+from segmentation import Segmentacao
+from time_buckets import GRANULARIDADES, resample
+pd = lazy_import('pandas')
+
+# Colunas lidas na passada principal (métricas, séries por situação e contagens)
+COLUNAS_PASSADA = ['Nome', 'CPF/CNPJ', 'Total', 'Taxa', 'Situação', 'Paga com', 'Data de criação']
+COLUNAS_CONTAGEM = ['Situação', 'Paga com']
+# Colunas da segunda passada (séries por faixa, concentração mensal e prazos)
+COLUNAS_SEGUNDA_PASSADA = ['CPF/CNPJ', 'Total', 'Situação', 'Paga com', 'Data de criação', 'Data do pagamento']
+
+def _somar(acumulado, parcial):
+    """Soma agregados parciais alinhando os índices."""
+    return parcial if acumulado is None else acumulado.add(parcial, fill_value=0)
+
+def _por_periodo(acumulado, grupo, dtype_grupo=None):
+    """Agregado (período, grupo) -> DataFrame no formato esperado por resample()."""
+    if acumulado is None:
+        return pd.DataFrame(columns=['Total'])
+    agregado = acumulado.reset_index()
+    coluna = agregado.columns[0]
+    agregado[coluna] = agregado[coluna].astype('Int32')
+    if dtype_grupo is not None:
+        agregado[grupo] = agregado[grupo].astype(dtype_grupo)
+    return agregado
+
+class ArtefatosStreaming(Artefatos):
+    """Mesma interface de Artefatos, calculada sobre um snapshot em lotes (disco ou chunks) sem materializá-lo."""
+
+    def __init__(self, versao, snapshot, metricas=None):
+        super().__init__(versao, None, metricas)
+        self.snapshot = snapshot
+
+    @property
+    def df(self):
+        raise AttributeError("Artefatos em lotes: os dados não são materializados em um DataFrame")
+
+    @property
+    def linhas(self):
+        return len(self.snapshot)
+
+    @property
+    def colunas(self):
+        # Colunas após o processamento (inclui as chaves de período)
+        return self._memorizar('colunas', lambda: list(DataProcessor(self.snapshot.head(1)).df.columns))
+
+    def amostra(self, n=5):
+        return DataProcessor(self.snapshot.head(n)).df
+
+    def _lotes(self, colunas=None):
+        """Lotes processados como no caminho em memória (datas, períodos, 'Paga com')."""
+        for lote in self.snapshot.iter_batches(colunas):
+            yield DataProcessor(lote).df
+
+    def _primeira_passada(self, estado):
+        """Uma leitura: métricas por cliente (se `estado`), somas por período e situação e contagens."""
+        status = {granularidade: None for granularidade in GRANULARIDADES}
+        contagens = {coluna: None for coluna in COLUNAS_CONTAGEM}
+
+        def lotes():
+            for lote in self._lotes(COLUNAS_PASSADA):
+                for granularidade, definicao in GRANULARIDADES.items():
+                    parcial = lote.groupby([definicao['coluna'], 'Situação'], observed=True)['Total'].sum()
+                    status[granularidade] = _somar(status[granularidade], parcial)
+                for coluna in COLUNAS_CONTAGEM:
+                    contagens[coluna] = _somar(contagens[coluna], lote[coluna].value_counts())
+                yield lote
+
+        if estado is not None:
+            estado.rebuild(lotes(), self.versao)
+        else:
+            for _ in lotes():
+                pass
+
+        with self._lock:
+            for granularidade, acumulado in status.items():
+                self._memo[('status_agregado', granularidade)] = _por_periodo(acumulado, 'Situação')
+            for coluna, acumulado in contagens.items():
+                if acumulado is not None:
+                    acumulado = acumulado.astype('int64').sort_values(ascending=False).rename('count')
+                    acumulado.index.name = coluna
+                self._memo[('contagens', coluna)] = acumulado
+
+    def _segunda_passada(self):
+        """Somas pagas por período e faixa e prazos de pagamento, com a faixa de cada cliente já conhecida."""
+        ltv = self.ltv_por_cliente()
+        faixas = ltv.set_index('CPF/CNPJ')['Faixa_Cliente'] if not ltv.empty else None
+        acumulados = {granularidade: None for granularidade in GRANULARIDADES}
+        # Valor pago por (mês, cliente), para a concentração mensal
+        clientes_por_mes = None
+        coluna_mes = GRANULARIDADES['mes']['coluna']
+        # Histogramas de prazo com bordas fixas: somados lote a lote
+        prazos = PrazosPagamento()
+        for lote in self._lotes(COLUNAS_SEGUNDA_PASSADA):
+            prazos = prazos.combinar(PrazosPagamento.de_dataframe(lote, faixas))
+            if faixas is None:
+                continue
+            pagos = lote[lote['Situação'].str.lower() == 'paga']
+            pagos = pagos.assign(Faixa_Cliente=pagos['CPF/CNPJ'].map(faixas))
+            for granularidade, definicao in GRANULARIDADES.items():
+                parcial = pagos.groupby([definicao['coluna'], 'Faixa_Cliente'], observed=True)['Total'].sum()
+                acumulados[granularidade] = _somar(acumulados[granularidade], parcial)
+            parcial = pagos.groupby([coluna_mes, 'CPF/CNPJ'], observed=True, sort=False)['Total'].sum()
+            clientes_por_mes = _somar(clientes_por_mes, parcial)
+        with self._lock:
+            self._memo['prazos'] = prazos
+            for granularidade, acumulado in acumulados.items():
+                self._memo[('faixa_agregado', granularidade)] = _por_periodo(
+                    acumulado, 'Faixa_Cliente', Segmentacao().dtype()
+                )
+            self._memo['clientes_por_mes'] = clientes_por_mes
+
+    def visao_geral(self):
+        return self._memo['visao_geral']
+
+    def ltv_por_cliente(self):
+        return self._memo['ltv']
+
+    def ranking(self):
+        return self._memo['ranking']
+
+    def contagens(self, coluna):
+        return self._memo[('contagens', coluna)]
+
+    def _clientes_por_mes(self):
+        return self._memo['clientes_por_mes']
+
+    def prazos(self):
+        return self._memo['prazos']
+
+    def evolucao_status(self, granularidade):
+        return self._memorizar(
+            ('evolucao_status', granularidade),
+            lambda: resample(self._memo[('status_agregado', granularidade)], granularidade, 'Total', 'Situação')
+        )
+
+    def evolucao_faixa(self, granularidade):
+        def calcular():
+            agregado = self._memo[('faixa_agregado', granularidade)]
+            if agregado.empty:
+                return agregado
+            return resample(agregado, granularidade, 'Total', 'Faixa_Cliente')
+        return self._memorizar(('evolucao_faixa', granularidade), calcular)
+
+    def filtrar(self, situacao='Todas', metodo_pagamento='Todos', limite=50):
+        """Filtro aplicado lote a lote; guarda só as primeiras `limite` linhas e a contagem."""
+        def calcular():
+            primeiras, total = [], 0
+            for lote in self.snapshot.iter_batches():
+                filtrado = DataProcessor(lote).apply_filters(situacao, metodo_pagamento)
+                if sum(len(parte) for parte in primeiras) < limite:
+                    primeiras.append(filtrado.head(limite))
+                total += len(filtrado)
+            exibidas = pd.concat(primeiras, ignore_index=True).head(limite) if primeiras else self.amostra(0)
+            return exibidas, total
+        return self._memorizar(('filtro', situacao, metodo_pagamento, limite), calcular)
+
+    def aquecer(self):
+        """Duas leituras dos dados: métricas e séries por situação; depois as séries por faixa."""
+        usar_compartilhado = self.metricas is not None and self.metricas.versao == self.versao
+        estado = None if usar_compartilhado else MetricsState()
+        self._primeira_passada(estado)
+        resultados = (estado or self.metricas).resultados(self.versao)
+        if resultados is None:
+            # O estado compartilhado mudou durante a leitura: reconstrução local
+            estado = MetricsState()
+            estado.rebuild(self._lotes(COLUNAS_PASSADA), self.versao)
+            resultados = estado.resultados(self.versao)
+        if estado is not None and self.metricas is not None:
+            # Reconstruído fora do lock: inserções seguintes aplicam o delta sobre ele
+            self.metricas.adopt(estado)
+        with self._lock:
+            self._memo.update(resultados)
+        self._segunda_passada()
+        self.faixa_stats()
+        self.concentracao()
+        return self
+
+def artefatos_fora_da_memoria(versao, snapshot, metricas=None):
+    """Construtor do pré-cálculo nos modos fora da memória e memória."""
+    if snapshot.empty:
+        return None
+    return ArtefatosStreaming(versao, snapshot, metricas).aquecer()
@@ -0,0 +1,91 @@
+"""
+Dimensão de calendário com chaves inteiras de período (dia, semana ISO,
+mês e trimestre) e reamostragem vetorizada com preenchimento de lacunas.
+"""
+from lazy_imports import lazy_import
+pd = lazy_import('pandas')
+
+# Chaves: dia=AAAAMMDD, semana=AAAASS (ano/semana ISO), mes=AAAAMM, trimestre=AAAAT
+GRANULARIDADES = {
+    'dia': {'coluna': 'Periodo_Dia', 'rotulo': 'Dia', 'freq': 'D'},
+    'semana': {'coluna': 'Periodo_Semana', 'rotulo': 'Semana', 'freq': 'W-MON'},
+    'mes': {'coluna': 'Periodo_Mes', 'rotulo': 'Mês', 'freq': 'MS'},
+    'trimestre': {'coluna': 'Periodo_Trimestre', 'rotulo': 'Trimestre', 'freq': 'QS'}
+}
+
+def period_keys(datas):
+    """Calcula as chaves inteiras de todas as granularidades para uma série de datas."""
+    datas = pd.to_datetime(datas, errors='coerce')
+    ano = datas.dt.year
+    mes = datas.dt.month
+    iso = datas.dt.isocalendar()
+    chaves = {
+        'dia': ano * 10000 + mes * 100 + datas.dt.day,
+        'semana': iso['year'].astype('Int64') * 100 + iso['week'].astype('Int64'),
+        'mes': ano * 100 + mes,
+        'trimestre': ano * 10 + datas.dt.quarter
+    }
+    return {
+        GRANULARIDADES[granularidade]['coluna']: chave.astype('Int32')
+        for granularidade, chave in chaves.items()
+    }
+
+def key_to_timestamp(chaves, granularidade):
+    """Converte chaves de período na data de início do período."""
+    chaves = pd.Series(chaves).astype('Int64')
+    if granularidade == 'dia':
+        return pd.to_datetime(chaves.astype(str), format='%Y%m%d', errors='coerce')
+    if granularidade == 'semana':
+        texto = (chaves // 100).astype(str) + '-W' + (chaves % 100).astype(str).str.zfill(2) + '-1'
+        return pd.to_datetime(texto, format='%G-W%V-%u', errors='coerce')
+    if granularidade == 'mes':
+        return pd.to_datetime((chaves * 100 + 1).astype(str), format='%Y%m%d', errors='coerce')
+    mes_inicial = (chaves % 10 - 1) * 3 + 1
+    return pd.to_datetime(((chaves // 10) * 10000 + mes_inicial * 100 + 1).astype(str), format='%Y%m%d', errors='coerce')
+
+def period_labels(chaves, granularidade):
+    """Rótulos legíveis para as chaves de período."""
+    chaves = pd.Series(chaves).astype('Int64')
+    if granularidade == 'dia':
+        return key_to_timestamp(chaves, 'dia').dt.strftime('%Y-%m-%d')
+    if granularidade == 'semana':
+        return (chaves // 100).astype(str) + '-S' + (chaves % 100).astype(str).str.zfill(2)
+    if granularidade == 'mes':
+        return (chaves // 100).astype(str) + '-' + (chaves % 100).astype(str).str.zfill(2)
+    return (chaves // 10).astype(str) + '-T' + (chaves % 10).astype(str)
+
+def period_range(chave_inicial, chave_final, granularidade):
+    """Lista contínua de chaves entre dois períodos (inclusive)."""
+    inicio, fim = key_to_timestamp([chave_inicial, chave_final], granularidade)
+    datas = pd.Series(pd.date_range(inicio, fim, freq=GRANULARIDADES[granularidade]['freq']))
+    if granularidade == 'semana' and (datas.empty or datas.iloc[0] != inicio):
+        datas = pd.concat([pd.Series([inicio]), datas], ignore_index=True)
+    coluna = GRANULARIDADES[granularidade]['coluna']
+    return period_keys(datas)[coluna].tolist()
+
+def resample(df, granularidade, valor='Total', grupo=None, agg='sum'):
+    """Agrega `valor` por período (e grupo), preenchendo períodos sem dados com zero.
+
+    Retorna as colunas 'Periodo', [grupo], valor e 'Periodo_Str'.
+    """
+    coluna = GRANULARIDADES[granularidade]['coluna']
+    chaves_grupo = [coluna] + ([grupo] if grupo else [])
+    base = df.dropna(subset=[coluna])
+    if base.empty:
+        return pd.DataFrame(columns=['Periodo'] + ([grupo] if grupo else []) + [valor, 'Periodo_Str'])
+
+    agregado = base.groupby(chaves_grupo, observed=True)[valor].agg(agg)
+
+    periodos = period_range(int(base[coluna].min()), int(base[coluna].max()), granularidade)
+    if grupo:
+        indice = pd.MultiIndex.from_product(
+            [periodos, agregado.index.get_level_values(grupo).unique()],
+            names=['Periodo', grupo]
+        )
+    else:
+        indice = pd.Index(periodos, name='Periodo')
+    agregado.index = agregado.index.set_names(['Periodo'] + ([grupo] if grupo else []))
+
+    resultado = agregado.reindex(indice, fill_value=0).reset_index()
+    resultado['Periodo_Str'] = period_labels(resultado['Periodo'], granularidade).values
+    return resultado
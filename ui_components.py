@@ -1,5 +1,7 @@
 import streamlit as st
-from utils import formatar_moeda, get_ordem_faixas
+from utils import formatar_moeda
+from config import CONCENTRACAO_CONFIG
+from segmentation import Segmentacao
 
 class UIComponents:
     @staticmethod
@@ -54,45 +56,23 @@ class UIComponents:
     def display_faixa_summary(faixa_stats):
         """Exibe resumo por faixa de cliente."""
         st.subheader("📊 Resumo por Faixa de Cliente")
-        col1, col2, col3 = st.columns(3)
+        faixas = Segmentacao().bands()
+        colunas = st.columns(len(faixas))
         
-        ordem_faixas = get_ordem_faixas()
-        
-        with col1:
-            if 'Grupo A (R$ 1.500+)' in faixa_stats.index:
-                grupo_a = faixa_stats.loc['Grupo A (R$ 1.500+)']
-                st.metric(
-                    "🥇 Grupo A (Premium)",
-                    formatar_moeda(grupo_a['Faturamento_Total']),
-                    f"{grupo_a['Percentual_Faturamento']:.1f}% do total"
-                )
-                st.write(f"👥 {int(grupo_a['Qtd_Clientes'])} clientes")
-                st.write(f"🎫 Ticket médio: {formatar_moeda(grupo_a['Ticket_Medio'])}")
-        
-        with col2:
-            if 'Grupo B (R$ 500-1.499)' in faixa_stats.index:
-                grupo_b = faixa_stats.loc['Grupo B (R$ 500-1.499)']
-                st.metric(
-                    "🥈 Grupo B (Médio)",
-                    formatar_moeda(grupo_b['Faturamento_Total']),
-                    f"{grupo_b['Percentual_Faturamento']:.1f}% do total"
-                )
-                st.write(f"👥 {int(grupo_b['Qtd_Clientes'])} clientes")
-                st.write(f"🎫 Ticket médio: {formatar_moeda(grupo_b['Ticket_Medio'])}")
-        
-        with col3:
-            if 'Grupo C (R$ 0-499)' in faixa_stats.index:
-                grupo_c = faixa_stats.loc['Grupo C (R$ 0-499)']
-                st.metric(
-                    "🥉 Grupo C (Básico)",
-                    formatar_moeda(grupo_c['Faturamento_Total']),
-                    f"{grupo_c['Percentual_Faturamento']:.1f}% do total"
-                )
-                st.write(f"👥 {int(grupo_c['Qtd_Clientes'])} clientes")
-                st.write(f"🎫 Ticket médio: {formatar_moeda(grupo_c['Ticket_Medio'])}")
+        for col, faixa in zip(colunas, faixas):
+            with col:
+                if faixa['rotulo'] in faixa_stats.index:
+                    stats = faixa_stats.loc[faixa['rotulo']]
+                    st.metric(
+                        f"{faixa['icone']} {faixa['nome']} ({faixa['descricao']})",
+                        formatar_moeda(stats['Faturamento_Total']),
+                        f"{stats['Percentual_Faturamento']:.1f}% do total"
+                    )
+                    st.write(f"👥 {int(stats['Qtd_Clientes'])} clientes")
+                    st.write(f"🎫 Ticket médio: {formatar_moeda(stats['Ticket_Medio'])}")
     
     @staticmethod
-    def display_ranking_analysis(ranking_clientes, total_geral):
+    def display_ranking_analysis(ranking_clientes, total_geral, concentracao):
         """Exibe análise de concentração de clientes."""
         st.subheader("📊 Análise de Concentração")
         
@@ -103,16 +83,22 @@ class UIComponents:
         
         st.metric("📈 Regra 80/20", f"{percentual_80_20:.1f}%", "Top 20% dos clientes")
         
-        # Top 10 clientes
-        top_10_valor = ranking_clientes.head(10)['Valor_Total'].sum()
-        percentual_top_10 = (top_10_valor / total_geral * 100)
+        # Dependência dos maiores clientes (base do risco), sobre todos os clientes
+        geral = concentracao['geral']
+        top_n = CONCENTRACAO_CONFIG['top_clientes']
+        st.metric(f"🔝 Top {top_n} Clientes", f"{geral['Pct_Top_Clientes']:.1f}%", "do faturamento total")
+        st.metric("👤 Maior Cliente", f"{geral['Pct_Maior_Cliente']:.1f}%", "do faturamento total")
         
-        st.metric("🔝 Top 10 Clientes", f"{percentual_top_10:.1f}%", "do faturamento total")
+        # Concentração sobre todos os clientes
+        st.metric("📐 Índice de Gini", f"{geral['Gini']:.3f}", "0 = igual, 1 = um cliente")
+        st.metric("🏦 HHI", f"{geral['HHI']:,.0f}".replace(',', '.'),
+                  f"≈ {geral['Clientes_Equivalentes']:,.0f} clientes de mesmo peso".replace(',', '.'))
+        st.caption("HHI apenas informativo: o risco considera o maior cliente e os maiores clientes.")
         
         # Concentração de risco
-        if percentual_top_10 > 50:
+        if geral['Risco'] == 'alto':
             st.error("⚠️ Alto risco de concentração!")
-        elif percentual_top_10 > 30:
+        elif geral['Risco'] == 'moderado':
             st.warning("⚡ Concentração moderada")
         else:
             st.success("✅ Diversificação saudável")
@@ -120,11 +106,11 @@ class UIComponents:
     @staticmethod
     def display_instructions():
         """Exibe instruções de uso."""
-        st.info("👆 Faça upload do seu arquivo CSV para começar!")
+        st.info("👆 Faça upload do seu arquivo (CSV, Parquet ou Excel) para começar!")
         
         st.header("📖 Como usar:")
         st.markdown("""
-        1. **Upload**: Faça upload do seu arquivo CSV na barra lateral
+        1. **Upload**: Faça upload do seu arquivo CSV, Parquet ou Excel na barra lateral
         2. **KPIs**: Visualize indicadores principais, LTV e Churn
         3. **Faixas de Cliente**: Analise grupos A, B e C por valor
         4. **Ranking**: Veja top clientes e concentração de faturamento
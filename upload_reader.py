@@ -0,0 +1,120 @@
+"""
+Leitura dos arquivos enviados no upload (CSV, Parquet e Excel). CSV e
+Parquet passam pelo leitor colunar do pyarrow, com várias threads nos
+arquivos grandes e os tipos das colunas conhecidas declarados (sem
+inferência): documentos continuam texto, valores e datas já chegam
+convertidos.
+"""
+from lazy_imports import lazy_import
+from backup import BACKUP_SCHEMA
+from config import UPLOAD_CONFIG
+from validation import _FORMATOS_DIA_MES
+pa = lazy_import('pyarrow')
+csv = lazy_import('pyarrow.csv')
+pc = lazy_import('pyarrow.compute')
+pq = lazy_import('pyarrow.parquet')
+pd = lazy_import('pandas')
+
+# Extensão -> formato aceito no upload
+FORMATOS_UPLOAD = {
+    'csv': 'csv',
+    'parquet': 'parquet',
+    'xlsx': 'excel'
+}
+
+def _tipos():
+    """Tipos Arrow das colunas conhecidas (mesmo esquema do backup)."""
+    tipos = {'string': pa.string(), 'float64': pa.float64(), 'datetime64[ns]': pa.timestamp('ns')}
+    return {col: tipos[dtype] for col, dtype in BACKUP_SCHEMA.items()}
+
+def _usar_threads(dados):
+    return len(dados) >= UPLOAD_CONFIG['threads_a_partir_de_mb'] * 2 ** 20
+
+def _para_pandas(tabela):
+    # Libera cada coluna Arrow assim que convertida: o pico não soma as duas cópias inteiras
+    df = tabela.to_pandas(split_blocks=True, self_destruct=True)
+    del tabela
+    # Devolve ao sistema as páginas que o alocador do Arrow guardou durante a leitura
+    pa.default_memory_pool().release_unused()
+    return df
+
+# ISO sem fuso, para as colunas de datas que misturam formatos
+_FORMATOS_ISO = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S']
+
+def _converter_coluna(coluna, tipo):
+    """Coluna lida como texto no tipo declarado; None se algum valor não converte."""
+    try:
+        return coluna.cast(tipo)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        if not pa.types.is_timestamp(tipo):
+            return None
+    # Datas: cada valor no primeiro formato que servir (dd/mm/aaaa misturado com ISO)
+    convertidas = pc.coalesce(*(pc.strptime(coluna, format=formato, unit='ns', error_is_null=True)
+                                for formato in _FORMATOS_ISO + _FORMATOS_DIA_MES))
+    return convertidas if convertidas.null_count == coluna.null_count else None
+
+def _ler_csv(dados):
+    tipos = _tipos()
+
+    def ler(column_types):
+        return csv.read_csv(
+            pa.BufferReader(dados),
+            read_options=csv.ReadOptions(use_threads=_usar_threads(dados)),
+            convert_options=csv.ConvertOptions(column_types=column_types, strings_can_be_null=True,
+                                               timestamp_parsers=[csv.ISO8601] + _FORMATOS_DIA_MES)
+        )
+
+    try:
+        tabela = ler(tipos)
+    except pa.ArrowInvalid:
+        # Algum valor fora do formato declarado (1.234,56, R$, fusos): só as colunas
+        # numéricas e de datas são lidas como texto e convertidas uma a uma; as que
+        # não convertem ficam texto para a validação, as demais já saem tipadas
+        tipadas = {col: tipo for col, tipo in tipos.items() if tipo != pa.string()}
+        tabela = ler({**tipos, **{col: pa.string() for col in tipadas}})
+        for col, tipo in tipadas.items():
+            indice = tabela.schema.get_field_index(col)
+            if indice < 0:
+                continue
+            convertida = _converter_coluna(tabela.column(indice), tipo)
+            if convertida is not None:
+                tabela = tabela.set_column(indice, col, convertida)
+    return _para_pandas(tabela)
+
+def _ler_parquet(dados):
+    tabela = pq.read_table(pa.BufferReader(dados), use_threads=_usar_threads(dados))
+    for col, tipo in _tipos().items():
+        indice = tabela.schema.get_field_index(col)
+        if indice < 0 or tabela.schema.field(indice).type == tipo:
+            continue
+        try:
+            tabela = tabela.set_column(indice, col, tabela.column(indice).cast(tipo))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # Tipo incompatível: a validação converte (ou manda para a quarentena)
+            pass
+    return _para_pandas(tabela)
+
+def _ler_excel(arquivo):
+    try:
+        # Texto como texto (documentos com zeros à esquerda); valores e datas convertidos na validação
+        texto = [col for col, dtype in BACKUP_SCHEMA.items() if dtype == 'string']
+        return pd.read_excel(arquivo, dtype={col: str for col in texto})
+    except ImportError as e:
+        raise ImportError("Leitura de Excel requer o pacote openpyxl (pip install openpyxl)") from e
+
+def formato_upload(nome):
+    """Formato do arquivo pela extensão (None se não aceito)."""
+    return FORMATOS_UPLOAD.get(nome.rsplit('.', 1)[-1].lower()) if '.' in nome else None
+
+def ler_upload(arquivo, nome=None):
+    """Lê o arquivo enviado (objeto com getvalue(), como o do st.file_uploader) em um DataFrame."""
+    nome = nome or getattr(arquivo, 'name', '')
+    formato = formato_upload(nome)
+    if formato is None:
+        raise ValueError(f"Formato não suportado: {nome} (aceitos: {', '.join(FORMATOS_UPLOAD)})")
+    if formato == 'excel':
+        return _ler_excel(arquivo)
+    dados = arquivo.getvalue()
+    if formato == 'parquet':
+        return _ler_parquet(dados)
+    return _ler_csv(dados)
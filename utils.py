@@ -1,30 +1,30 @@
-import pandas as pd
+from lazy_imports import lazy_import
 from datetime import datetime, timedelta
+from segmentation import Segmentacao
+pd = lazy_import('pandas')
 
 def classificar_cliente_faixa(valor):
     """Classifica clientes por faixa de pagamento."""
-    if valor < 500:
-        return 'Grupo C (R$ 0-499)'
-    elif valor < 1500:
-        return 'Grupo B (R$ 500-1.499)'
-    else:
-        return 'Grupo A (R$ 1.500+)'
+    return str(Segmentacao().classify([valor]).iloc[0])
 
 def formatar_moeda(valor):
     """Formata valor em moeda brasileira."""
     return f"R$ {valor:,.2f}"
 
+def formatar_bytes(valor):
+    """Formata tamanho em bytes para exibição."""
+    for unidade in ['B', 'KB', 'MB', 'GB']:
+        if valor < 1024 or unidade == 'GB':
+            return f"{valor:.1f} {unidade}" if unidade != 'B' else f"{int(valor)} B"
+        valor /= 1024
+
 def get_ordem_faixas():
     """Retorna a ordem padrão das faixas de cliente."""
-    return ['Grupo A (R$ 1.500+)', 'Grupo B (R$ 500-1.499)', 'Grupo C (R$ 0-499)']
+    return Segmentacao().labels()
 
 def get_cores_faixas():
     """Retorna o mapeamento de cores para as faixas."""
-    return {
-        'Grupo A (R$ 1.500+)': '#FFD700',  # Ouro
-        'Grupo B (R$ 500-1.499)': '#C0C0C0',  # Prata
-        'Grupo C (R$ 0-499)': '#CD7F32'  # Bronze
-    }
+    return Segmentacao().colors()
 
 def get_cores_situacao():
     """Retorna o mapeamento de cores para situações de pagamento."""
@@ -0,0 +1,210 @@
+"""
+Validação vetorizada do faturamento na ingestão: colunas obrigatórias,
+tipos, situações permitidas, dígitos verificadores de CPF/CNPJ e datas.
+Cada verificação é uma passada sobre uma coluna; as linhas reprovadas
+seguem para a quarentena com os motivos.
+"""
+from datetime import datetime, timedelta
+from lazy_imports import lazy_import
+from config import VALIDACAO_CONFIG
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Pesos dos dois dígitos verificadores
+_PESOS_DOCUMENTO = {
+    11: ([10, 9, 8, 7, 6, 5, 4, 3, 2], [11, 10, 9, 8, 7, 6, 5, 4, 3, 2]),
+    14: ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+}
+
+def parse_valores(serie):
+    """Converte valores monetários (1234.56, 1.234,56, R$ 10) em float; inválidos viram NaN."""
+    valores = pd.to_numeric(serie, errors='coerce').astype(float)
+    if pd.api.types.is_numeric_dtype(serie):
+        return valores
+    # Apenas os valores que não são números simples passam pela limpeza de texto
+    pendentes = valores.isna() & serie.notna()
+    if pendentes.any():
+        valores[pendentes] = _limpar_valores(serie[pendentes])
+    return valores
+
+def _limpar_valores(serie):
+    texto = serie.astype(str).str.strip()
+    for caractere in [' ', 'R$', '%']:
+        texto = texto.str.replace(caractere, '', regex=False)
+    # Formato 1.234,56: remover separador de milhar antes de trocar a vírgula
+    milhar = texto.str.contains(',', regex=False) & texto.str.contains('.', regex=False)
+    texto = texto.where(~milhar, texto.str.replace('.', '', regex=False))
+    texto = texto.str.replace(',', '.', regex=False)
+    return pd.to_numeric(texto, errors='coerce')
+
+# Datas brasileiras tentadas antes da interpretação livre, que leria 05/01/2024 como 1º de maio
+_FORMATOS_DIA_MES = ['%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S']
+
+def _datas_texto(serie, utc=False):
+    """Datas fora do ISO 8601: dd/mm/aaaa (com hora opcional) e, por último, os demais formatos."""
+    texto = serie.astype(str).str.strip()
+    datas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns, UTC]' if utc else 'datetime64[ns]')
+    for formato in _FORMATOS_DIA_MES + ['mixed']:
+        faltam = datas.isna()
+        if not faltam.any():
+            break
+        datas[faltam] = pd.to_datetime(texto[faltam], errors='coerce', format=formato, utc=utc)
+    return datas
+
+def parse_datas(serie):
+    """Converte datas em datetime sem fuso; fusos diferentes são normalizados para UTC."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        datas = serie
+    else:
+        try:
+            # Caminho rápido: ISO 8601; os demais formatos são interpretados em seguida
+            datas = pd.to_datetime(serie, errors='coerce', format='ISO8601')
+            pendentes = datas.isna() & ~_vazio(serie)
+            if pendentes.any():
+                datas = datas.astype(object)
+                datas[pendentes] = _datas_texto(serie[pendentes])
+                datas = pd.to_datetime(datas)
+        except (ValueError, TypeError):
+            # Fusos diferentes no mesmo lote
+            datas = None
+        if datas is None or not pd.api.types.is_datetime64_any_dtype(datas):
+            datas = _datas_texto(serie, utc=True)
+    if getattr(datas.dt, 'tz', None) is not None:
+        datas = datas.dt.tz_convert('UTC').dt.tz_localize(None)
+    return datas
+
+def _vazio(serie):
+    if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.isna()
+    return serie.isna() | (serie.astype(str).str.strip() == '')
+
+def normalizar_documentos(serie):
+    """CPF/CNPJ na forma canônica: só dígitos, com os zeros à esquerda (11 ou 14 dígitos).
+
+    Valores sem nenhum dígito ficam como estão (a validação os reprova).
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        documentos = pd.to_numeric(serie, errors='coerce').round().astype('Int64').astype(str)
+    else:
+        documentos = serie.astype(str)
+    # Caminho rápido: só os valores fora da forma canônica são reescritos
+    pendentes = ~documentos.str.fullmatch(r'\d{11}|\d{14}').fillna(True).to_numpy(dtype=bool)
+    if not pendentes.any():
+        return documentos
+    # Sufixo '.0' de documentos gravados a partir de colunas float
+    texto = documentos[pendentes].str.strip().str.replace(r'\.0+$', '', regex=True)
+    digitos = texto.str.replace(r'\D', '', regex=True)
+    tamanhos = digitos.str.len().fillna(0)
+    # Zeros à esquerda perdidos em planilhas e CSVs: o tamanho vem da quantidade de dígitos
+    corrigidos = digitos.where(tamanhos > 11, digitos.str.zfill(11))
+    corrigidos = corrigidos.where((tamanhos <= 11) | (tamanhos > 14), digitos.str.zfill(14))
+    documentos = documentos.copy()
+    documentos[pendentes] = corrigidos.where(tamanhos > 0, documentos[pendentes])
+    return documentos
+
+def _matrizes_documento(documentos):
+    """Tamanho de cada documento normalizado e função que devolve a matriz de dígitos de um subconjunto."""
+    tamanhos = documentos.str.len().fillna(0).to_numpy(dtype=np.int64)
+    def matriz(mascara, tamanho):
+        # Bytes de largura fixa: uma linha de `tamanho` dígitos por documento
+        return (documentos[mascara].to_numpy(dtype=object).astype(f'S{tamanho}')
+                .view(np.uint8).reshape(-1, tamanho).astype(np.int64) - ord('0'))
+    return tamanhos, matriz
+
+def valid_documents(serie):
+    """Máscara de CPFs (11 dígitos) e CNPJs (14 dígitos) com dígitos verificadores corretos."""
+    return _documentos_validos(normalizar_documentos(serie))
+
+def _documentos_validos(documentos):
+    # Valores sem dígitos não chegam ao cálculo
+    somente_digitos = documentos.str.fullmatch(r'\d+').fillna(False).to_numpy(dtype=bool)
+    tamanhos, matriz_digitos = _matrizes_documento(documentos)
+    tamanhos = np.where(somente_digitos, tamanhos, 0)
+    validos = np.zeros(len(documentos), dtype=bool)
+    for tamanho, pesos in _PESOS_DOCUMENTO.items():
+        mascara = tamanhos == tamanho
+        if not mascara.any():
+            continue
+        matriz = matriz_digitos(mascara, tamanho)
+        # Sequências repetidas (000..., 111...) passam no cálculo mas não são documentos válidos
+        ok = (matriz != matriz[:, :1]).any(axis=1)
+        for pesos_digito in pesos:
+            n = len(pesos_digito)
+            resto = (matriz[:, :n] @ np.array(pesos_digito)) % 11
+            ok &= np.where(resto < 2, 0, 11 - resto) == matriz[:, n]
+        validos[mascara] = ok
+    return pd.Series(validos, index=documentos.index)
+
+class ResultadoValidacao:
+    def __init__(self, validos, quarentena, colunas_faltando=()):
+        # validos: linhas aprovadas, com Total/Taxa numéricos e datas convertidas
+        self.validos = validos
+        # quarentena: linhas reprovadas (valores originais) e a coluna 'Motivos'
+        self.quarentena = quarentena
+        self.colunas_faltando = list(colunas_faltando)
+
+    def resumo(self):
+        """Quantidade de linhas reprovadas por motivo."""
+        if self.quarentena.empty:
+            return {}
+        return self.quarentena['Motivos'].str.split('; ').explode().value_counts().to_dict()
+
+def validar_faturamento(df, config=None):
+    """Valida um lote do faturamento; retorna ResultadoValidacao."""
+    config = config or VALIDACAO_CONFIG
+    faltando = [col for col in config['colunas_obrigatorias'] if col not in df.columns]
+    if faltando:
+        return ResultadoValidacao(df.iloc[0:0], df.iloc[0:0].assign(Motivos=''), faltando)
+
+    falhas = {}
+    limpos = {}
+
+    # Tipos numéricos: vazio é ausente, texto não numérico é inválido
+    for col, genero in [('Total', 'o'), ('Taxa', 'a')]:
+        if col not in df.columns:
+            continue
+        valores = parse_valores(df[col])
+        vazio = _vazio(df[col])
+        if col in config['colunas_obrigatorias']:
+            falhas[f"{col} ausente"] = vazio
+        falhas[f"{col} inválid{genero}"] = valores.isna() & ~vazio
+        limpos[col] = valores.fillna(0.0)
+
+    # Situação: comparação sem diferenciar maiúsculas, normalizada para a grafia configurada
+    permitidas = {situacao.casefold(): situacao for situacao in config['situacoes_permitidas']}
+    situacao = df['Situação'].astype('string').str.strip().str.casefold().map(permitidas)
+    falhas['Situação não permitida'] = situacao.isna()
+    limpos['Situação'] = situacao
+
+    # Gravado na forma canônica: o mesmo cliente com ou sem os zeros à esquerda é um só
+    documentos = normalizar_documentos(df['CPF/CNPJ'])
+    if config['validar_digitos_documento']:
+        falhas['CPF/CNPJ inválido'] = ~_documentos_validos(documentos)
+    else:
+        falhas['CPF/CNPJ ausente'] = _vazio(df['CPF/CNPJ'])
+    limpos['CPF/CNPJ'] = documentos
+
+    # Datas: criação obrigatória dentro do intervalo plausível; pagamento não anterior à criação
+    data_minima = pd.Timestamp(config['data_minima'])
+    data_maxima = pd.Timestamp(datetime.now() + timedelta(days=config['tolerancia_futuro_dias']))
+    criacao = parse_datas(df['Data de criação'])
+    falhas['Data de criação inválida'] = criacao.isna()
+    falhas['Data de criação fora do intervalo'] = (criacao < data_minima) | (criacao > data_maxima)
+    limpos['Data de criação'] = criacao
+    if 'Data do pagamento' in df.columns:
+        pagamento = parse_datas(df['Data do pagamento'])
+        falhas['Data do pagamento inválida'] = pagamento.isna() & ~_vazio(df['Data do pagamento'])
+        falhas['Pagamento anterior à criação'] = pagamento.dt.normalize() < criacao.dt.normalize()
+        falhas['Data do pagamento no futuro'] = pagamento > data_maxima
+        limpos['Data do pagamento'] = pagamento
+
+    falhas = pd.DataFrame(falhas, index=df.index).fillna(False).astype(bool)
+    reprovadas = falhas.any(axis=1).to_numpy()
+
+    validos = df.loc[~reprovadas].assign(**{col: serie[~reprovadas] for col, serie in limpos.items()})
+    quarentena = df.loc[reprovadas].copy()
+    # Motivos montados só para as linhas reprovadas: produto booleano x rótulos
+    rotulos = np.array([f"{motivo}; " for motivo in falhas.columns], dtype=object)
+    quarentena['Motivos'] = (falhas.loc[reprovadas].to_numpy(dtype=object) @ rotulos) if reprovadas.any() else ''
+    quarentena['Motivos'] = quarentena['Motivos'].astype(str).str.rstrip('; ')
+    return ResultadoValidacao(validos, quarentena)
@@ -1,6 +1,7 @@
-import plotly.express as px
-import plotly.graph_objects as go
+from lazy_imports import lazy_import
 from utils import get_cores_faixas, get_cores_situacao
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
 
 class Visualizations:
     def __init__(self):
@@ -34,11 +35,11 @@ class Visualizations:
         """Cria gráfico de evolução mensal por faixa."""
         fig = px.line(
             evolucao_mensal,
-            x='Mes_Ano_Str',
+            x='Periodo_Str',
             y='Total',
             color='Faixa_Cliente',
-            title='📊 Evolução Mensal do Faturamento por Faixa',
-            labels={'Total': 'Faturamento (R$)', 'Mes_Ano_Str': 'Período'},
+            title='📊 Evolução do Faturamento por Faixa',
+            labels={'Total': 'Faturamento (R$)', 'Periodo_Str': 'Período'},
             color_discrete_map=self.cores_faixas
         )
         fig.update_traces(mode='lines+markers')
@@ -79,15 +80,46 @@ class Visualizations:
         
         return fig
     
+    def create_lorenz_chart(self, lorenz):
+        """Cria gráfico da curva de Lorenz com a linha de igualdade."""
+        fig = go.Figure()
+        
+        fig.add_trace(go.Scatter(
+            x=[0, 100],
+            y=[0, 100],
+            mode='lines',
+            name='Igualdade',
+            line=dict(color='gray', dash='dash')
+        ))
+        
+        fig.add_trace(go.Scatter(
+            x=lorenz['Pct_Clientes'],
+            y=lorenz['Pct_Faturamento'],
+            mode='lines',
+            name='Curva de Lorenz',
+            line=dict(color='red', width=2),
+            fill='tonexty'
+        ))
+        
+        fig.update_layout(
+            title='📉 Curva de Lorenz - Todos os Clientes',
+            xaxis_title='% Acumulado de Clientes (menor para maior valor)',
+            yaxis_title='% Acumulado do Faturamento',
+            hovermode='x unified',
+            height=500
+        )
+        
+        return fig
+    
     def create_evolucao_status_chart(self, df_mensal_status):
         """Cria gráfico de evolução mensal por status."""
         fig = px.bar(
             df_mensal_status,
-            x='Mes_Ano_Str',
+            x='Periodo_Str',
             y='Total',
             color='Situação',
-            title='📈 Evolução Mensal - Distribuição por Status de Pagamento',
-            labels={'Total': 'Valor (R$)', 'Mes_Ano_Str': 'Mês/Ano'},
+            title='📈 Evolução - Distribuição por Status de Pagamento',
+            labels={'Total': 'Valor (R$)', 'Periodo_Str': 'Período'},
             color_discrete_map=self.cores_situacao
         )
         fig.update_layout(
@@ -98,6 +130,37 @@ class Visualizations:
         )
         return fig
     
+    def create_prazo_pagamento_chart(self, histograma):
+        """Cria gráfico da distribuição do prazo de pagamento (% dos pagamentos de cada grupo por faixa de dias)."""
+        percentuais = histograma.div(histograma.sum(axis=1), axis=0) * 100
+        dados = percentuais.rename_axis(index='Grupo', columns='Prazo').stack().rename('Percentual').reset_index()
+        fig = px.bar(
+            dados,
+            x='Prazo',
+            y='Percentual',
+            color='Grupo',
+            barmode='group',
+            title='⏱️ Distribuição do Prazo de Pagamento',
+            labels={'Prazo': 'Dias entre criação e pagamento', 'Percentual': '% dos pagamentos', 'Grupo': histograma.index.name}
+        )
+        fig.update_layout(height=450, hovermode='x unified')
+        return fig
+    
+    def create_aging_chart(self, aging):
+        """Cria gráfico de aging dos valores pendentes e expirados."""
+        fig = px.bar(
+            aging,
+            x='Faixa_Idade',
+            y='Valor',
+            color='Situação',
+            title='📆 Valores em Aberto por Idade',
+            labels={'Faixa_Idade': 'Dias desde a criação', 'Valor': 'Valor (R$)'},
+            color_discrete_map=self.cores_situacao,
+            hover_data=['Qtd']
+        )
+        fig.update_layout(height=450, hovermode='x unified')
+        return fig
+    
     def create_situacao_pie_chart(self, situacao_counts):
         """Cria gráfico de pizza para status de pagamento."""
         fig = px.pie(